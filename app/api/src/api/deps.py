@@ -1 +1,69 @@
 # Dependency functions for API
+"""
+Dependências compartilhadas pelas rotas.
+
+`get_repositorios()` escolhe o backend de dados conforme `BACKEND_DADOS`:
+
+- `rest` (padrão): API REST (PostgREST) do Supabase, via `SUPABASE_URL`/`SUPABASE_KEY`;
+- `sql`: conexão direta com o PostgreSQL, via `DATABASE_URL`;
+- `sqlite`: arquivo SQLite local (`SQLITE_PATH`), para lojas sem boa conexão.
+
+`get_settings()` (de `core/config.py`) devolve a configuração da aplicação,
+carregada uma única vez; também pode ser usada como `Depends(get_settings)`.
+"""
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from app.api.src.core.config import get_settings
+from app.api.src.repository.cliente import ClienteRepository, RestClienteRepository
+from app.api.src.repository.cobranca import CobrancaRepository, RestCobrancaRepository
+from app.api.src.repository.estoque import EstoqueRepository, RestEstoqueRepository
+from app.api.src.repository.venda import RestVendaRepository, VendaRepository
+
+
+@dataclass(frozen=True)
+class Repositorios:
+    estoque: EstoqueRepository
+    venda: VendaRepository
+    cobranca: CobrancaRepository
+    cliente: ClienteRepository
+
+
+_repositorios: Optional[Repositorios] = None
+_repositorios_lock = threading.Lock()
+
+
+def _criar_repositorios(backend: str) -> Repositorios:
+    if backend == "rest":
+        return Repositorios(
+            estoque=RestEstoqueRepository(),
+            venda=RestVendaRepository(),
+            cobranca=RestCobrancaRepository(),
+            cliente=RestClienteRepository(),
+        )
+    if backend in ("sql", "sqlite"):
+        # Importados só aqui: com o backend REST, o SQLAlchemy nem é carregado
+        from app.api.src.repository.sql.cliente import SqlClienteRepository
+        from app.api.src.repository.sql.cobranca import SqlCobrancaRepository
+        from app.api.src.repository.sql.estoque import SqlEstoqueRepository
+        from app.api.src.repository.sql.venda import SqlVendaRepository
+
+        # O SQLite usa os mesmos repositórios SQL; só o engine muda (ver db/session.py)
+        return Repositorios(
+            estoque=SqlEstoqueRepository(),
+            venda=SqlVendaRepository(),
+            cobranca=SqlCobrancaRepository(),
+            cliente=SqlClienteRepository(),
+        )
+    raise ValueError(f"BACKEND_DADOS inválido: '{backend}'. Use 'rest', 'sql' ou 'sqlite'.")
+
+
+def get_repositorios() -> Repositorios:
+    """Retorna os repositórios do backend configurado (criados na primeira chamada)."""
+    global _repositorios
+    if _repositorios is None:
+        with _repositorios_lock:
+            if _repositorios is None:
+                _repositorios = _criar_repositorios(get_settings().backend_dados)
+    return _repositorios
@@ -0,0 +1,144 @@
+# Core analytics
+"""
+Indicadores da carteira de cobranças (`GET /cobranca/analytics`), calculados
+com NumPy sobre colunas, sem laço em Python por cobrança:
+
+- aging: cobranças em aberto por faixa de atraso (a vencer, 0-30, 31-60,
+  61-90 e mais de 90 dias);
+- exposição por cliente: valor em aberto, valor vencido e maior atraso;
+- DSO (days sales outstanding): valor em aberto dividido pelas vendas a prazo
+  do período, multiplicado pelos dias do período.
+
+As datas chegam do banco como texto ISO 8601 e são convertidas em lote para
+`datetime64` (UTC), e o cliente vira uma coluna categórica (códigos inteiros)
+para os totais por cliente com `np.bincount`.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+FAIXAS_AGING = ("a_vencer", "0-30", "31-60", "61-90", "90+")
+# Dias de atraso em que começa cada faixa depois de "0-30"
+_INICIO_FAIXAS = np.array([31, 61, 91])
+_UM_DIA = np.timedelta64(1, "D")
+
+
+def datetimes_utc(textos: Iterable[Optional[str]]) -> np.ndarray:
+    """
+    Converte textos ISO 8601 em `datetime64[s]` (UTC) de uma só vez.
+
+    Aceita data ou data e hora (com 'T' ou espaço), frações de segundo e fuso
+    '+HH:MM'/'-HH:MM' ou 'Z'; sem fuso, vale UTC. None vira NaT.
+    """
+    texto = np.asarray(["NaT" if t is None else t for t in textos], dtype=np.str_)
+    if texto.size == 0:
+        return np.empty(0, dtype="datetime64[s]")
+
+    # Até os segundos: 'YYYY-MM-DDTHH:MM:SS' (frações e fuso ficam de fora)
+    instante = np.strings.replace(texto.astype("U19"), " ", "T").astype("datetime64[s]")
+
+    # Fuso: os 6 últimos caracteres, lidos como códigos Unicode
+    codigos = texto.view(np.uint32).reshape(texto.size, -1)
+    linhas = np.arange(texto.size)
+    fim = np.strings.str_len(texto)
+
+    def caractere(do_fim: int) -> np.ndarray:
+        return codigos[linhas, np.maximum(fim - do_fim, 0)].astype(np.int64)
+
+    sinal = caractere(6)
+    com_fuso = (fim >= 25) & ((sinal == ord("+")) | (sinal == ord("-")))
+    digitos = [caractere(k) - ord("0") for k in (5, 4, 2, 1)]
+    minutos = (digitos[0] * 10 + digitos[1]) * 60 + digitos[2] * 10 + digitos[3]
+    minutos = np.where(com_fuso, np.where(sinal == ord("-"), -minutos, minutos), 0)
+    return instante - minutos.astype("timedelta64[m]")
+
+
+@dataclass
+class Carteira:
+    """Colunas das cobranças: uma posição por cobrança."""
+
+    cliente: np.ndarray
+    vencimento: np.ndarray
+    valor: np.ndarray
+    data_venda: np.ndarray
+    pago: np.ndarray
+
+    @classmethod
+    def de_linhas(cls, abertas: List[Dict[str, Any]], pagas: List[Dict[str, Any]]) -> "Carteira":
+        """Monta as colunas a partir das linhas (cliente, vencimento, valor, data_venda)."""
+        linhas = abertas + pagas
+        return cls(
+            cliente=np.asarray([linha["cliente"] for linha in linhas], dtype=np.str_),
+            vencimento=datetimes_utc(linha["vencimento"] for linha in linhas),
+            valor=np.asarray([linha["valor"] for linha in linhas], dtype=np.float64),
+            data_venda=datetimes_utc(linha.get("data_venda") for linha in linhas),
+            pago=np.repeat([False, True], [len(abertas), len(pagas)]),
+        )
+
+
+def calcular_analytics(carteira: Carteira, dias_dso: int, agora: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Calcula aging, exposição por cliente e DSO da `carteira`.
+
+    Args:
+        carteira: Todas as cobranças (pagas e em aberto).
+        dias_dso: Tamanho do período de vendas usado no DSO, em dias.
+        agora: Data de referência (padrão: o instante atual).
+
+    Returns:
+        Um dict no formato de `CobrancaAnalyticsResponse`.
+    """
+    agora = agora or datetime.now(timezone.utc)
+    referencia = np.datetime64(agora.astimezone(timezone.utc).replace(tzinfo=None), "s")
+
+    # 1. Cobranças em aberto, atraso em dias e faixa de aging de cada uma
+    aberta = ~carteira.pago
+    valor = carteira.valor[aberta]
+    vencida = carteira.vencimento[aberta] <= referencia
+    atraso = np.where(vencida, (referencia - carteira.vencimento[aberta]) // _UM_DIA, 0)
+    faixa = np.where(vencida, 1 + np.searchsorted(_INICIO_FAIXAS, atraso, side="right"), 0)
+
+    quantidade_faixa = np.bincount(faixa, minlength=len(FAIXAS_AGING))
+    valor_faixa = np.bincount(faixa, weights=valor, minlength=len(FAIXAS_AGING))
+
+    # 2. Totais por cliente sobre o código categórico do cliente
+    nomes, codigo = np.unique(carteira.cliente[aberta], return_inverse=True)
+    quantidade_cliente = np.bincount(codigo, minlength=nomes.size)
+    em_aberto = np.bincount(codigo, weights=valor, minlength=nomes.size)
+    vencido = np.bincount(codigo, weights=np.where(vencida, valor, 0.0), minlength=nomes.size)
+    maior_atraso = np.zeros(nomes.size, dtype=np.int64)
+    np.maximum.at(maior_atraso, codigo, atraso)
+    # Maior valor em aberto primeiro; empate pelo nome
+    ordem = np.lexsort((nomes, -em_aberto))
+
+    # 3. DSO: vendas a prazo (todas as cobranças) com data de venda no período
+    no_periodo = (carteira.data_venda > referencia - dias_dso * _UM_DIA) & (carteira.data_venda <= referencia)
+    vendas_no_periodo = float(carteira.valor[no_periodo].sum())
+    total_em_aberto = float(valor.sum())
+    dso = total_em_aberto / vendas_no_periodo * dias_dso if vendas_no_periodo > 0 else None
+
+    return {
+        "data_referencia": agora,
+        "total_em_aberto": round(total_em_aberto, 2),
+        "aging": [
+            {"faixa": nome, "quantidade": int(quantidade), "valor_total": round(float(total), 2)}
+            for nome, quantidade, total in zip(FAIXAS_AGING, quantidade_faixa, valor_faixa)
+        ],
+        "clientes": [
+            {
+                "cliente": str(nomes[i]),
+                "quantidade": int(quantidade_cliente[i]),
+                "em_aberto": round(float(em_aberto[i]), 2),
+                "vencido": round(float(vencido[i]), 2),
+                "maior_atraso_dias": int(maior_atraso[i]),
+            }
+            for i in ordem
+        ],
+        "dso": {
+            "periodo_dias": dias_dso,
+            "vendas_no_periodo": round(vendas_no_periodo, 2),
+            "dias": None if dso is None else round(dso, 1),
+        },
+    }
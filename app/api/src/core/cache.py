@@ -0,0 +1,82 @@
+# Core cache
+"""
+Cache em memória (por processo) das linhas da tabela 'Estoque'.
+
+As buscas de preço do caminho de venda (`_obter_ultimo_preco_unitario`,
+`_obter_precos_unitarios`) consultam este cache antes do Supabase. A consulta
+de quantidade (`/estoque_atual`) sempre lê o banco, pois as escritas de outros
+processos não invalidam este cache; ela apenas o atualiza com a linha lida.
+Cada entrada expira após `ESTOQUE_CACHE_TTL` segundos, e as rotas que escrevem
+no estoque atualizam ou invalidam a categoria afetada.
+"""
+import time
+from typing import Any, Callable, Dict, Generic, Iterable, Optional, Tuple, TypeVar, Union
+
+from app.api.src.core.config import get_settings
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Dicionário simples com expiração por entrada (baseada em `time.monotonic`).
+
+    `ttl` pode ser uma função, lida a cada escrita (ex: um valor da configuração).
+    """
+
+    def __init__(self, ttl: Union[float, Callable[[], float]]):
+        self._ttl = ttl
+        self._dados: Dict[K, Tuple[float, V]] = {}
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl() if callable(self._ttl) else self._ttl
+
+    def get(self, chave: K) -> Optional[V]:
+        item = self._dados.get(chave)
+        if item is None:
+            return None
+        expira_em, valor = item
+        if expira_em <= time.monotonic():
+            # Entrada vencida: remove e trata como ausente
+            self._dados.pop(chave, None)
+            return None
+        return valor
+
+    def set(self, chave: K, valor: V) -> None:
+        ttl = self.ttl
+        if ttl <= 0:
+            return
+        self._dados[chave] = (time.monotonic() + ttl, valor)
+
+    def invalidar(self, chave: K) -> None:
+        self._dados.pop(chave, None)
+
+    def limpar(self) -> None:
+        self._dados.clear()
+
+
+# Linhas de 'Estoque' indexadas por categoria: {"quantidade": ..., "preco_unitario": ...}
+estoque_cache: TTLCache[str, Dict[str, Any]] = TTLCache(lambda: get_settings().estoque_cache_ttl)
+
+
+def atualizar_estoque_cache(linhas: Optional[Iterable[Dict[str, Any]]], categoria: str) -> None:
+    """
+    Atualiza o cache com as linhas devolvidas por uma escrita no Estoque.
+
+    Se a escrita não devolveu a linha completa (ex: 'Prefer: resolution=merge-duplicates'
+    sem 'return=representation'), a categoria é apenas invalidada.
+    """
+    completas = [
+        linha for linha in (linhas or [])
+        if isinstance(linha, dict) and {"categoria", "quantidade", "preco_unitario"} <= linha.keys()
+    ]
+    if not completas:
+        estoque_cache.invalidar(categoria)
+        return
+    for linha in completas:
+        estoque_cache.set(
+            linha["categoria"],
+            {"quantidade": linha["quantidade"], "preco_unitario": linha["preco_unitario"]},
+        )
@@ -1 +1,103 @@
 # Core configuration
+"""
+Configuração da aplicação em um único objeto (`Settings`, com pydantic-settings).
+
+Os valores vêm das variáveis de ambiente e, se existir, do arquivo `.env` do
+diretório de trabalho (as variáveis de ambiente têm prioridade). Os nomes das
+variáveis são os dos campos em maiúsculas (ex: `supabase_url` -> `SUPABASE_URL`).
+
+Nenhum módulo lê o ambiente ao ser importado: `get_settings()` carrega a
+configuração na primeira chamada e devolve sempre o mesmo objeto. As rotas a
+obtêm por `app.api.src.api.deps.get_settings`.
+"""
+from functools import lru_cache
+from typing import Literal, Optional
+
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+    # --- Backend de dados: 'rest' (PostgREST), 'sql' (PostgreSQL direto) ou 'sqlite' (arquivo local) ---
+    backend_dados: Literal["rest", "sql", "sqlite"] = "rest"
+
+    # --- Supabase (BACKEND_DADOS=rest) ---
+    supabase_url: Optional[str] = None
+    supabase_key: Optional[str] = None
+    supabase_pool_size: int = 20
+    supabase_timeout: float = 15.0
+    supabase_http2: bool = False
+    supabase_gzip: bool = True
+    # Leituras idênticas simultâneas compartilham uma única chamada ao Supabase
+    supabase_single_flight: bool = True
+
+    # --- Circuit breaker e repetições do cliente do Supabase (core/resiliencia.py) ---
+    supabase_cb_falhas: int = 5
+    supabase_cb_aberto: float = 30
+    supabase_retry_tentativas: int = 2
+    supabase_retry_espera: float = 0.1
+    supabase_retry_espera_maxima: float = 1.0
+    supabase_retry_proporcao: float = 0.1
+    supabase_retry_fichas: float = 10
+
+    # --- Conexão direta com o PostgreSQL (BACKEND_DADOS=sql) ---
+    database_url: Optional[str] = None
+    database_pool_size: int = 10
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30
+    # Statements compilados mantidos em cache pelo SQLAlchemy (por engine)
+    database_statement_cache_size: int = 500
+
+    # --- Banco SQLite local (BACKEND_DADOS=sqlite) ---
+    sqlite_path: str = "bonobrownie.db"
+
+    # --- Caches e respostas HTTP ---
+    estoque_cache_ttl: float = 30
+    cache_control_max_age: int = 5
+    response_cache_ttl: float = 5
+    response_cache_stale: float = 60
+    response_cache_max_bytes: int = 16 * 1024 * 1024
+    tamanho_pagina_streaming: int = 1000
+    server_timing: bool = True
+
+    # --- Vendas ---
+    # Venda, cobrança e baixa de estoque em uma única chamada à função 'registrar_venda' do banco
+    venda_transacional: bool = False
+    venda_write_behind: bool = False
+    venda_write_behind_estoque: bool = False
+
+    # --- Outbox das escritas adiadas (core/outbox.py) ---
+    outbox_path: str = "outbox.db"
+    outbox_intervalo: float = 1.0
+    outbox_lote: int = 500
+    outbox_espera_maxima: float = 60
+    outbox_max_tentativas: int = 10
+    # Segundos que as anotações de uma venda aguardam a confirmação antes de serem enviadas mesmo assim
+    outbox_reserva: float = 120
+
+    # --- Idempotency-Key (core/idempotencia.py) ---
+    idempotencia_ttl: float = 86400
+    idempotencia_max_chaves: int = 10000
+
+    # --- Totais em memória (core/recebiveis.py e core/resumo_vendas.py) ---
+    recebiveis_em_memoria: bool = True
+    recebiveis_reconciliacao: float = 300
+    resumo_vendas_em_memoria: bool = True
+    resumo_vendas_reconciliacao: float = 300
+    # Reconstrução completa a partir de todo o histórico, em segundos (0: só na inicialização)
+    resumo_vendas_reconstrucao: float = 0
+    # Espera entre tentativas de reconstrução quando o banco falha, em segundos
+    resumo_vendas_espera: float = 30
+
+    @field_validator("backend_dados", mode="before")
+    @classmethod
+    def _backend_minusculo(cls, valor):
+        return valor.lower() if isinstance(valor, str) else valor
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Retorna a configuração da aplicação, carregada na primeira chamada."""
+    return Settings()
@@ -0,0 +1,107 @@
+# Core ETag
+"""
+Respostas JSON com ETag forte e `Cache-Control`, para leituras consultadas
+com frequência (ex: os tablets do caixa que atualizam o estoque a cada poucos
+segundos).
+
+O ETag é um hash do próprio corpo da resposta: se o cliente (ou um cache HTTP
+intermediário) enviar `If-None-Match` com o mesmo valor, a resposta é um `304`
+sem corpo. A consulta ao banco ainda acontece, mas o JSON não trafega de novo.
+
+`Cache-Control: public, max-age=CACHE_CONTROL_MAX_AGE` permite que um cache
+na frente da API sirva a mesma resposta por alguns segundos e depois apenas
+a revalide.
+"""
+import hashlib
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from fastapi import Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+
+from app.api.src.core.config import get_settings
+
+
+@lru_cache(maxsize=None)
+def _adaptador(modelo: Any) -> TypeAdapter:
+    return TypeAdapter(modelo)
+
+
+def calcular_etag(corpo: bytes) -> str:
+    """ETag forte (entre aspas) a partir dos bytes do corpo da resposta."""
+    return '"' + hashlib.sha256(corpo).hexdigest()[:32] + '"'
+
+
+def etag_confere(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Indica se o cabeçalho `If-None-Match` contém o ETag atual.
+
+    Segue a comparação fraca exigida para `If-None-Match` (RFC 9110): um
+    `W/"..."` enviado pelo cliente também vale. `*` sempre confere.
+    """
+    if not if_none_match:
+        return False
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip()
+        if candidato == "*" or candidato.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def renderizar_json(conteudo: Any, modelo: Any = None) -> bytes:
+    """
+    Serializa `conteudo` exatamente como a `JSONResponse` do FastAPI.
+
+    `modelo` é o `response_model` da rota, se houver: retornar uma `Response`
+    pula a validação do FastAPI, então ela é feita aqui.
+    """
+    if modelo is not None:
+        adaptador = _adaptador(modelo)
+        conteudo = adaptador.dump_python(adaptador.validate_python(conteudo), mode="json")
+    return JSONResponse(jsonable_encoder(conteudo)).body
+
+
+def responder_json(
+    request: Request,
+    corpo: bytes,
+    *,
+    max_age: Optional[int] = None,
+    vary: Optional[str] = None,
+) -> Response:
+    """
+    Devolve o corpo JSON já serializado com ETag e `Cache-Control`, ou um
+    `304` se o cliente já tem essa versão.
+
+    Args:
+        request: A requisição (para ler o `If-None-Match`).
+        corpo: O JSON da resposta (ver `renderizar_json`).
+        max_age: Segundos em que a resposta pode ser reutilizada sem revalidar
+            (padrão: `CACHE_CONTROL_MAX_AGE`).
+        vary: Valor do cabeçalho `Vary` (ex: 'Accept' nas rotas com streaming).
+    """
+    if max_age is None:
+        max_age = get_settings().cache_control_max_age
+    cabecalhos: Dict[str, str] = {
+        "ETag": calcular_etag(corpo),
+        "Cache-Control": f"public, max-age={max_age}",
+    }
+    if vary:
+        cabecalhos["Vary"] = vary
+
+    if etag_confere(request.headers.get("if-none-match"), cabecalhos["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos)
+    return Response(corpo, media_type="application/json", headers=cabecalhos)
+
+
+def responder_com_etag(
+    request: Request,
+    conteudo: Any,
+    *,
+    modelo: Any = None,
+    max_age: Optional[int] = None,
+    vary: Optional[str] = None,
+) -> Response:
+    """Atalho para `responder_json(request, renderizar_json(conteudo, modelo))`."""
+    return responder_json(request, renderizar_json(conteudo, modelo), max_age=max_age, vary=vary)
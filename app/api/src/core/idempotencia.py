@@ -0,0 +1,191 @@
+# Core idempotência
+"""
+Suporte ao cabeçalho `Idempotency-Key` nas rotas de escrita
+(`POST /vendas/vender`, `POST /cobranca/adicionar_cobranca`).
+
+Quando a requisição de um tablet expira, ele a reenvia. Com a mesma
+`Idempotency-Key`:
+
+- se a primeira já terminou com sucesso, a resposta guardada é devolvida sem
+  nenhuma chamada ao banco (com o cabeçalho `Idempotent-Replayed: true`);
+- se a primeira ainda está em andamento, a repetição aguarda o resultado dela
+  em vez de gravar de novo em paralelo;
+- se a primeira falhou, a chave é liberada e a repetição executa normalmente.
+
+Reusar a chave com outro corpo é um erro do cliente (422). As chaves ficam
+guardadas em memória (por processo) por `IDEMPOTENCIA_TTL` segundos, contados
+a partir do fim da requisição, até no máximo `IDEMPOTENCIA_MAX_CHAVES` chaves
+(as concluídas há mais tempo saem primeiro). Uma chave cuja requisição ainda
+está em andamento nunca expira nem é descartada: senão uma repetição gravaria
+de novo em paralelo.
+"""
+import asyncio
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import Response
+
+from app.api.src.core.config import get_settings
+from app.api.src.core.etag import renderizar_json
+
+TAMANHO_MAXIMO_CHAVE = 255
+
+
+@dataclass
+class _Registro:
+    impressao: str
+    expira_em: float
+    futuro: asyncio.Future
+    status_code: Optional[int] = None
+    corpo: Optional[bytes] = None
+
+
+class IdempotencyStore:
+    """
+    Respostas por chave de idempotência, com expiração e limite de tamanho.
+
+    Os limites omitidos vêm da configuração (`IDEMPOTENCIA_*`).
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_chaves: Optional[int] = None):
+        self._ttl = ttl
+        self._max_chaves = max_chaves
+        self._registros: "OrderedDict[str, _Registro]" = OrderedDict()
+
+    @property
+    def ttl(self) -> float:
+        return get_settings().idempotencia_ttl if self._ttl is None else self._ttl
+
+    @property
+    def max_chaves(self) -> int:
+        return get_settings().idempotencia_max_chaves if self._max_chaves is None else self._max_chaves
+
+    def __len__(self) -> int:
+        return len(self._registros)
+
+    async def executar(
+        self,
+        chave: str,
+        impressao: str,
+        executar: Callable[[], Awaitable[Any]],
+        status_code: int,
+    ) -> Response:
+        """
+        Executa `executar()` uma única vez por `chave` e devolve a resposta JSON.
+
+        Args:
+            chave: Rota + `Idempotency-Key`.
+            impressao: Hash do corpo da requisição, para detectar reuso da chave.
+            executar: A lógica da rota; o retorno vira o corpo da resposta.
+            status_code: Status da resposta de sucesso.
+        """
+        while True:
+            self._expurgar()
+            registro = self._registros.get(chave)
+            if registro is None:
+                break
+            if registro.impressao != impressao:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Esta Idempotency-Key já foi usada com outro corpo de requisição.",
+                )
+            if registro.corpo is not None:
+                return self._responder(registro, repetida=True)
+            try:
+                # A repetição aguarda a primeira; se ela falhar, a mesma exceção sobe aqui
+                await asyncio.shield(registro.futuro)
+            except asyncio.CancelledError:
+                if not registro.futuro.cancelled():
+                    raise
+                # A primeira foi cancelada antes de terminar: tenta de novo
+
+        futuro = asyncio.get_running_loop().create_future()
+        # Em andamento: só começa a expirar quando terminar
+        registro = _Registro(impressao, math.inf, futuro)
+        self._registros[chave] = registro
+        self._limitar()
+
+        try:
+            conteudo = await executar()
+            corpo = renderizar_json(conteudo)
+        except BaseException as e:
+            # Falhou: a chave é liberada para que uma nova tentativa execute de novo
+            if self._registros.get(chave) is registro:
+                del self._registros[chave]
+            if isinstance(e, asyncio.CancelledError):
+                futuro.cancel()
+            else:
+                futuro.set_exception(e)
+                futuro.exception()  # evita o aviso de exceção não lida quando ninguém aguarda
+            raise
+
+        registro.status_code, registro.corpo = status_code, corpo
+        registro.expira_em = time.monotonic() + self.ttl
+        if self._registros.get(chave) is registro:
+            # Ordem de conclusão = ordem de expiração (ver `_expurgar`)
+            self._registros.move_to_end(chave)
+        futuro.set_result(None)
+        self._limitar()
+        return self._responder(registro, repetida=False)
+
+    def _expurgar(self) -> None:
+        # As concluídas ficam na ordem de conclusão e têm o mesmo TTL: as
+        # vencidas estão antes da primeira que ainda vale. As em andamento
+        # (expira_em infinito) são puladas.
+        agora = time.monotonic()
+        vencidas = []
+        for chave, registro in self._registros.items():
+            if registro.corpo is None:
+                continue
+            if registro.expira_em > agora:
+                break
+            vencidas.append(chave)
+        for chave in vencidas:
+            del self._registros[chave]
+
+    def _limitar(self) -> None:
+        # Acima do limite saem as concluídas mais antigas; se todas estão em
+        # andamento, o limite é excedido até que alguma termine
+        excesso = len(self._registros) - self.max_chaves
+        if excesso <= 0:
+            return
+        concluidas = [chave for chave, registro in self._registros.items() if registro.corpo is not None]
+        for chave in concluidas[:excesso]:
+            del self._registros[chave]
+
+    @staticmethod
+    def _responder(registro: _Registro, repetida: bool) -> Response:
+        headers = {"Idempotent-Replayed": "true"} if repetida else None
+        return Response(registro.corpo, status_code=registro.status_code, media_type="application/json", headers=headers)
+
+
+idempotency_store = IdempotencyStore()
+
+
+async def responder_idempotente(
+    request: Request,
+    chave: Optional[str],
+    executar: Callable[[], Awaitable[Any]],
+    status_code: int = status.HTTP_201_CREATED,
+) -> Response:
+    """
+    Resposta de uma rota de escrita que aceita `Idempotency-Key`.
+
+    Sem a chave, `executar()` roda normalmente. A chave vale por rota: a mesma
+    chave em rotas diferentes não colide.
+    """
+    if chave is not None and not 0 < len(chave) <= TAMANHO_MAXIMO_CHAVE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A Idempotency-Key deve ter entre 1 e {TAMANHO_MAXIMO_CHAVE} caracteres.",
+        )
+    if chave is None:
+        return Response(renderizar_json(await executar()), status_code=status_code, media_type="application/json")
+
+    impressao = hashlib.sha256(await request.body()).hexdigest()
+    return await idempotency_store.executar(f"{request.url.path}:{chave}", impressao, executar, status_code)
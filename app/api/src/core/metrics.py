@@ -0,0 +1,123 @@
+# Core metrics
+"""
+Métricas no formato do Prometheus, expostas em `GET /metrics`.
+
+- `http_request_duration_seconds`: latência das requisições por método, rota
+  (o template, ex: `/api/v1/estoque/{categoria_produto}/estoque`) e status;
+- `upstream_request_duration_seconds` / `upstream_requests_total`: chamadas ao
+  banco por tabela e método (`Estoque GET`, `Cobranca POST`, `rpc/registrar_venda
+  POST`; `SQL` nos backends sql/sqlite), com o resultado (`ok` ou `erro`);
+- `upstream_requests_coalesced_total`: GETs que não foram ao Supabase porque
+  uma chamada idêntica já estava em andamento;
+- `upstream_retries_total`, `upstream_circuit_open` e
+  `upstream_retry_budget_tokens`: repetições, estado do circuito e orçamento
+  de repetições do cliente do Supabase (ver `core/resiliencia.py`);
+- `outbox_pending_writes`: escritas do modo write-behind ainda no outbox;
+- `threadpool_*`: ocupação do threadpool do AnyIO, usado pelas rotas síncronas
+  e pelo backend SQL.
+"""
+import time
+
+from anyio import to_thread
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.api.src.core.resiliencia import ABERTO, circuito_supabase, orcamento_retentativas
+from app.api.src.core.server_timing import registrar_chamada
+
+# Faixas pensadas para chamadas de rede ao Supabase (dezenas a centenas de ms)
+FAIXAS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latência das requisições HTTP, por rota.",
+    ["method", "route", "status"],
+    buckets=FAIXAS_LATENCIA,
+)
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds",
+    "Latência das chamadas ao banco (Supabase/PostgREST ou SQL), por tabela e método.",
+    ["tabela", "method"],
+    buckets=FAIXAS_LATENCIA,
+)
+UPSTREAM_REQUESTS = Counter(
+    "upstream_requests_total",
+    "Chamadas ao banco, por tabela, método e resultado.",
+    ["tabela", "method", "resultado"],
+)
+UPSTREAM_COALESCED = Counter(
+    "upstream_requests_coalesced_total",
+    "Leituras que aproveitaram uma chamada idêntica já em andamento (single-flight).",
+    ["tabela"],
+)
+UPSTREAM_RETRIES = Counter(
+    "upstream_retries_total",
+    "Repetições de leituras ao Supabase após uma falha transitória.",
+    ["tabela"],
+)
+UPSTREAM_CIRCUIT_OPEN = Gauge(
+    "upstream_circuit_open",
+    "1 enquanto o circuito do Supabase está aberto (chamadas falham na hora).",
+)
+UPSTREAM_RETRY_BUDGET = Gauge(
+    "upstream_retry_budget_tokens",
+    "Fichas disponíveis no orçamento global de repetições.",
+)
+OUTBOX_PENDENTES = Gauge(
+    "outbox_pending_writes",
+    "Escritas anotadas no outbox local ainda não confirmadas pelo banco.",
+)
+OUTBOX_MORTAS = Gauge(
+    "outbox_dead_letters",
+    "Escritas do outbox recusadas pelo banco OUTBOX_MAX_TENTATIVAS vezes e não mais enviadas.",
+)
+THREADPOOL_TOTAL = Gauge("threadpool_threads_total", "Threads disponíveis no threadpool do AnyIO.")
+THREADPOOL_EM_USO = Gauge("threadpool_threads_in_use", "Threads do threadpool ocupadas.")
+THREADPOOL_FILA = Gauge("threadpool_tasks_waiting", "Tarefas aguardando uma thread livre.")
+
+
+def observar_upstream(tabela: str, method: str, inicio: float, sucesso: bool) -> None:
+    """Registra uma chamada ao banco iniciada em `inicio` (`time.perf_counter()`)."""
+    duracao = time.perf_counter() - inicio
+    UPSTREAM_LATENCY.labels(tabela, method).observe(duracao)
+    UPSTREAM_REQUESTS.labels(tabela, method, "ok" if sucesso else "erro").inc()
+    registrar_chamada(tabela, method, duracao)
+
+
+def observar_coalescida(tabela: str) -> None:
+    """Registra uma leitura atendida por uma chamada idêntica já em andamento."""
+    UPSTREAM_COALESCED.labels(tabela).inc()
+
+
+def observar_retentativa(tabela: str) -> None:
+    """Registra a repetição de uma leitura após uma falha transitória."""
+    UPSTREAM_RETRIES.labels(tabela).inc()
+
+
+def rota_da_requisicao(request: Request) -> str:
+    """
+    Template da rota atendida, ex: `/api/v1/estoque/{categoria_produto}/estoque`
+    (evita uma série por valor de parâmetro). Requisições que não casaram com
+    nenhuma rota ficam em `desconhecida`.
+    """
+    rota = request.scope.get("route")
+    # include_router copia as rotas com o prefixo: `path` já é o template completo
+    return getattr(rota, "path", None) or "desconhecida"
+
+
+def _atualizar_threadpool() -> None:
+    # O limitador padrão é do loop em execução: precisa ser lido de dentro dele
+    limitador = to_thread.current_default_thread_limiter()
+    estatisticas = limitador.statistics()
+    THREADPOOL_TOTAL.set(limitador.total_tokens)
+    THREADPOOL_EM_USO.set(estatisticas.borrowed_tokens)
+    THREADPOOL_FILA.set(estatisticas.tasks_waiting)
+
+
+async def responder_metricas() -> Response:
+    """Corpo de `GET /metrics`, no formato de texto do Prometheus."""
+    _atualizar_threadpool()
+    UPSTREAM_CIRCUIT_OPEN.set(1 if circuito_supabase.estado == ABERTO else 0)
+    UPSTREAM_RETRY_BUDGET.set(orcamento_retentativas.fichas)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
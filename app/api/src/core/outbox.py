@@ -0,0 +1,376 @@
+# Core outbox
+"""
+Outbox local e durável para as escritas que podem sair do caminho crítico da
+venda (modo write-behind de `POST /vendas/vender`).
+
+Com `VENDA_WRITE_BEHIND` ativo, a rota grava a Venda e apenas anota a Cobranca
+(e, com `VENDA_WRITE_BEHIND_ESTOQUE`, a baixa de estoque) em um arquivo SQLite
+local (`OUTBOX_PATH`). A resposta sai assim que a anotação está no disco.
+
+As anotações da venda são feitas antes de gravá-la, como reservas
+(`reservar_escritas`): o worker não as envia até que a rota as confirme
+(`confirmar_escritas`), depois de a Venda ser gravada, ou as descarte
+(`descartar_escritas`), se a Venda falhar. Se o processo cair entre uma coisa
+e outra, a reserva é enviada mesmo assim depois de `OUTBOX_RESERVA` segundos:
+a cobrança de uma venda gravada nunca se perde.
+
+Um worker em segundo plano, iniciado no `lifespan` da aplicação, descarrega o
+outbox a cada `OUTBOX_INTERVALO` segundos (ou assim que algo é anotado):
+
+- as cobranças pendentes vão em um único insert em lote;
+- as baixas de estoque são somadas por categoria, um incremento por categoria;
+- o que falhar volta para a fila com espera exponencial (até
+  `OUTBOX_ESPERA_MAXIMA` segundos) e é tentado de novo.
+
+Uma linha só sai do outbox depois que o banco confirmou a escrita, então o
+envio pode se repetir (ex: o banco gravou, mas a resposta se perdeu em um
+timeout, ou o processo caiu antes da remoção). Por isso cada anotação recebe
+uma chave única, gerada aqui: a cobrança é gravada com ela em
+`Cobranca.chave_outbox` (reenvios são ignorados pelo banco) e a baixa de
+estoque usa a função `incrementar_estoque_outbox`, que registra as chaves já
+aplicadas. Repetir um envio não tem efeito.
+
+Uma linha recusada pelo banco (erro 4xx da própria escrita) por
+`OUTBOX_MAX_TENTATIVAS` vezes deixa de ser enviada: fica no arquivo, marcada
+como morta (`SELECT * FROM outbox WHERE morta = 1`), para inspeção. Falhas de
+conexão, 5xx e erros de credencial ou de limite de taxa (401, 403, 408, 429)
+não contam para esse limite.
+"""
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.api.src.api.deps import get_repositorios
+from app.api.src.core.cache import atualizar_estoque_cache
+from app.api.src.core.config import get_settings
+from app.api.src.core.metrics import OUTBOX_MORTAS, OUTBOX_PENDENTES
+from app.api.src.core.recebiveis import registrar_cobrancas_criadas
+from app.api.src.core.response_cache import invalidar_tabelas
+from app.api.src.repository.base import RepositorioError
+
+# Tipos de escrita anotados no outbox
+COBRANCA = "cobranca"
+ESTOQUE = "estoque"
+
+# Erros 4xx que não dizem respeito à escrita em si: a linha segue sendo tentada
+_ERROS_TRANSITORIOS = {401, 403, 408, 429}
+
+
+@dataclass(frozen=True)
+class Linha:
+    """Uma escrita pendente do outbox."""
+    id: int
+    tipo: str
+    payload: Dict[str, Any]
+    tentativas: int
+    chave: str
+
+
+class Outbox:
+    """Fila de escritas pendentes em um arquivo SQLite (modo WAL, `synchronous=FULL`)."""
+
+    def __init__(self, caminho: str):
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        # Cada anotação só é confirmada depois de sincronizada com o disco
+        self._conexao.execute("PRAGMA synchronous=FULL")
+        self._conexao.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tipo TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                proxima_tentativa REAL NOT NULL,
+                ultimo_erro TEXT,
+                chave TEXT,
+                morta INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        # Arquivos criados antes das colunas 'chave' e 'morta'
+        colunas = {coluna[1] for coluna in self._conexao.execute("PRAGMA table_info(outbox)")}
+        if "chave" not in colunas:
+            self._conexao.execute("ALTER TABLE outbox ADD COLUMN chave TEXT")
+        if "morta" not in colunas:
+            self._conexao.execute("ALTER TABLE outbox ADD COLUMN morta INTEGER NOT NULL DEFAULT 0")
+        self._conexao.execute("UPDATE outbox SET chave = lower(hex(randomblob(16))) WHERE chave IS NULL")
+        self._conexao.execute(
+            "CREATE INDEX IF NOT EXISTS outbox_proxima_tentativa_idx ON outbox (proxima_tentativa, id)"
+        )
+
+    def adicionar(self, tipo: str, payloads: Iterable[Dict[str, Any]]) -> None:
+        """Anota as escritas em uma única transação, cada uma com uma chave nova."""
+        self._inserir([(tipo, payload) for payload in payloads], time.time())
+
+    def reservar(self, escritas: Iterable[Tuple[str, Dict[str, Any]]]) -> List[int]:
+        """
+        Anota as escritas (tipo, payload) em uma única transação, retidas por
+        `OUTBOX_RESERVA` segundos ou até `confirmar`.
+
+        Returns:
+            Os ids das linhas anotadas.
+        """
+        return self._inserir(escritas, time.time() + get_settings().outbox_reserva)
+
+    def confirmar(self, ids: List[int]) -> None:
+        """Libera as linhas reservadas para o próximo descarregamento."""
+        agora = time.time()
+        with self._lock, self._conexao:
+            self._conexao.executemany(
+                "UPDATE outbox SET proxima_tentativa = ? WHERE id = ?", [(agora, id_) for id_ in ids]
+            )
+
+    def _inserir(self, escritas: Iterable[Tuple[str, Dict[str, Any]]], proxima_tentativa: float) -> List[int]:
+        ids = []
+        with self._lock, self._conexao:
+            for tipo, payload in escritas:
+                cursor = self._conexao.execute(
+                    "INSERT INTO outbox (tipo, payload, proxima_tentativa, chave) VALUES (?, ?, ?, ?)",
+                    (tipo, json.dumps(payload, ensure_ascii=False), proxima_tentativa, uuid.uuid4().hex),
+                )
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def pendentes(self, limite: int) -> List[Linha]:
+        """As escritas vivas cuja próxima tentativa já chegou, na ordem em que foram anotadas."""
+        with self._lock:
+            cursor = self._conexao.execute(
+                "SELECT id, tipo, payload, tentativas, chave FROM outbox"
+                " WHERE morta = 0 AND proxima_tentativa <= ? ORDER BY id LIMIT ?",
+                (time.time(), limite),
+            )
+            return [
+                Linha(id_, tipo, json.loads(payload), tentativas, chave)
+                for id_, tipo, payload, tentativas, chave in cursor
+            ]
+
+    def remover(self, ids: List[int]) -> None:
+        with self._lock, self._conexao:
+            self._conexao.executemany("DELETE FROM outbox WHERE id = ?", [(id_,) for id_ in ids])
+
+    def adiar(self, linhas: List[Linha], erro: str, definitivo: bool = False) -> List[int]:
+        """
+        Devolve as linhas à fila com espera exponencial (com jitter) pela tentativa.
+
+        Com `definitivo` (o banco recusou a própria escrita), as linhas que
+        chegam a `OUTBOX_MAX_TENTATIVAS` tentativas são marcadas como mortas.
+
+        Returns:
+            Os ids das linhas marcadas como mortas.
+        """
+        agora = time.time()
+        settings = get_settings()
+        mortas = [
+            linha.id for linha in linhas if definitivo and linha.tentativas + 1 >= settings.outbox_max_tentativas
+        ]
+        with self._lock, self._conexao:
+            self._conexao.executemany(
+                "UPDATE outbox SET tentativas = ?, proxima_tentativa = ?, ultimo_erro = ?, morta = ? WHERE id = ?",
+                [
+                    (
+                        linha.tentativas + 1,
+                        agora + random.uniform(0.5, 1.0) * min(settings.outbox_espera_maxima, 2 ** linha.tentativas),
+                        erro,
+                        int(linha.id in mortas),
+                        linha.id,
+                    )
+                    for linha in linhas
+                ],
+            )
+        return mortas
+
+    def contar(self) -> int:
+        """Quantas escritas ainda serão enviadas."""
+        with self._lock:
+            return self._conexao.execute("SELECT COUNT(*) FROM outbox WHERE morta = 0").fetchone()[0]
+
+    def contar_mortas(self) -> int:
+        """Quantas escritas foram descartadas e aguardam inspeção."""
+        with self._lock:
+            return self._conexao.execute("SELECT COUNT(*) FROM outbox WHERE morta = 1").fetchone()[0]
+
+    def fechar(self) -> None:
+        with self._lock:
+            self._conexao.close()
+
+
+_outbox: Optional[Outbox] = None
+_outbox_lock = threading.Lock()
+_acordar: Optional[asyncio.Event] = None
+_parar: Optional[asyncio.Event] = None
+_worker: Optional[asyncio.Task] = None
+
+
+def get_outbox() -> Outbox:
+    """Retorna o outbox compartilhado, criando o arquivo na primeira chamada."""
+    global _outbox
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                _outbox = Outbox(get_settings().outbox_path)
+    return _outbox
+
+
+async def enfileirar(tipo: str, payloads: List[Dict[str, Any]]) -> None:
+    """Anota escritas no outbox (fora do loop de eventos) e acorda o worker."""
+    await run_in_threadpool(get_outbox().adicionar, tipo, payloads)
+    if _acordar is not None:
+        _acordar.set()
+
+
+async def reservar_escritas(escritas: List[Tuple[str, Dict[str, Any]]]) -> List[int]:
+    """Reserva escritas no outbox (ver `Outbox.reservar`) e devolve os ids."""
+    return await run_in_threadpool(get_outbox().reservar, escritas)
+
+
+async def confirmar_escritas(ids: List[int]) -> None:
+    """Libera as escritas reservadas e acorda o worker."""
+    await run_in_threadpool(get_outbox().confirmar, ids)
+    if _acordar is not None:
+        _acordar.set()
+
+
+async def descartar_escritas(ids: List[int]) -> None:
+    """Remove escritas reservadas que não devem mais ser enviadas."""
+    await run_in_threadpool(get_outbox().remover, ids)
+
+
+def _definitivo(e: RepositorioError) -> bool:
+    """Se o erro é do banco recusando a escrita (e repeti-la não vai adiantar)."""
+    return 400 <= e.status_code < 500 and e.status_code not in _ERROS_TRANSITORIOS
+
+
+async def _adiar(outbox: Outbox, linhas: List[Linha], e: RepositorioError) -> None:
+    mortas = await run_in_threadpool(outbox.adiar, linhas, e.mensagem, _definitivo(e))
+    if mortas:
+        print(
+            f"Alerta: {len(mortas)} escrita(s) do outbox recusada(s) {get_settings().outbox_max_tentativas} vezes "
+            f"e descartada(s) (ids {mortas}); ficam no arquivo, marcadas como mortas: {e}"
+        )
+
+
+async def _descarregar_cobrancas(outbox: Outbox, linhas: List[Linha]) -> None:
+    try:
+        # Com a chave da anotação, uma cobrança já gravada em um envio anterior é ignorada
+        data = await get_repositorios().cobranca.inserir_idempotente(
+            [{**linha.payload, "chave_outbox": linha.chave} for linha in linhas]
+        )
+    except RepositorioError as e:
+        if _definitivo(e) and len(linhas) > 1:
+            # Uma linha inválida não pode travar o lote: as cobranças são reenviadas uma a uma
+            for linha in linhas:
+                await _descarregar_cobrancas(outbox, [linha])
+            return
+        print(f"Alerta: Falha ao descarregar {len(linhas)} cobrança(s) do outbox: {e}")
+        await _adiar(outbox, linhas, e)
+        return
+    finally:
+        invalidar_tabelas("Cobranca")
+    registrar_cobrancas_criadas(data)
+    await run_in_threadpool(outbox.remover, [linha.id for linha in linhas])
+
+
+async def _descarregar_baixas(outbox: Outbox, categoria: str, linhas: List[Linha]) -> None:
+    quantidade = sum(linha.payload["quantidade"] for linha in linhas)
+    try:
+        data = await get_repositorios().estoque.incrementar_idempotente(
+            categoria,
+            [(linha.chave, linha.payload["quantidade"]) for linha in linhas],
+            observacao=f"Adicao de {quantidade} unidade(s) ao estoque",
+        )
+    except RepositorioError as e:
+        if _definitivo(e) and len(linhas) > 1:
+            for linha in linhas:
+                await _descarregar_baixas(outbox, categoria, [linha])
+            return
+        print(f"Alerta: Falha ao descarregar a baixa de estoque de '{categoria}' do outbox: {e}")
+        await _adiar(outbox, linhas, e)
+        return
+    atualizar_estoque_cache(data, categoria)
+    await run_in_threadpool(outbox.remover, [linha.id for linha in linhas])
+
+
+async def _descarregar_estoque(outbox: Outbox, linhas: List[Linha]) -> None:
+    por_categoria: Dict[str, List[Linha]] = defaultdict(list)
+    for linha in linhas:
+        por_categoria[linha.payload["categoria"]].append(linha)
+    for categoria, linhas_categoria in por_categoria.items():
+        await _descarregar_baixas(outbox, categoria, linhas_categoria)
+
+
+async def descarregar(outbox: Optional[Outbox] = None) -> int:
+    """
+    Envia ao banco um lote de escritas pendentes.
+
+    Returns:
+        Quantas linhas foram lidas do outbox (0 quando não há nada a enviar).
+    """
+    outbox = outbox or get_outbox()
+    linhas = await run_in_threadpool(outbox.pendentes, get_settings().outbox_lote)
+    cobrancas = [linha for linha in linhas if linha.tipo == COBRANCA]
+    baixas = [linha for linha in linhas if linha.tipo == ESTOQUE]
+    if cobrancas:
+        await _descarregar_cobrancas(outbox, cobrancas)
+    if baixas:
+        await _descarregar_estoque(outbox, baixas)
+    OUTBOX_PENDENTES.set(await run_in_threadpool(outbox.contar))
+    OUTBOX_MORTAS.set(await run_in_threadpool(outbox.contar_mortas))
+    return len(linhas)
+
+
+async def _executar_worker() -> None:
+    settings = get_settings()
+    while not _parar.is_set():
+        try:
+            lidas = await descarregar()
+        except Exception as e:
+            print(f"Alerta: Falha no worker do outbox: {e}")
+            lidas = 0
+        if lidas >= settings.outbox_lote:
+            # Ainda há lote cheio na fila: segue sem esperar
+            continue
+        _acordar.clear()
+        try:
+            await asyncio.wait_for(_acordar.wait(), timeout=settings.outbox_intervalo)
+        except asyncio.TimeoutError:
+            pass
+
+
+def iniciar_outbox() -> None:
+    """
+    Inicia o worker (chamado no início da aplicação) se o write-behind está
+    ativo ou se sobraram escritas de uma execução anterior.
+    """
+    global _acordar, _parar, _worker
+    settings = get_settings()
+    if not (settings.venda_write_behind or os.path.exists(settings.outbox_path)):
+        return
+    get_outbox()
+    _acordar, _parar = asyncio.Event(), asyncio.Event()
+    _worker = asyncio.create_task(_executar_worker())
+
+
+async def parar_outbox() -> None:
+    """Para o worker após o descarregamento em andamento e fecha o arquivo."""
+    global _outbox, _worker
+    if _worker is not None:
+        _parar.set()
+        _acordar.set()
+        await _worker
+        _worker = None
+    with _outbox_lock:
+        outbox, _outbox = _outbox, None
+    if outbox is not None:
+        outbox.fechar()
@@ -0,0 +1,187 @@
+# Core recebíveis
+"""
+Totais das cobranças em aberto mantidos em memória (por processo), para que o
+resumo de `GET /cobranca/pendentes` não precise varrer a tabela 'Cobranca'.
+
+- As rotas que escrevem em 'Cobranca' informam as linhas criadas
+  (`registrar_criadas`) e pagas (`registrar_pagas`); os totais de pendentes e
+  vencidas são ajustados na hora.
+- Uma cobrança pendente passa a vencida quando o seu `vencimento` chega: as
+  cobranças ficam em um heap por vencimento e são promovidas na leitura.
+- A cada `RECEBIVEIS_RECONCILIACAO` segundos, todas as cobranças em aberto são
+  relidas do banco e os totais são recalculados, corrigindo escritas feitas
+  fora da API (ou por outros processos).
+
+Enquanto a primeira carga não termina, `resumo()` devolve None e a rota consulta
+o banco como antes. `RECEBIVEIS_EM_MEMORIA=false` desliga os contadores.
+"""
+import asyncio
+import heapq
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.api.src.api.deps import get_repositorios
+from app.api.src.core.config import get_settings
+
+PENDENTES = "pendentes"
+VENCIDAS = "vencidas"
+
+
+def _timestamp(vencimento: Any) -> float:
+    """Instante do vencimento (texto ISO do banco; sem fuso, é tratado como UTC)."""
+    data = vencimento if isinstance(vencimento, datetime) else datetime.fromisoformat(str(vencimento).replace("Z", "+00:00"))
+    if data.tzinfo is None:
+        data = data.replace(tzinfo=timezone.utc)
+    return data.timestamp()
+
+
+class _Totais:
+    """Quantidade e soma (exata, em `Decimal`) de um grupo de cobranças."""
+
+    __slots__ = ("quantidade", "valor_total")
+
+    def __init__(self):
+        self.quantidade = 0
+        self.valor_total = Decimal(0)
+
+    def somar(self, valor: Decimal, sinal: int = 1) -> None:
+        self.quantidade += sinal
+        self.valor_total += sinal * valor
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {"quantidade": self.quantidade, "valor_total": float(self.valor_total)}
+
+
+class ContadoresRecebiveis:
+    """Totais de pendentes e vencidas, ajustados por escrita e promovidos por tempo."""
+
+    def __init__(self):
+        self.pronto = False
+        # id -> (vencimento, valor, grupo) de cada cobrança em aberto
+        self._abertas: Dict[int, Tuple[float, Decimal, str]] = {}
+        self._totais = {PENDENTES: _Totais(), VENCIDAS: _Totais()}
+        # (vencimento, id) das pendentes; entradas de cobranças já pagas são ignoradas
+        self._heap: List[Tuple[float, int]] = []
+        # Escritas vistas durante uma recarga, reaplicadas sobre o resultado dela
+        self._diario: Optional[List[Tuple[str, Dict[str, Any]]]] = None
+
+    def resumo(self) -> Optional[Dict[str, Any]]:
+        """O mesmo formato de `CobrancaRepository.resumo()`, ou None antes da primeira carga."""
+        if not self.pronto:
+            return None
+        self._promover(time.time())
+        return {grupo: totais.como_dict() for grupo, totais in self._totais.items()}
+
+    def registrar_criadas(self, linhas: Iterable[Dict[str, Any]]) -> None:
+        for linha in linhas or []:
+            if isinstance(linha, dict) and "id" in linha:
+                self._aplicar("criada", linha)
+
+    def registrar_pagas(self, linhas: Iterable[Dict[str, Any]]) -> None:
+        for linha in linhas or []:
+            if isinstance(linha, dict) and "id" in linha:
+                self._aplicar("paga", linha)
+
+    async def recarregar(self) -> None:
+        """Recalcula os totais a partir de todas as cobranças em aberto no banco."""
+        novo = ContadoresRecebiveis()
+        self._diario = []
+        try:
+            paginas = get_repositorios().cobranca.paginas(
+                False, ["id", "vencimento", "valor"], get_settings().tamanho_pagina_streaming
+            )
+            async for pagina in paginas:
+                for linha in pagina:
+                    novo._adicionar(linha)
+            # Escritas feitas durante a leitura: adicionar e remover por id é idempotente
+            for operacao, linha in self._diario:
+                novo._aplicar(operacao, linha)
+        finally:
+            self._diario = None
+        self._abertas, self._totais, self._heap = novo._abertas, novo._totais, novo._heap
+        self.pronto = True
+
+    def _aplicar(self, operacao: str, linha: Dict[str, Any]) -> None:
+        if self._diario is not None:
+            self._diario.append((operacao, linha))
+        if operacao == "paga" or linha.get("status_pagamento"):
+            self._remover(linha["id"])
+        else:
+            self._adicionar(linha)
+
+    def _adicionar(self, linha: Dict[str, Any]) -> None:
+        self._remover(linha["id"])
+        vencimento, valor = _timestamp(linha["vencimento"]), Decimal(str(linha["valor"]))
+        grupo = PENDENTES if vencimento > time.time() else VENCIDAS
+        self._abertas[linha["id"]] = (vencimento, valor, grupo)
+        self._totais[grupo].somar(valor)
+        if grupo == PENDENTES:
+            heapq.heappush(self._heap, (vencimento, linha["id"]))
+
+    def _remover(self, id_: int) -> None:
+        aberta = self._abertas.pop(id_, None)
+        if aberta is not None:
+            _, valor, grupo = aberta
+            self._totais[grupo].somar(valor, -1)
+
+    def _promover(self, agora: float) -> None:
+        """Move para vencidas as pendentes cujo vencimento já chegou."""
+        while self._heap and self._heap[0][0] <= agora:
+            vencimento, id_ = heapq.heappop(self._heap)
+            aberta = self._abertas.get(id_)
+            if aberta is None or aberta[0] != vencimento or aberta[2] != PENDENTES:
+                continue
+            self._abertas[id_] = (vencimento, aberta[1], VENCIDAS)
+            self._totais[PENDENTES].somar(aberta[1], -1)
+            self._totais[VENCIDAS].somar(aberta[1])
+
+
+recebiveis = ContadoresRecebiveis()
+_reconciliacao: Optional[asyncio.Task] = None
+
+
+def registrar_cobrancas_criadas(linhas: Optional[Iterable[Dict[str, Any]]]) -> None:
+    """Chamada pelas rotas que inserem em 'Cobranca', com as linhas devolvidas pelo banco."""
+    if get_settings().recebiveis_em_memoria:
+        recebiveis.registrar_criadas(linhas)
+
+
+def registrar_cobrancas_pagas(linhas: Optional[Iterable[Dict[str, Any]]]) -> None:
+    """Chamada pelas rotas que marcam cobranças como pagas, com as linhas atualizadas."""
+    if get_settings().recebiveis_em_memoria:
+        recebiveis.registrar_pagas(linhas)
+
+
+def resumo_em_memoria() -> Optional[Dict[str, Any]]:
+    """Totais em memória, ou None se desligados ou ainda não carregados."""
+    return recebiveis.resumo() if get_settings().recebiveis_em_memoria else None
+
+
+async def _reconciliar_periodicamente() -> None:
+    while True:
+        try:
+            await recebiveis.recarregar()
+        except Exception as e:
+            # Qualquer falha (banco, configuração, dado malformado) só adia a próxima recarga
+            print(f"Alerta: Falha ao recarregar os totais de cobranças: {e!r}")
+        await asyncio.sleep(get_settings().recebiveis_reconciliacao)
+
+
+def iniciar_recebiveis() -> None:
+    """Faz a primeira carga e agenda as reconciliações (chamado no início da aplicação)."""
+    global _reconciliacao
+    if get_settings().recebiveis_em_memoria:
+        _reconciliacao = asyncio.create_task(_reconciliar_periodicamente())
+
+
+async def parar_recebiveis() -> None:
+    global _reconciliacao
+    if _reconciliacao is not None:
+        _reconciliacao.cancel()
+        try:
+            await _reconciliacao
+        except asyncio.CancelledError:
+            pass
+        _reconciliacao = None
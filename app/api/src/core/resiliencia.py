@@ -0,0 +1,168 @@
+# Core resiliência
+"""
+Proteções do cliente do Supabase contra um upstream degradado.
+
+- `CircuitBreaker`: depois de `SUPABASE_CB_FALHAS` falhas seguidas (erro de
+  conexão, timeout ou status 5xx), o circuito abre e as chamadas falham na hora
+  com `CircuitoAbertoError`, sem ocupar conexões nem esperar o timeout. Após
+  `SUPABASE_CB_ABERTO` segundos, uma única chamada de teste passa
+  (meio-aberto): se der certo o circuito fecha, se falhar ele abre de novo.
+- `OrcamentoRetentativas`: as leituras idempotentes (GET) que falham de forma
+  transitória são repetidas com espera exponencial e jitter, mas cada
+  repetição gasta uma ficha de um balde global que só é reabastecido pelas
+  chamadas normais (`SUPABASE_RETRY_PROPORCAO` fichas por chamada). Assim, as
+  repetições nunca passam de uma fração do tráfego e não multiplicam a carga
+  sobre um Supabase já em falha.
+"""
+import math
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+from app.api.src.core.config import get_settings
+
+# Status que indicam um problema do upstream (e não da requisição)
+STATUS_TRANSITORIOS = frozenset({502, 503, 504})
+
+FECHADO = "fechado"
+ABERTO = "aberto"
+MEIO_ABERTO = "meio_aberto"
+
+
+class CircuitoAbertoError(httpx.TransportError):
+    """A chamada não foi feita porque o circuito do Supabase está aberto."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"Supabase indisponível (circuito aberto); tente novamente em {math.ceil(retry_after)}s.")
+
+
+class CircuitBreaker:
+    """
+    Circuito por falhas consecutivas, com uma chamada de teste no estado meio-aberto.
+
+    `falhas` e `aberto_por` omitidos vêm da configuração (`SUPABASE_CB_*`).
+    """
+
+    def __init__(self, falhas: Optional[int] = None, aberto_por: Optional[float] = None):
+        self._falhas = falhas
+        self._aberto_por = aberto_por
+        self.estado = FECHADO
+        self._falhas_seguidas = 0
+        self._aberto_ate = 0.0
+        self._testando = False
+        self._lock = threading.Lock()
+
+    @property
+    def falhas(self) -> int:
+        return get_settings().supabase_cb_falhas if self._falhas is None else self._falhas
+
+    @property
+    def aberto_por(self) -> float:
+        return get_settings().supabase_cb_aberto if self._aberto_por is None else self._aberto_por
+
+    def segundos_para_reabrir(self) -> float:
+        """Segundos até o circuito aceitar uma chamada de teste (0 se não está aberto)."""
+        if self.estado != ABERTO:
+            return 0.0
+        return max(0.0, self._aberto_ate - time.monotonic())
+
+    def liberar(self) -> None:
+        """
+        Autoriza uma chamada ou levanta `CircuitoAbertoError`.
+
+        No estado meio-aberto, apenas uma chamada de teste por vez é liberada.
+        """
+        with self._lock:
+            if self.estado == ABERTO:
+                restante = self._aberto_ate - time.monotonic()
+                if restante > 0:
+                    raise CircuitoAbertoError(restante)
+                self.estado = MEIO_ABERTO
+            if self.estado == MEIO_ABERTO:
+                if self._testando:
+                    raise CircuitoAbertoError(1.0)
+                self._testando = True
+
+    def abandonar(self) -> None:
+        """A chamada liberada não chegou a um resultado (ex: foi cancelada)."""
+        with self._lock:
+            self._testando = False
+
+    def registrar_sucesso(self) -> None:
+        with self._lock:
+            self._falhas_seguidas = 0
+            self._testando = False
+            self.estado = FECHADO
+
+    def registrar_falha(self) -> None:
+        with self._lock:
+            self._falhas_seguidas += 1
+            self._testando = False
+            if self.estado == MEIO_ABERTO or self._falhas_seguidas >= self.falhas:
+                self.estado = ABERTO
+                self._aberto_ate = time.monotonic() + self.aberto_por
+
+
+class OrcamentoRetentativas:
+    """
+    Balde de fichas: cada chamada deposita `proporcao` e cada repetição gasta uma ficha.
+
+    `proporcao` e `maximo` omitidos vêm da configuração (`SUPABASE_RETRY_*`);
+    o balde começa cheio.
+    """
+
+    def __init__(self, proporcao: Optional[float] = None, maximo: Optional[float] = None):
+        self._proporcao = proporcao
+        self._maximo = maximo
+        self._fichas: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def proporcao(self) -> float:
+        return get_settings().supabase_retry_proporcao if self._proporcao is None else self._proporcao
+
+    @property
+    def maximo(self) -> float:
+        return get_settings().supabase_retry_fichas if self._maximo is None else self._maximo
+
+    @property
+    def fichas(self) -> float:
+        return self.maximo if self._fichas is None else self._fichas
+
+    def depositar(self) -> None:
+        with self._lock:
+            self._fichas = min(self.maximo, self.fichas + self.proporcao)
+
+    def retirar(self) -> bool:
+        """Gasta uma ficha, se houver; False significa que a repetição não deve ser feita."""
+        with self._lock:
+            if self.fichas < 1:
+                return False
+            self._fichas = self.fichas - 1
+            return True
+
+
+def espera_com_jitter(tentativa: int, base: Optional[float] = None, maxima: Optional[float] = None) -> float:
+    """Espera antes da repetição `tentativa` (1, 2, ...): exponencial com jitter total."""
+    settings = get_settings()
+    base = settings.supabase_retry_espera if base is None else base
+    maxima = settings.supabase_retry_espera_maxima if maxima is None else maxima
+    return random.uniform(0, min(maxima, base * 2 ** (tentativa - 1)))
+
+
+def falha_do_upstream(response: Optional[httpx.Response]) -> bool:
+    """Se a resposta (None para erro de conexão/timeout) conta como falha para o circuito."""
+    return response is None or response.status_code >= 500
+
+
+def pode_repetir(response: Optional[httpx.Response]) -> bool:
+    """Se a falha é transitória: erro de conexão/timeout ou 502/503/504."""
+    return response is None or response.status_code in STATUS_TRANSITORIOS
+
+
+circuito_supabase = CircuitBreaker()
+orcamento_retentativas = OrcamentoRetentativas()
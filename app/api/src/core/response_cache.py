@@ -0,0 +1,188 @@
+# Core response cache
+"""
+Cache em memória (por processo) das respostas JSON das rotas de relatório
+(`/cobranca/pendentes`, `/cobranca/cobrancas_ativas`, `/cobranca/cobrancas_pagas`).
+
+- Cada entrada guarda o corpo já serializado e as tabelas lidas para montá-lo.
+- Até `RESPONSE_CACHE_TTL` segundos a entrada é servida direto. Depois disso,
+  e por mais `RESPONSE_CACHE_STALE` segundos, ela ainda é servida enquanto uma
+  nova versão é buscada em segundo plano (stale-while-revalidate).
+- As rotas que escrevem em uma tabela chamam `invalidar_tabelas`, e todas as
+  entradas que leram essa tabela saem do cache na hora.
+- O total de bytes guardados é limitado a `RESPONSE_CACHE_MAX_BYTES`; ao passar
+  do limite, saem as entradas usadas há mais tempo (LRU).
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.api.src.core.config import get_settings
+from app.api.src.core.etag import renderizar_json, responder_json
+
+
+@dataclass
+class _Entrada:
+    corpo: bytes
+    tabelas: Tuple[str, ...]
+    criada_em: float
+
+
+class ResponseCache:
+    """
+    Corpos de resposta por chave, com stale-while-revalidate, tags por tabela e LRU.
+
+    Os limites omitidos vêm da configuração (`RESPONSE_CACHE_*`).
+    """
+
+    def __init__(self, ttl: Optional[float] = None, stale: Optional[float] = None, max_bytes: Optional[int] = None):
+        self._ttl = ttl
+        self._stale = stale
+        self._max_bytes = max_bytes
+        self._entradas: "OrderedDict[str, _Entrada]" = OrderedDict()
+        self._bytes = 0
+        # Incrementada a cada invalidação: uma leitura iniciada antes de uma
+        # escrita na mesma tabela não pode gravar o seu resultado
+        self._geracoes: Dict[str, int] = {}
+        self._atualizando: Dict[str, asyncio.Task] = {}
+
+    @property
+    def ttl(self) -> float:
+        return get_settings().response_cache_ttl if self._ttl is None else self._ttl
+
+    @property
+    def stale(self) -> float:
+        return get_settings().response_cache_stale if self._stale is None else self._stale
+
+    @property
+    def max_bytes(self) -> int:
+        return get_settings().response_cache_max_bytes if self._max_bytes is None else self._max_bytes
+
+    @property
+    def tamanho_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    async def obter(
+        self,
+        chave: str,
+        tabelas: Iterable[str],
+        carregar: Callable[[], Awaitable[bytes]],
+    ) -> bytes:
+        """
+        Retorna o corpo guardado em `chave` ou o carrega com `carregar()`.
+
+        Uma entrada vencida, mas ainda dentro da janela de `stale`, é
+        devolvida na hora e recarregada em segundo plano (uma única recarga
+        por chave).
+        """
+        tabelas = tuple(tabelas)
+        if self.ttl + self.stale <= 0:
+            return await carregar()
+
+        entrada = self._entradas.get(chave)
+        if entrada is not None:
+            idade = time.monotonic() - entrada.criada_em
+            if idade < self.ttl + self.stale:
+                self._entradas.move_to_end(chave)
+                if idade >= self.ttl and chave not in self._atualizando:
+                    self._recarregar_em_segundo_plano(chave, tabelas, carregar)
+                return entrada.corpo
+        return await self._carregar(chave, tabelas, carregar)
+
+    def invalidar_tabelas(self, *tabelas: str) -> None:
+        """Remove todas as entradas que leram alguma das `tabelas`."""
+        for tabela in tabelas:
+            self._geracoes[tabela] = self._geracoes.get(tabela, 0) + 1
+        alvo = set(tabelas)
+        for chave in [c for c, e in self._entradas.items() if alvo.intersection(e.tabelas)]:
+            self._remover(chave)
+
+    def limpar(self) -> None:
+        self._entradas.clear()
+        self._bytes = 0
+
+    async def _carregar(
+        self,
+        chave: str,
+        tabelas: Tuple[str, ...],
+        carregar: Callable[[], Awaitable[bytes]],
+    ) -> bytes:
+        geracoes = [self._geracoes.get(tabela, 0) for tabela in tabelas]
+        corpo = await carregar()
+        if geracoes == [self._geracoes.get(tabela, 0) for tabela in tabelas]:
+            self._guardar(chave, _Entrada(corpo, tabelas, time.monotonic()))
+        return corpo
+
+    def _recarregar_em_segundo_plano(
+        self,
+        chave: str,
+        tabelas: Tuple[str, ...],
+        carregar: Callable[[], Awaitable[bytes]],
+    ) -> None:
+        tarefa = asyncio.create_task(self._carregar(chave, tabelas, carregar))
+        self._atualizando[chave] = tarefa
+
+        def _concluida(tarefa: asyncio.Task) -> None:
+            self._atualizando.pop(chave, None)
+            if not tarefa.cancelled() and tarefa.exception() is not None:
+                # A entrada antiga continua valendo até o fim da janela de 'stale'
+                print(f"Alerta: Falha ao atualizar o cache de '{chave}': {tarefa.exception()}")
+
+        tarefa.add_done_callback(_concluida)
+
+    def _guardar(self, chave: str, entrada: _Entrada) -> None:
+        self._remover(chave)
+        if len(entrada.corpo) > self.max_bytes:
+            return
+        self._entradas[chave] = entrada
+        self._bytes += len(entrada.corpo)
+        while self._bytes > self.max_bytes:
+            _, antiga = self._entradas.popitem(last=False)
+            self._bytes -= len(antiga.corpo)
+
+    def _remover(self, chave: str) -> None:
+        entrada = self._entradas.pop(chave, None)
+        if entrada is not None:
+            self._bytes -= len(entrada.corpo)
+
+
+response_cache = ResponseCache()
+
+
+def invalidar_tabelas(*tabelas: str) -> None:
+    """Chamada pelas rotas que escrevem nas `tabelas` (ex: 'Cobranca', 'Venda')."""
+    response_cache.invalidar_tabelas(*tabelas)
+
+
+async def responder_com_cache(
+    request: Request,
+    tabelas: Iterable[str],
+    carregar: Callable[[], Awaitable[Any]],
+    *,
+    modelo: Any = None,
+    vary: Optional[str] = None,
+) -> Response:
+    """
+    Resposta JSON de uma rota de leitura, servida do cache quando possível.
+
+    A chave é o caminho mais a query string (com os parâmetros ordenados).
+    `carregar()` devolve o conteúdo da rota, que é validado com `modelo` e
+    serializado uma única vez por carga. A resposta sai com ETag (ver
+    `core/etag.py`), então um `If-None-Match` atual ainda recebe 304.
+    """
+    chave = request.url.path
+    if request.query_params:
+        chave += "?" + "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+
+    async def _carregar_corpo() -> bytes:
+        return renderizar_json(await carregar(), modelo)
+
+    corpo = await response_cache.obter(chave, tabelas, _carregar_corpo)
+    return responder_json(request, corpo, vary=vary)
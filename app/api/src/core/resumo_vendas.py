@@ -0,0 +1,238 @@
+# Core resumo de vendas
+"""
+Totais de vendas por categoria e por dia, mantidos em memória (por processo),
+para que `GET /vendas/resumo` responda sem percorrer as vendas.
+
+- Cada venda gravada pela API (`/vendas/vender`, `/vendas/vender_lote`, modo
+  transacional) soma as unidades e a receita no dia (UTC) da `data_venda`.
+- Na inicialização, o resumo é reconstruído a partir de todo o histórico da
+  tabela 'Venda'; as vendas gravadas durante a reconstrução são anotadas e
+  somadas no fim, sem contar duas vezes as que a leitura já trouxe.
+- Depois, a cada `RESUMO_VENDAS_RECONCILIACAO` segundos, são lidas só as vendas
+  com `id` maior que o último já lido, incorporando as gravadas por outros
+  workers, pelo outbox de outro processo ou fora da API; as que este processo
+  já somou são reconhecidas pelo `id` e não contam duas vezes.
+- Vendas alteradas ou apagadas no banco, ou gravadas com um `id` menor que o
+  último lido (transações concorrentes de outro processo), só entram em uma
+  reconstrução completa: na inicialização ou, se `RESUMO_VENDAS_RECONSTRUCAO`
+  for maior que zero, a cada tantos segundos.
+- Uma consulta custa proporcional ao número de dias do intervalo (vezes o
+  número de categorias), e não ao número de vendas.
+
+Enquanto a reconstrução não termina, a rota soma as vendas do intervalo a
+partir do banco. `RESUMO_VENDAS_EM_MEMORIA=false` desliga o resumo em memória.
+"""
+import asyncio
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from app.api.src.api.deps import get_repositorios
+from app.api.src.core.config import get_settings
+
+COLUNAS_RESUMO = ["id", "categoria_produto", "data_venda", "qtd_unidades", "valor_total"]
+
+DIA = "dia"
+SEMANA = "semana"
+
+
+def _dia(data_venda: Any) -> int:
+    """Dia (ordinal) da venda em UTC; datas sem fuso são tratadas como UTC."""
+    data = data_venda if isinstance(data_venda, datetime) else datetime.fromisoformat(str(data_venda).replace("Z", "+00:00"))
+    if data.tzinfo is not None:
+        data = data.astimezone(timezone.utc)
+    return data.toordinal()
+
+
+class ResumoVendas:
+    """Unidades e receita por (categoria, dia)."""
+
+    def __init__(self):
+        self.pronto = False
+        # categoria -> dia (ordinal) -> [unidades, receita]
+        self._dias: Dict[str, Dict[int, List[Any]]] = {}
+        # Vendas gravadas durante uma reconstrução, somadas ao resultado dela
+        self._diario: Optional[Dict[int, Dict[str, Any]]] = None
+        # Maior id lido do banco e o da leitura anterior
+        self._marca = 0
+        self._marca_anterior = 0
+        # Ids acima de '_marca_anterior' já somados: nenhuma venda conta duas vezes
+        self._contadas: Set[int] = set()
+
+    def registrar(self, vendas: Iterable[Dict[str, Any]]) -> None:
+        for venda in vendas or []:
+            if not isinstance(venda, dict) or "id" not in venda:
+                continue
+            if venda["id"] in self._contadas:
+                continue
+            if self._diario is not None:
+                self._diario[venda["id"]] = venda
+            if venda["id"] > self._marca_anterior:
+                self._contadas.add(venda["id"])
+            self._somar(venda)
+
+    def consultar(
+        self,
+        de: date,
+        ate: date,
+        categoria: Optional[str] = None,
+        agrupamento: str = DIA,
+    ) -> List[Dict[str, Any]]:
+        """
+        Totais por categoria e período (dia ou semana iniciada na segunda-feira)
+        entre `de` e `ate` (inclusivos). Só aparecem os períodos com vendas.
+        """
+        categorias = [categoria] if categoria is not None else sorted(self._dias)
+        itens = []
+        for nome in categorias:
+            dias = self._dias.get(nome, {})
+            periodos: Dict[int, List[Any]] = {}
+            for dia in range(de.toordinal(), ate.toordinal() + 1):
+                totais = dias.get(dia)
+                if totais is None:
+                    continue
+                periodo = dia - date.fromordinal(dia).weekday() if agrupamento == SEMANA else dia
+                acumulado = periodos.setdefault(periodo, [0, Decimal(0)])
+                acumulado[0] += totais[0]
+                acumulado[1] += totais[1]
+            itens.extend(
+                {
+                    "categoria": nome,
+                    "periodo": date.fromordinal(periodo),
+                    "unidades": unidades,
+                    "receita": float(receita),
+                }
+                for periodo, (unidades, receita) in sorted(periodos.items())
+            )
+        return itens
+
+    async def reconstruir(self) -> None:
+        """Recalcula o resumo a partir de todas as vendas do banco."""
+        novo = ResumoVendas()
+        lidas: Set[int] = set()
+        marca = 0
+        self._diario = {}
+        try:
+            paginas = get_repositorios().venda.paginas(
+                None, None, None, get_settings().tamanho_pagina_streaming, colunas=COLUNAS_RESUMO
+            )
+            async for pagina in paginas:
+                for venda in pagina:
+                    novo._somar(venda)
+                    if venda["id"] in self._diario:
+                        lidas.add(venda["id"])
+                marca = pagina[-1]["id"]
+            # Vendas gravadas durante a leitura que ela não chegou a trazer
+            for id_, venda in self._diario.items():
+                if id_ not in lidas:
+                    novo._somar(venda)
+            diario = self._diario
+        finally:
+            self._diario = None
+        self._dias = novo._dias
+        # As somadas pelo diário acima da marca ainda serão lidas por `atualizar`
+        self._marca = self._marca_anterior = marca
+        self._contadas = {id_ for id_ in diario if id_ > marca}
+        self.pronto = True
+
+    async def atualizar(self) -> None:
+        """Soma as vendas do banco com `id` maior que o último já lido."""
+        marca = self._marca
+        paginas = get_repositorios().venda.paginas(
+            None, None, None, get_settings().tamanho_pagina_streaming, colunas=COLUNAS_RESUMO, apos_id=marca
+        )
+        async for pagina in paginas:
+            for venda in pagina:
+                if venda["id"] not in self._contadas:
+                    self._contadas.add(venda["id"])
+                    self._somar(venda)
+            marca = pagina[-1]["id"]
+        # Os ids até a marca anterior não voltam a ser lidos. Os da última
+        # leitura ficam mais um ciclo: a rota que gravou uma delas ainda pode
+        # registrá-la depois que a leitura a trouxe.
+        self._contadas = {id_ for id_ in self._contadas if id_ > self._marca}
+        self._marca_anterior, self._marca = self._marca, marca
+
+    async def carregar_intervalo(self, inicio: datetime, fim: datetime, categoria: Optional[str]) -> None:
+        """Soma as vendas de [inicio, fim) lidas do banco (usado antes da reconstrução)."""
+        paginas = get_repositorios().venda.paginas(
+            categoria, inicio, fim, get_settings().tamanho_pagina_streaming, colunas=COLUNAS_RESUMO
+        )
+        async for pagina in paginas:
+            for venda in pagina:
+                self._somar(venda)
+
+    def _somar(self, venda: Dict[str, Any]) -> None:
+        dias = self._dias.setdefault(venda["categoria_produto"], {})
+        totais = dias.setdefault(_dia(venda["data_venda"]), [0, Decimal(0)])
+        totais[0] += venda["qtd_unidades"]
+        totais[1] += Decimal(str(venda["valor_total"]))
+
+
+resumo_vendas = ResumoVendas()
+_reconstrucao: Optional[asyncio.Task] = None
+
+
+def registrar_vendas(vendas: Optional[Iterable[Dict[str, Any]]]) -> None:
+    """Chamada pelas rotas que inserem em 'Venda', com as linhas devolvidas pelo banco."""
+    if get_settings().resumo_vendas_em_memoria:
+        resumo_vendas.registrar(vendas)
+
+
+async def consultar_resumo(
+    de: date,
+    ate: date,
+    categoria: Optional[str] = None,
+    agrupamento: str = DIA,
+) -> List[Dict[str, Any]]:
+    """
+    Totais do intervalo a partir do resumo em memória ou, se ele ainda não
+    está pronto (ou está desligado), somando as vendas do intervalo no banco.
+    """
+    if get_settings().resumo_vendas_em_memoria and resumo_vendas.pronto:
+        return resumo_vendas.consultar(de, ate, categoria, agrupamento)
+    temporario = ResumoVendas()
+    # Mesmo intervalo [início, fim) do filtro de datas do histórico
+    inicio = datetime.combine(de, time.min)
+    fim = datetime.combine(ate + timedelta(days=1), time.min)
+    await temporario.carregar_intervalo(inicio, fim, categoria)
+    return temporario.consultar(de, ate, categoria, agrupamento)
+
+
+async def _reconciliar_periodicamente() -> None:
+    reconstruido_em: Optional[float] = None
+    while True:
+        settings = get_settings()
+        try:
+            if reconstruido_em is None or (
+                settings.resumo_vendas_reconstrucao > 0
+                and asyncio.get_running_loop().time() - reconstruido_em >= settings.resumo_vendas_reconstrucao
+            ):
+                await resumo_vendas.reconstruir()
+                reconstruido_em = asyncio.get_running_loop().time()
+            else:
+                await resumo_vendas.atualizar()
+            espera = settings.resumo_vendas_reconciliacao
+        except Exception as e:
+            # Qualquer falha (banco, configuração, dado malformado) só adia a próxima reconciliação
+            print(f"Alerta: Falha ao reconciliar o resumo de vendas: {e!r}")
+            espera = settings.resumo_vendas_espera
+        await asyncio.sleep(espera)
+
+
+def iniciar_resumo_vendas() -> None:
+    """Reconstrói o resumo e agenda as reconciliações em segundo plano (chamado no início da aplicação)."""
+    global _reconstrucao
+    if get_settings().resumo_vendas_em_memoria:
+        _reconstrucao = asyncio.create_task(_reconciliar_periodicamente())
+
+
+async def parar_resumo_vendas() -> None:
+    global _reconstrucao
+    if _reconstrucao is not None:
+        _reconstrucao.cancel()
+        try:
+            await _reconstrucao
+        except asyncio.CancelledError:
+            pass
+        _reconstrucao = None
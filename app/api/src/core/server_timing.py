@@ -0,0 +1,43 @@
+# Core server timing
+"""
+Cabeçalho `Server-Timing` com cada chamada ao banco feita durante a requisição.
+
+Exemplo de resposta de `POST /vendas/vender`:
+
+    Server-Timing: estoque_get;dur=118.2, venda_post;dur=341.0, cobranca_post;dur=296.7,
+                   rpc_incrementar_estoque_post;dur=102.5, upstream;desc="4";dur=858.4
+
+O último item traz o total de chamadas (`desc`) e a soma dos tempos. As
+chamadas são coletadas numa variável de contexto, compartilhada pelas tarefas
+criadas durante a requisição (ex: `asyncio.gather`). Em respostas em
+streaming, apenas as chamadas feitas antes do primeiro byte entram no cabeçalho.
+"""
+import re
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+_chamadas: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("chamadas_upstream", default=None)
+
+
+def iniciar_coleta() -> List[Tuple[str, float]]:
+    """Começa a coletar as chamadas da requisição atual."""
+    chamadas: List[Tuple[str, float]] = []
+    _chamadas.set(chamadas)
+    return chamadas
+
+
+def registrar_chamada(tabela: str, method: str, duracao: float) -> None:
+    """Anota uma chamada ao banco (duração em segundos), se houver coleta em andamento."""
+    chamadas = _chamadas.get()
+    if chamadas is not None:
+        # Nomes do Server-Timing não aceitam '/': 'rpc/registrar_venda' -> 'rpc_registrar_venda'
+        nome = re.sub(r"[^a-z0-9_]+", "_", f"{tabela}_{method}".lower())
+        chamadas.append((nome, duracao))
+
+
+def montar_cabecalho(chamadas: List[Tuple[str, float]]) -> str:
+    """Monta o valor do cabeçalho `Server-Timing` (durações em milissegundos)."""
+    itens = [f"{nome};dur={duracao * 1000:.1f}" for nome, duracao in chamadas]
+    total = sum(duracao for _, duracao in chamadas)
+    itens.append(f'upstream;desc="{len(chamadas)}";dur={total * 1000:.1f}')
+    return ", ".join(itens)
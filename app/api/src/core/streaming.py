@@ -0,0 +1,93 @@
+# Core streaming
+"""
+Respostas em streaming (NDJSON ou CSV) para coleções grandes.
+
+As linhas são lidas do banco em páginas (keyset em `id`, ver o método
+`paginas` de cada repositório) e escritas na resposta assim que cada página
+chega: a memória usada fica limitada ao tamanho de uma página e o primeiro
+byte sai logo após a primeira consulta.
+
+O formato é escolhido pelo parâmetro `format=ndjson|csv` ou, na falta dele,
+pelo cabeçalho `Accept` (`application/x-ndjson` ou `text/csv`).
+"""
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+from app.api.src.repository.base import RepositorioError
+
+FORMATOS_STREAMING = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def formato_streaming(request: Request, formato: Optional[str]) -> Optional[str]:
+    """
+    Retorna 'ndjson' ou 'csv' se a requisição pediu uma resposta em streaming,
+    ou None para a resposta JSON tradicional.
+    """
+    if formato:
+        formato = formato.lower()
+        if formato == "json":
+            return None
+        if formato not in FORMATOS_STREAMING:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Formato '{formato}' não suportado. Use json, ndjson ou csv.",
+            )
+        return formato
+
+    accept = request.headers.get("accept", "")
+    for nome, media_type in FORMATOS_STREAMING.items():
+        if media_type in accept:
+            return nome
+    return None
+
+
+async def responder_streaming(
+    paginas: AsyncIterator[List[Dict[str, Any]]],
+    formato: str,
+    colunas: Sequence[str],
+    transformar: Callable[[Dict[str, Any]], Dict[str, Any]] = lambda linha: linha,
+    nome_arquivo: str = "export",
+) -> StreamingResponse:
+    """
+    Monta a `StreamingResponse` a partir das páginas lidas do banco.
+
+    A primeira página é buscada antes de a resposta começar, para que um erro
+    do banco ainda resulte no status HTTP correto. Erros em páginas
+    seguintes interrompem o stream (o status 200 já foi enviado).
+    """
+    try:
+        primeira = await anext(paginas, [])
+    except RepositorioError as e:
+        raise HTTPException(status_code=e.status_code, detail=f"Erro do Supabase: {e.mensagem}")
+
+    def _serializar(pagina: List[Dict[str, Any]]) -> str:
+        linhas = [transformar(linha) for linha in pagina]
+        if formato == "ndjson":
+            return "".join(json.dumps(linha, ensure_ascii=False, default=str) + "\n" for linha in linhas)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(colunas), extrasaction="ignore")
+        writer.writerows(linhas)
+        return buffer.getvalue()
+
+    async def corpo() -> AsyncIterator[str]:
+        if formato == "csv":
+            yield ",".join(colunas) + "\r\n"
+        if primeira:
+            yield _serializar(primeira)
+        async for pagina in paginas:
+            yield _serializar(pagina)
+
+    extensao = "ndjson" if formato == "ndjson" else "csv"
+    return StreamingResponse(
+        corpo(),
+        media_type=FORMATOS_STREAMING[formato],
+        headers={"Content-Disposition": f'inline; filename="{nome_arquivo}.{extensao}"'},
+    )
@@ -1 +1,37 @@
 # DB base
+"""
+Base declarativa do SQLAlchemy, usada pelos modelos em `models/`.
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, DateTime, Integer
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.types import TypeDecorator
+
+# 'int8' no Postgres; no SQLite a chave primária precisa ser INTEGER para autoincrementar
+IdType = BigInteger().with_variant(Integer(), "sqlite")
+
+
+class DataHora(TypeDecorator):
+    """
+    `timestamptz` no Postgres. No SQLite, que não guarda fuso horário, os
+    valores são gravados em UTC (sem fuso) e lidos de volta como UTC, para que
+    a ordem e as comparações entre datas continuem corretas.
+    """
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and dialect.name == "sqlite" and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, datetime) and dialect.name == "sqlite" and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+
+
+class Base(DeclarativeBase):
+    pass
+
@@ -1 +1,354 @@
 # DB session
+"""
+Cliente HTTP compartilhado para a API REST (PostgREST) do Supabase.
+
+Todas as rotas devem usar `get_supabase()` em vez de chamar `requests.*`
+diretamente: o cliente mantém um único pool de conexões keep-alive, de modo
+que as chamadas seguintes reutilizam a conexão TCP+TLS já aberta.
+
+O cliente é assíncrono (`httpx.AsyncClient`): as rotas são `async def` e não
+ocupam o threadpool do FastAPI enquanto aguardam o Supabase.
+
+Alternativamente, com `BACKEND_DADOS=sql`, os repositórios falam direto com o
+PostgreSQL (`DATABASE_URL`) através de um engine do SQLAlchemy com pool próprio;
+com `BACKEND_DADOS=sqlite`, os dados ficam em um arquivo SQLite local
+(`SQLITE_PATH`), sem nenhuma chamada de rede.
+
+A configuração (`SUPABASE_*`, `DATABASE_*`, ...) é lida de `core/config.py`
+quando o cliente ou o engine é criado, e não na importação deste módulo. O
+SQLAlchemy também só é importado quando o engine é criado.
+"""
+import asyncio
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Optional
+
+import httpx
+
+from app.api.src.core.config import get_settings
+from app.api.src.core.metrics import observar_coalescida, observar_retentativa, observar_upstream
+from app.api.src.core.resiliencia import (
+    CircuitBreaker,
+    OrcamentoRetentativas,
+    circuito_supabase,
+    espera_com_jitter,
+    falha_do_upstream,
+    orcamento_retentativas,
+    pode_repetir,
+)
+
+if TYPE_CHECKING:
+    # O SQLAlchemy só é importado quando o engine é criado (backends 'sql' e 'sqlite')
+    from sqlalchemy import Engine, MetaData
+    from sqlalchemy.orm import Session, sessionmaker
+
+
+class SupabaseClient:
+    """
+    Encapsula um `httpx.AsyncClient` apontando para `{SUPABASE_URL}/rest/v1`.
+
+    Os cabeçalhos de autenticação são definidos uma única vez; cada chamada
+    pode sobrescrevê-los (ex: `Prefer`) e definir o seu próprio timeout.
+
+    Com `single_flight`, um GET idêntico (mesma tabela, parâmetros e
+    cabeçalhos) a outro ainda em andamento não gera uma nova chamada: ele
+    aguarda a resposta da primeira, que é compartilhada com todos.
+
+    Todas as chamadas passam pelo `circuito` (falham na hora com
+    `CircuitoAbertoError` enquanto o Supabase está fora), e os GETs que falham
+    de forma transitória são repetidos dentro do `orcamento` de repetições
+    (ver `core/resiliencia.py`).
+    """
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        *,
+        pool_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        http2: Optional[bool] = None,
+        gzip: Optional[bool] = None,
+        single_flight: Optional[bool] = None,
+        circuito: CircuitBreaker = circuito_supabase,
+        orcamento: OrcamentoRetentativas = orcamento_retentativas,
+        tentativas: Optional[int] = None,
+    ):
+        # Os parâmetros omitidos vêm da configuração (SUPABASE_*)
+        settings = get_settings()
+        pool_size = settings.supabase_pool_size if pool_size is None else pool_size
+        timeout = settings.supabase_timeout if timeout is None else timeout
+        http2 = settings.supabase_http2 if http2 is None else http2
+        gzip = settings.supabase_gzip if gzip is None else gzip
+        single_flight = settings.supabase_single_flight if single_flight is None else single_flight
+        tentativas = settings.supabase_retry_tentativas if tentativas is None else tentativas
+
+        if not url:
+            raise ValueError("A URL do Supabase não foi definida.")
+        if not key:
+            raise ValueError("A chave do Supabase não foi definida.")
+
+        headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip" if gzip else "identity",
+            "Prefer": "return=representation",
+        }
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self._client = httpx.AsyncClient(
+            base_url=f"{url.rstrip('/')}/rest/v1",
+            headers=headers,
+            limits=limits,
+            timeout=timeout,
+            http2=http2,
+        )
+        self._single_flight = single_flight
+        self._circuito = circuito
+        self._orcamento = orcamento
+        self._tentativas = tentativas
+        self._em_andamento: Dict[Hashable, asyncio.Task] = {}
+
+    async def request(
+        self,
+        method: str,
+        tabela: str,
+        *,
+        params: Optional[Any] = None,
+        json: Optional[Any] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> httpx.Response:
+        """
+        Executa uma requisição contra `/rest/v1/{tabela}` usando o pool compartilhado.
+
+        Args:
+            method: Método HTTP (GET, POST, PATCH...).
+            tabela: Nome da tabela (ou caminho relativo, ex: 'rpc/funcao').
+            params: Filtros do PostgREST (ex: {"categoria": "eq.Pizza"}).
+            json: Corpo da requisição.
+            headers: Cabeçalhos adicionais, mesclados aos padrões.
+            timeout: Timeout desta chamada; usa o padrão do cliente se omitido.
+
+        Returns:
+            A resposta HTTP; o tratamento do status fica a cargo de quem chama.
+        """
+        kwargs: Dict[str, Any] = {"params": params, "json": json, "headers": headers}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        if not self._single_flight or method != "GET":
+            return await self._enviar(method, tabela, kwargs)
+
+        chave = (tabela, str(httpx.QueryParams(params)), frozenset((headers or {}).items()))
+        tarefa = self._em_andamento.get(chave)
+        if tarefa is None:
+            tarefa = asyncio.create_task(self._enviar(method, tabela, kwargs))
+            self._em_andamento[chave] = tarefa
+            tarefa.add_done_callback(lambda _: self._liberar(chave))
+        else:
+            observar_coalescida(tabela)
+        # 'shield': se quem chamou for cancelado, a chamada segue para os demais
+        return await asyncio.shield(tarefa)
+
+    def _liberar(self, chave: Hashable) -> None:
+        tarefa = self._em_andamento.pop(chave)
+        # Marca a exceção como lida mesmo se todos os que aguardavam foram cancelados
+        if not tarefa.cancelled():
+            tarefa.exception()
+
+    async def _enviar(self, method: str, tabela: str, kwargs: Dict[str, Any]) -> httpx.Response:
+        """Envia a requisição pelo circuito, repetindo GETs com falha transitória."""
+        self._orcamento.depositar()
+        tentativa = 0
+        while True:
+            self._circuito.liberar()
+            response: Optional[httpx.Response] = None
+            erro: Optional[httpx.TransportError] = None
+            inicio = time.perf_counter()
+            try:
+                response = await self._client.request(method, f"/{tabela}", **kwargs)
+            except httpx.TransportError as e:
+                # Erro de conexão ou timeout
+                erro = e
+            except BaseException:
+                self._circuito.abandonar()
+                raise
+            finally:
+                observar_upstream(tabela, method, inicio, response is not None and response.status_code < 400)
+
+            if falha_do_upstream(response):
+                self._circuito.registrar_falha()
+            else:
+                self._circuito.registrar_sucesso()
+
+            # Apenas leituras são repetidas: um POST pode ter sido gravado antes da falha
+            if (
+                method == "GET"
+                and tentativa < self._tentativas
+                and pode_repetir(response)
+                and self._orcamento.retirar()
+            ):
+                tentativa += 1
+                observar_retentativa(tabela)
+                await asyncio.sleep(espera_com_jitter(tentativa))
+                continue
+            if erro is not None:
+                raise erro
+            return response
+
+    async def get(self, tabela: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", tabela, **kwargs)
+
+    async def post(self, tabela: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", tabela, **kwargs)
+
+    async def patch(self, tabela: str, **kwargs) -> httpx.Response:
+        return await self.request("PATCH", tabela, **kwargs)
+
+    async def rpc(self, funcao: str, payload: Dict[str, Any], **kwargs) -> httpx.Response:
+        """Chama uma função do banco exposta pelo PostgREST (`POST /rest/v1/rpc/{funcao}`)."""
+        return await self.request("POST", f"rpc/{funcao}", json=payload, **kwargs)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+_client: Optional[SupabaseClient] = None
+_client_lock = threading.Lock()
+
+
+def get_supabase() -> SupabaseClient:
+    """Retorna o cliente compartilhado, criando-o na primeira chamada."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                settings = get_settings()
+                if not settings.supabase_url or not settings.supabase_key:
+                    raise ValueError("SUPABASE_URL e SUPABASE_KEY devem estar configuradas no .env")
+                _client = SupabaseClient(settings.supabase_url, settings.supabase_key)
+    return _client
+
+
+async def close_supabase() -> None:
+    """Fecha o pool de conexões (chamado no encerramento da aplicação)."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        await client.close()
+
+
+_engine: Optional["Engine"] = None
+_sessionmaker: Optional["sessionmaker"] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> "Engine":
+    """
+    Retorna o engine compartilhado do SQLAlchemy, criando-o na primeira chamada.
+
+    O pool mantém até `DATABASE_POOL_SIZE` (+ `DATABASE_MAX_OVERFLOW`) conexões
+    abertas com o banco. As consultas dos repositórios são montadas uma única vez
+    por forma e reaproveitadas a partir do cache de statements compilados; com o
+    driver psycopg 3 (`postgresql+psycopg://`), o próprio driver passa a usar
+    prepared statements no servidor para as consultas repetidas.
+    """
+    global _engine, _sessionmaker
+    if _engine is None:
+        from sqlalchemy.orm import sessionmaker
+
+        with _engine_lock:
+            if _engine is None:
+                _engine = _criar_engine_sqlite() if get_settings().backend_dados == "sqlite" else _criar_engine_postgres()
+                _sessionmaker = sessionmaker(bind=_engine, expire_on_commit=False)
+    return _engine
+
+
+def _criar_engine_postgres() -> "Engine":
+    from sqlalchemy import create_engine
+
+    settings = get_settings()
+    if not settings.database_url:
+        raise ValueError("A DATABASE_URL não foi definida.")
+    return create_engine(
+        settings.database_url,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout,
+        pool_pre_ping=True,
+        query_cache_size=settings.database_statement_cache_size,
+    )
+
+
+def _criar_engine_sqlite() -> "Engine":
+    """
+    Engine para o arquivo `SQLITE_PATH`, criando as tabelas e índices que faltarem.
+
+    Cada conexão usa o modo WAL (leituras não bloqueiam a escrita em andamento)
+    e `synchronous=NORMAL`, que no WAL só sincroniza o disco nos checkpoints.
+    """
+    from sqlalchemy import create_engine, event
+
+    settings = get_settings()
+    engine = create_engine(
+        f"sqlite:///{settings.sqlite_path}",
+        connect_args={"check_same_thread": False},
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout,
+        query_cache_size=settings.database_statement_cache_size,
+    )
+
+    @event.listens_for(engine, "connect")
+    def _configurar_conexao(conexao, _registro):
+        cursor = conexao.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    # Registra os modelos em Base.metadata antes de criar as tabelas
+    from app.api.src.db.base import Base
+    from app.api.src.models import cliente, cobranca, outbox, produto, venda  # noqa: F401
+
+    Base.metadata.create_all(engine)
+    _completar_esquema_sqlite(engine, Base.metadata)
+    return engine
+
+
+def _completar_esquema_sqlite(engine: "Engine", metadata: "MetaData") -> None:
+    """
+    Acrescenta às tabelas de um arquivo já existente as colunas (sempre
+    anuláveis) e os índices novos, que o `create_all` não cria: ele só cria as
+    tabelas que faltam por inteiro.
+    """
+    from sqlalchemy import inspect
+
+    with engine.begin() as conexao:
+        inspetor = inspect(conexao)
+        for tabela in metadata.sorted_tables:
+            existentes = {coluna["name"] for coluna in inspetor.get_columns(tabela.name)}
+            for coluna in tabela.columns:
+                if coluna.name not in existentes:
+                    tipo = coluna.type.compile(dialect=engine.dialect)
+                    conexao.exec_driver_sql(f'ALTER TABLE "{tabela.name}" ADD COLUMN "{coluna.name}" {tipo}')
+            for indice in tabela.indexes:
+                indice.create(conexao, checkfirst=True)
+
+
+def get_session() -> "Session":
+    """Abre uma nova sessão ligada ao engine compartilhado."""
+    get_engine()
+    return _sessionmaker()
+
+
+def close_engine() -> None:
+    """Fecha as conexões do pool do SQLAlchemy (chamado no encerramento da aplicação)."""
+    global _engine, _sessionmaker
+    with _engine_lock:
+        engine, _engine, _sessionmaker = _engine, None, None
+    if engine is not None:
+        engine.dispose()
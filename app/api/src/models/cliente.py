@@ -1 +1,18 @@
 # Cliente model
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Boolean, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.api.src.db import base
+
+
+class Cliente(base.Base):
+    """Tabela 'Cliente' do Supabase."""
+    __tablename__ = "Cliente"
+
+    id: Mapped[int] = mapped_column(base.IdType, primary_key=True, autoincrement=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(base.DataHora(), server_default=func.now())
+    name: Mapped[str] = mapped_column(Text)
+    status: Mapped[bool] = mapped_column(Boolean, default=True)
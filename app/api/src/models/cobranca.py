@@ -0,0 +1,41 @@
+# Cobranca model
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Boolean, Float, Index, Text, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.api.src.db import base
+
+
+class Cobranca(base.Base):
+    """Tabela 'Cobranca' do Supabase."""
+    __tablename__ = "Cobranca"
+    __table_args__ = (
+        # Mesmo índice parcial da migração 'resumo_cobrancas': só as cobranças em aberto
+        Index(
+            "cobranca_nao_paga_vencimento_idx", "vencimento", "id",
+            postgresql_where=text("status_pagamento = false"),
+            sqlite_where=text("status_pagamento = 0"),
+        ),
+        # Busca de uma cobrança por cliente e vencimento (pagar_cobranca)
+        Index("cobranca_cliente_vencimento_idx", "cliente", "vencimento"),
+        # Mesmo índice parcial da migração 'indice_cobranca_paga_data_venda': pagas por data da venda (DSO)
+        Index(
+            "cobranca_paga_data_venda_idx", "data_venda", "id",
+            postgresql_where=text("status_pagamento = true"),
+            sqlite_where=text("status_pagamento = 1"),
+        ),
+        # Mesmo índice único da migração 'outbox_idempotente': reenvios do outbox não duplicam a cobrança
+        Index("cobranca_chave_outbox_key", "chave_outbox", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(base.IdType, primary_key=True, autoincrement=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(base.DataHora(), server_default=func.now())
+    status_pagamento: Mapped[bool] = mapped_column(Boolean, default=False)
+    cliente: Mapped[str] = mapped_column(Text)
+    vencimento: Mapped[datetime] = mapped_column(base.DataHora())
+    data_venda: Mapped[Optional[datetime]] = mapped_column(base.DataHora(), nullable=True)
+    valor: Mapped[float] = mapped_column(Float)
+    # Chave gerada pela API para as cobranças gravadas pelo outbox (core/outbox.py)
+    chave_outbox: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -0,0 +1,16 @@
+# Outbox model
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.api.src.db import base
+
+
+class OutboxAplicado(base.Base):
+    """Tabela 'OutboxAplicado': chaves das baixas de estoque do outbox já aplicadas."""
+    __tablename__ = "OutboxAplicado"
+
+    chave: Mapped[str] = mapped_column(Text, primary_key=True)
+    aplicado_em: Mapped[Optional[datetime]] = mapped_column(base.DataHora(), server_default=func.now())
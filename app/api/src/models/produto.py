@@ -1 +1,20 @@
 # Produto model
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Float, Integer, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.api.src.db import base
+
+
+class Estoque(base.Base):
+    """Tabela 'Estoque' do Supabase: uma linha por categoria de produto."""
+    __tablename__ = "Estoque"
+
+    id: Mapped[int] = mapped_column(base.IdType, primary_key=True, autoincrement=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(base.DataHora(), server_default=func.now())
+    categoria: Mapped[str] = mapped_column(Text, unique=True)
+    quantidade: Mapped[int] = mapped_column(Integer, default=0)
+    preco_unitario: Mapped[Optional[float]] = mapped_column(Float, default=0.0)
+    observacao: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
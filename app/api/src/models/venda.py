@@ -1 +1,28 @@
 # Venda model
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Boolean, Float, Index, Integer, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.api.src.db import base
+
+
+class Venda(base.Base):
+    """Tabela 'Venda' do Supabase."""
+    __tablename__ = "Venda"
+    __table_args__ = (
+        # Mesmo índice da migração 'indice_historico_vendas' (filtro por categoria e ordem do histórico)
+        Index("venda_categoria_data_venda_id_idx", "categoria_produto", "data_venda", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(base.IdType, primary_key=True, autoincrement=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(base.DataHora(), server_default=func.now())
+    cliente: Mapped[str] = mapped_column(Text)
+    categoria_produto: Mapped[str] = mapped_column(Text)
+    qtd_unidades: Mapped[int] = mapped_column(Integer)
+    valor_unitario: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    status_pagamento: Mapped[bool] = mapped_column(Boolean, default=False)
+    data_venda: Mapped[datetime] = mapped_column(base.DataHora())
+    data_vencimento: Mapped[datetime] = mapped_column(base.DataHora())
+    valor_total: Mapped[float] = mapped_column(Float)
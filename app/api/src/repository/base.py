@@ -1 +1,114 @@
 # Base repository
+"""
+Infraestrutura comum aos repositórios de dados.
+
+Cada entidade (Estoque, Venda, Cobranca, Cliente) tem um repositório com duas
+implementações de mesma interface:
+
+- REST: fala com o PostgREST do Supabase pelo cliente compartilhado
+  (`get_supabase()`);
+- SQL: fala direto com o banco pelo engine do SQLAlchemy (`get_engine()`),
+  sem o salto extra pela API REST. Essas ficam em `repository/sql/`, que só é
+  importado quando `BACKEND_DADOS` é `sql` ou `sqlite`: com o backend REST, o
+  SQLAlchemy nem chega a ser carregado.
+
+As duas devolvem as linhas como dicionários no mesmo formato do PostgREST
+(datas em ISO 8601) e sinalizam falhas com `RepositorioError`, que as rotas
+convertem nas suas próprias exceções HTTP. A escolha do backend é feita por
+`get_repositorios()` (`app/api/src/api/deps.py`).
+"""
+import json
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import httpx
+
+from app.api.src.db.session import get_supabase
+
+
+class RepositorioError(Exception):
+    """
+    Falha ao acessar o banco, independente do backend.
+
+    Attributes:
+        mensagem: Texto do erro (corpo da resposta do PostgREST ou mensagem do driver).
+        status_code: Status HTTP equivalente (ex: 409 para violação de unicidade,
+            503 quando o banco está inacessível).
+        detail: Detalhes estruturados, no formato do PostgREST ({"message": ...}).
+    """
+
+    def __init__(self, mensagem: str, status_code: int = 500, detail: Optional[Dict[str, Any]] = None):
+        self.mensagem = mensagem
+        self.status_code = status_code
+        self.detail = detail if detail is not None else {"message": mensagem}
+        super().__init__(f"HTTP {status_code}: {mensagem}")
+
+
+# --- Backend REST (PostgREST) ---
+
+class RestRepository:
+    """Base dos repositórios que usam a API REST do Supabase."""
+
+    tabela: str = ""
+
+    async def _requisitar(self, method: str, caminho: Optional[str] = None, **kwargs) -> Any:
+        """
+        Executa a requisição e devolve o corpo JSON (ou None se vazio).
+
+        Raises:
+            RepositorioError: Status >= 400, falha de conexão ou corpo não-JSON.
+        """
+        try:
+            response = await get_supabase().request(method, caminho or self.tabela, **kwargs)
+        except httpx.HTTPError as e:
+            raise RepositorioError(f"Erro de comunicação com o Supabase: {e}", status_code=503)
+
+        if response.status_code >= 400:
+            try:
+                detail = response.json()
+            except json.JSONDecodeError:
+                detail = {"message": response.text}
+            raise RepositorioError(response.text, status_code=response.status_code, detail=detail)
+
+        if response.status_code == 204 or not response.content:
+            return None
+        try:
+            return response.json()
+        except json.JSONDecodeError:
+            raise RepositorioError(
+                f"A API externa respondeu com um corpo não-JSON. Conteúdo: {response.text}",
+                status_code=502,
+            )
+
+    async def _paginas(
+        self, params: Sequence[Tuple[str, str]], tamanho_pagina: int, *, apos_id: Optional[int] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Percorre a tabela em páginas, usando keyset em `id` (`id=gt.<último id>`),
+        de modo que cada página custa o mesmo para o banco.
+
+        `params` deve conter os filtros e um `select` que inclua a coluna `id`;
+        com `apos_id`, a leitura começa depois desse `id`.
+        """
+        ultimo_id = apos_id
+        while True:
+            pagina_params = list(params) + [("order", "id.asc"), ("limit", str(tamanho_pagina))]
+            if ultimo_id is not None:
+                pagina_params.append(("id", f"gt.{ultimo_id}"))
+
+            pagina = await self._requisitar("GET", params=pagina_params) or []
+
+            if pagina:
+                yield pagina
+            if len(pagina) < tamanho_pagina:
+                return
+            ultimo_id = pagina[-1]["id"]
+
+
+def escapar(valor: str) -> str:
+    """Protege aspas e barras de um valor entre aspas nos filtros do PostgREST."""
+    return valor.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def lista_in(valores: Iterable[Any]) -> str:
+    """Monta o valor do filtro `in` do PostgREST; as aspas protegem vírgulas e espaços."""
+    return "in.({})".format(",".join(f'"{escapar(str(valor))}"' for valor in valores))
@@ -0,0 +1,27 @@
+# Cliente repository
+"""Acesso à tabela 'Cliente'."""
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Sequence
+
+from app.api.src.repository.base import RestRepository
+
+
+class ClienteRepository(ABC):
+
+    @abstractmethod
+    async def listar(self) -> List[Dict[str, Any]]:
+        """Todos os clientes, com todas as colunas."""
+
+    @abstractmethod
+    def paginas(self, colunas: Sequence[str], tamanho_pagina: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Todos os clientes, em páginas ordenadas por `id`."""
+
+
+class RestClienteRepository(RestRepository, ClienteRepository):
+    tabela = "Cliente"
+
+    async def listar(self):
+        return await self._requisitar("GET", params={"select": "*"})
+
+    def paginas(self, colunas, tamanho_pagina):
+        return self._paginas([("select", ",".join(colunas))], tamanho_pagina)
@@ -0,0 +1,136 @@
+# Cobranca repository
+"""Acesso à tabela 'Cobranca'."""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from app.api.src.repository.base import RestRepository, escapar, lista_in
+
+# (cliente, valor, início do vencimento, fim do vencimento), como em `pagar`
+ChaveCobranca = Tuple[str, float, datetime, datetime]
+
+COLUNAS_CHAVE = ["id", "cliente", "valor", "vencimento"]
+
+
+class CobrancaRepository(ABC):
+
+    @abstractmethod
+    async def inserir(self, cobrancas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insere as cobranças (um único comando) e devolve as linhas criadas, na mesma ordem."""
+
+    @abstractmethod
+    async def inserir_idempotente(self, cobrancas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insere as cobranças (um único comando), ignorando as que têm uma
+        `chave_outbox` já gravada: repetir o envio não duplica nada. Devolve
+        só as linhas criadas agora.
+        """
+
+    @abstractmethod
+    async def resumo(self) -> Dict[str, Any]:
+        """
+        Quantidade e soma das cobranças não pagas, calculadas no banco:
+        {"pendentes": {"quantidade", "valor_total"}, "vencidas": {...}}.
+        """
+
+    @abstractmethod
+    async def listar(
+        self, status_pagamento: bool, *, limite: Optional[int] = None, offset: int = 0, ordenar: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Cobranças com o `status_pagamento` pedido (com `ordenar`, por vencimento e id)."""
+
+    @abstractmethod
+    def paginas(
+        self,
+        status_pagamento: bool,
+        colunas: Sequence[str],
+        tamanho_pagina: int,
+        *,
+        data_venda_desde: Optional[datetime] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Todas as cobranças com o `status_pagamento` pedido (e, se informado,
+        `data_venda >= data_venda_desde`), em páginas ordenadas por `id`.
+        """
+
+    @abstractmethod
+    async def pagar(
+        self, cliente: str, valor: float, inicio: datetime, fim: datetime
+    ) -> List[Dict[str, Any]]:
+        """
+        Marca como pagas as cobranças ainda não pagas do cliente com o valor
+        informado e vencimento em [inicio, fim). Devolve as linhas atualizadas.
+        """
+
+    @abstractmethod
+    async def buscar_por_chaves(self, chaves: Sequence[ChaveCobranca]) -> List[Dict[str, Any]]:
+        """
+        Cobranças ainda não pagas que casam com alguma das chaves (mesmo
+        critério de `pagar`), em uma única consulta. Devolve as colunas `COLUNAS_CHAVE`.
+        """
+
+    @abstractmethod
+    async def pagar_ids(self, ids: Sequence[int]) -> List[Dict[str, Any]]:
+        """
+        Marca como pagas as cobranças ainda não pagas com os `ids` (um único
+        comando) e devolve as linhas atualizadas.
+        """
+
+
+class RestCobrancaRepository(RestRepository, CobrancaRepository):
+    tabela = "Cobranca"
+
+    async def inserir(self, cobrancas):
+        return await self._requisitar("POST", json=cobrancas)
+
+    async def inserir_idempotente(self, cobrancas):
+        headers = {"Prefer": "return=representation,resolution=ignore-duplicates"}
+        params = {"on_conflict": "chave_outbox"}
+        return await self._requisitar("POST", params=params, headers=headers, json=cobrancas) or []
+
+    async def resumo(self):
+        # Função 'resumo_cobrancas' do banco (supabase/migrations)
+        return await self._requisitar("POST", "rpc/resumo_cobrancas", json={})
+
+    async def listar(self, status_pagamento, *, limite=None, offset=0, ordenar=False):
+        params = {"status_pagamento": f"eq.{str(status_pagamento).lower()}"}
+        if ordenar:
+            params["order"] = "vencimento.asc,id.asc"
+        if limite is not None:
+            params["limit"] = str(limite)
+            params["offset"] = str(offset)
+        return await self._requisitar("GET", params=params)
+
+    def paginas(self, status_pagamento, colunas, tamanho_pagina, *, data_venda_desde=None):
+        params = [
+            ("status_pagamento", f"eq.{str(status_pagamento).lower()}"),
+            ("select", ",".join(colunas)),
+        ]
+        if data_venda_desde is not None:
+            params.append(("data_venda", f"gte.{data_venda_desde.isoformat()}"))
+        return self._paginas(params, tamanho_pagina)
+
+    async def pagar(self, cliente, valor, inicio, fim):
+        # Lista de pares: 'vencimento' aparece duas vezes (início e fim do intervalo)
+        params = [
+            ("cliente", f"eq.{cliente}"),
+            ("valor", f"eq.{valor}"),
+            ("vencimento", f"gte.{inicio.isoformat()}"),
+            ("vencimento", f"lt.{fim.isoformat()}"),
+            ("status_pagamento", "eq.false"),
+        ]
+        return await self._requisitar("PATCH", params=params, json={"status_pagamento": True}) or []
+
+    async def buscar_por_chaves(self, chaves):
+        # or=(and(cliente.eq."...",valor.eq...,vencimento.gte...,vencimento.lt...),and(...))
+        grupos = ",".join(
+            f'and(cliente.eq."{escapar(cliente)}",valor.eq.{valor},'
+            f"vencimento.gte.{inicio.isoformat()},vencimento.lt.{fim.isoformat()})"
+            for cliente, valor, inicio, fim in chaves
+        )
+        params = {"select": ",".join(COLUNAS_CHAVE), "status_pagamento": "eq.false", "or": f"({grupos})"}
+        return await self._requisitar("GET", params=params) or []
+
+    async def pagar_ids(self, ids):
+        params = {"id": lista_in(ids), "status_pagamento": "eq.false"}
+        return await self._requisitar("PATCH", params=params, json={"status_pagamento": True}) or []
@@ -0,0 +1,98 @@
+# Estoque repository
+"""Acesso à tabela 'Estoque' (uma linha por categoria de produto)."""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.api.src.repository.base import RestRepository, lista_in
+
+# Colunas usadas pelo cache de Estoque (ver core/cache.py)
+COLUNAS_LINHA = ("categoria", "quantidade", "preco_unitario")
+
+
+class EstoqueRepository(ABC):
+
+    @abstractmethod
+    async def listar(self, colunas: Sequence[str]) -> List[Dict[str, Any]]:
+        """Todas as categorias, apenas com as `colunas` pedidas."""
+
+    @abstractmethod
+    async def obter(self, categoria: str, *, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """A linha (categoria, quantidade, preco_unitario) da categoria, ou None."""
+
+    @abstractmethod
+    async def obter_varios(self, categorias: Sequence[str]) -> List[Dict[str, Any]]:
+        """As linhas (categoria, quantidade, preco_unitario) das categorias encontradas."""
+
+    @abstractmethod
+    async def salvar(self, linha: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """UPSERT por categoria. Pode não devolver as linhas gravadas (None)."""
+
+    @abstractmethod
+    async def definir_quantidade(self, categoria: str, quantidade: int) -> List[Dict[str, Any]]:
+        """Define a quantidade de uma categoria existente; lista vazia se não existir."""
+
+    @abstractmethod
+    async def incrementar(
+        self, categoria: str, quantidade: int, observacao: Optional[str] = None, criar: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Soma `quantidade` (pode ser negativa) ao estoque, de forma atômica.
+
+        Com `criar`, a categoria é criada se não existir; sem ele, a lista
+        devolvida fica vazia quando a categoria não existe.
+        """
+
+    @abstractmethod
+    async def incrementar_idempotente(
+        self, categoria: str, itens: Sequence[Tuple[str, int]], observacao: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Soma ao estoque (criando a categoria se preciso) as quantidades dos
+        `itens` (chave, quantidade) cuja chave ainda não foi aplicada, e
+        registra as chaves na mesma transação: repetir a chamada não altera o
+        estoque de novo. Devolve a linha da categoria.
+        """
+
+
+class RestEstoqueRepository(RestRepository, EstoqueRepository):
+    tabela = "Estoque"
+
+    async def listar(self, colunas):
+        return await self._requisitar("GET", params={"select": ",".join(colunas)})
+
+    async def obter(self, categoria, *, timeout=None):
+        params = {"categoria": f"eq.{categoria}", "select": ",".join(COLUNAS_LINHA)}
+        data = await self._requisitar("GET", params=params, timeout=timeout)
+        return data[0] if data else None
+
+    async def obter_varios(self, categorias):
+        params = {"categoria": lista_in(categorias), "select": ",".join(COLUNAS_LINHA)}
+        return await self._requisitar("GET", params=params) or []
+
+    async def salvar(self, linha):
+        headers = {"Prefer": "resolution=merge-duplicates"}
+        params = {"on_conflict": "categoria"}
+        return await self._requisitar("POST", params=params, headers=headers, json=linha)
+
+    async def definir_quantidade(self, categoria, quantidade):
+        params = {"categoria": f"eq.{categoria}"}
+        return await self._requisitar("PATCH", params=params, json={"quantidade": quantidade}) or []
+
+    async def incrementar(self, categoria, quantidade, observacao=None, criar=True):
+        # Função 'incrementar_estoque' do banco (supabase/migrations)
+        payload = {
+            "p_categoria": categoria,
+            "p_quantidade": quantidade,
+            "p_observacao": observacao,
+            "p_criar": criar,
+        }
+        return await self._requisitar("POST", "rpc/incrementar_estoque", json=payload) or []
+
+    async def incrementar_idempotente(self, categoria, itens, observacao=None):
+        # Função 'incrementar_estoque_outbox' do banco (supabase/migrations)
+        payload = {
+            "p_categoria": categoria,
+            "p_itens": [{"chave": chave, "quantidade": quantidade} for chave, quantidade in itens],
+            "p_observacao": observacao,
+        }
+        return await self._requisitar("POST", "rpc/incrementar_estoque_outbox", json=payload) or []
@@ -0,0 +1,163 @@
+# SQL base repository
+"""
+Infraestrutura comum aos repositórios SQL (SQLAlchemy), usados com
+`BACKEND_DADOS=sql` ou `sqlite`.
+
+Este pacote só é importado por `get_repositorios()` quando um desses backends
+está configurado (ver `repository/base.py`).
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from sqlalchemy import DateTime, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import (
+    DataError,
+    IntegrityError,
+    InterfaceError,
+    OperationalError,
+    ProgrammingError,
+    SQLAlchemyError,
+    TimeoutError as PoolTimeoutError,
+)
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.api.src.core.metrics import observar_upstream
+from app.api.src.db.base import DataHora
+from app.api.src.db.session import get_engine, get_session
+from app.api.src.repository.base import RepositorioError
+
+T = TypeVar("T")
+
+
+def _converter_erro_sql(e: SQLAlchemyError) -> RepositorioError:
+    """Traduz uma exceção do SQLAlchemy para o status HTTP que o PostgREST usaria."""
+    mensagem = str(getattr(e, "orig", None) or e)
+    if isinstance(e, IntegrityError):
+        status_code = 409
+    elif isinstance(e, (DataError, ProgrammingError)):
+        status_code = 400
+    elif isinstance(e, (OperationalError, InterfaceError, PoolTimeoutError)):
+        status_code = 503
+    else:
+        status_code = 500
+    return RepositorioError(mensagem, status_code=status_code)
+
+
+def _serializar_valor(valor: Any) -> Any:
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def como_dict(objeto: Any, colunas: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Converte uma instância de modelo em dicionário no formato do PostgREST."""
+    nomes = colunas or [coluna.key for coluna in objeto.__table__.columns]
+    return {nome: _serializar_valor(getattr(objeto, nome)) for nome in nomes}
+
+
+def valores_do_modelo(modelo: Any, dados: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Filtra `dados` para as colunas do modelo, convertendo datas em texto ISO
+    (como vêm de `model_dump(mode="json")`) para `datetime`.
+    """
+    colunas = modelo.__table__.columns
+    valores = {}
+    for nome, valor in dados.items():
+        if nome not in colunas:
+            continue
+        if isinstance(valor, str) and isinstance(colunas[nome].type, (DateTime, DataHora)):
+            valor = datetime.fromisoformat(valor)
+        valores[nome] = valor
+    return valores
+
+
+def insert_do_dialeto(sessao: Session, modelo: Any):
+    """`INSERT` com suporte a `ON CONFLICT` no dialeto do banco em uso."""
+    dialeto = sessao.get_bind().dialect.name
+    return (sqlite.insert if dialeto == "sqlite" else postgresql.insert)(modelo)
+
+
+_executor_sqlite: Optional[ThreadPoolExecutor] = None
+
+
+def _executor_do_sqlite() -> ThreadPoolExecutor:
+    """Thread única que executa as transações do SQLite (criada na primeira chamada, a partir do loop)."""
+    global _executor_sqlite
+    if _executor_sqlite is None:
+        _executor_sqlite = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+    return _executor_sqlite
+
+
+class SqlRepository:
+    """
+    Base dos repositórios que acessam o banco diretamente.
+
+    Cada operação roda dentro de uma transação própria (commit ao final,
+    rollback em caso de erro). Os drivers são síncronos, então a operação
+    nunca roda no loop: no PostgreSQL ela vai para o threadpool; no SQLite,
+    para uma thread dedicada, que executa uma transação por vez (sem disputa
+    pelo lock do arquivo dentro do processo). Se outro processo segura o lock,
+    só essa thread espera o `busy_timeout`, e não as demais requisições.
+    """
+
+    modelo: Any = None
+
+    async def _executar(self, funcao: Callable[[Session], T]) -> T:
+        def _em_transacao() -> T:
+            with get_session() as sessao, sessao.begin():
+                return funcao(sessao)
+
+        inicio = time.perf_counter()
+        sucesso = False
+        try:
+            if get_engine().dialect.name == "sqlite":
+                resultado = await asyncio.get_running_loop().run_in_executor(
+                    _executor_do_sqlite(), _em_transacao
+                )
+            else:
+                resultado = await run_in_threadpool(_em_transacao)
+            sucesso = True
+            return resultado
+        except SQLAlchemyError as e:
+            raise _converter_erro_sql(e)
+        finally:
+            observar_upstream(self.modelo.__tablename__, "SQL", inicio, sucesso)
+
+    async def _paginas(
+        self,
+        filtros: Sequence[Any],
+        colunas: Sequence[str],
+        tamanho_pagina: int,
+        *,
+        apos_id: Optional[int] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Equivalente SQL de `RestRepository._paginas` (keyset em `id`)."""
+        modelo = self.modelo
+        selecionadas = [getattr(modelo, nome) for nome in colunas]
+        ultimo_id = apos_id
+        while True:
+            consulta = select(*selecionadas).where(*filtros)
+            if ultimo_id is not None:
+                consulta = consulta.where(modelo.id > ultimo_id)
+            consulta = consulta.order_by(modelo.id).limit(tamanho_pagina)
+
+            pagina = await self._executar(
+                lambda sessao, consulta=consulta: [
+                    {nome: _serializar_valor(valor) for nome, valor in linha._mapping.items()}
+                    for linha in sessao.execute(consulta)
+                ]
+            )
+
+            if pagina:
+                yield pagina
+            if len(pagina) < tamanho_pagina:
+                return
+            ultimo_id = pagina[-1]["id"]
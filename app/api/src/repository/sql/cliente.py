@@ -0,0 +1,19 @@
+# Cliente SQL repository
+"""Acesso à tabela 'Cliente' pelo SQLAlchemy."""
+from sqlalchemy import select
+
+from app.api.src.models.cliente import Cliente
+from app.api.src.repository.cliente import ClienteRepository
+from app.api.src.repository.sql.base import SqlRepository, como_dict
+
+
+class SqlClienteRepository(SqlRepository, ClienteRepository):
+    modelo = Cliente
+
+    async def listar(self):
+        return await self._executar(
+            lambda sessao: [como_dict(cliente) for cliente in sessao.scalars(select(Cliente))]
+        )
+
+    def paginas(self, colunas, tamanho_pagina):
+        return self._paginas([], colunas, tamanho_pagina)
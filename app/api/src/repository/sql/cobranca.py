@@ -0,0 +1,122 @@
+# Cobranca SQL repository
+"""Acesso à tabela 'Cobranca' pelo SQLAlchemy."""
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.api.src.models.cobranca import Cobranca
+from app.api.src.repository.cobranca import COLUNAS_CHAVE, CobrancaRepository
+from app.api.src.repository.sql.base import SqlRepository, como_dict, insert_do_dialeto, valores_do_modelo
+
+
+class SqlCobrancaRepository(SqlRepository, CobrancaRepository):
+    modelo = Cobranca
+
+    async def inserir(self, cobrancas):
+        def _inserir(sessao: Session):
+            objetos = [Cobranca(**valores_do_modelo(Cobranca, cobranca)) for cobranca in cobrancas]
+            sessao.add_all(objetos)
+            sessao.flush()
+            return [como_dict(objeto) for objeto in objetos]
+
+        return await self._executar(_inserir)
+
+    async def inserir_idempotente(self, cobrancas):
+        def _inserir(sessao: Session):
+            consulta = insert_do_dialeto(sessao, Cobranca).values(
+                [valores_do_modelo(Cobranca, cobranca) for cobranca in cobrancas]
+            )
+            consulta = consulta.on_conflict_do_nothing(index_elements=[Cobranca.chave_outbox])
+            return [como_dict(linha) for linha in sessao.scalars(consulta.returning(Cobranca))]
+
+        return await self._executar(_inserir)
+
+    async def resumo(self):
+        agora = datetime.now(timezone.utc)
+        pendente = Cobranca.vencimento > agora
+        vencida = Cobranca.vencimento <= agora
+        consulta = select(
+            func.count().filter(pendente),
+            func.coalesce(func.sum(Cobranca.valor).filter(pendente), 0),
+            func.count().filter(vencida),
+            func.coalesce(func.sum(Cobranca.valor).filter(vencida), 0),
+        ).where(Cobranca.status_pagamento.is_(False))
+
+        def _resumo(sessao: Session):
+            qtd_pendentes, valor_pendentes, qtd_vencidas, valor_vencidas = sessao.execute(consulta).one()
+            return {
+                "pendentes": {"quantidade": qtd_pendentes, "valor_total": float(valor_pendentes)},
+                "vencidas": {"quantidade": qtd_vencidas, "valor_total": float(valor_vencidas)},
+            }
+
+        return await self._executar(_resumo)
+
+    async def listar(self, status_pagamento, *, limite=None, offset=0, ordenar=False):
+        consulta = select(Cobranca).where(Cobranca.status_pagamento.is_(status_pagamento))
+        if ordenar:
+            consulta = consulta.order_by(Cobranca.vencimento, Cobranca.id)
+        if limite is not None:
+            consulta = consulta.limit(limite).offset(offset)
+        return await self._executar(
+            lambda sessao: [como_dict(cobranca) for cobranca in sessao.scalars(consulta)]
+        )
+
+    def paginas(self, status_pagamento, colunas, tamanho_pagina, *, data_venda_desde=None):
+        filtros = [Cobranca.status_pagamento.is_(status_pagamento)]
+        if data_venda_desde is not None:
+            filtros.append(Cobranca.data_venda >= data_venda_desde)
+        return self._paginas(filtros, colunas, tamanho_pagina)
+
+    async def pagar(self, cliente, valor, inicio, fim):
+        consulta = (
+            update(Cobranca)
+            .where(
+                Cobranca.cliente == cliente,
+                Cobranca.valor == valor,
+                Cobranca.vencimento >= inicio,
+                Cobranca.vencimento < fim,
+                Cobranca.status_pagamento.is_(False),
+            )
+            .values(status_pagamento=True)
+            .returning(Cobranca)
+        )
+        return await self._executar(
+            lambda sessao: [
+                como_dict(cobranca)
+                for cobranca in sessao.scalars(consulta, execution_options={"populate_existing": True})
+            ]
+        )
+
+    async def buscar_por_chaves(self, chaves):
+        consulta = select(*(getattr(Cobranca, coluna) for coluna in COLUNAS_CHAVE)).where(
+            Cobranca.status_pagamento.is_(False),
+            or_(
+                *(
+                    and_(
+                        Cobranca.cliente == cliente,
+                        Cobranca.valor == valor,
+                        Cobranca.vencimento >= inicio,
+                        Cobranca.vencimento < fim,
+                    )
+                    for cliente, valor, inicio, fim in chaves
+                )
+            )
+        )
+        return await self._executar(
+            lambda sessao: [como_dict(linha, COLUNAS_CHAVE) for linha in sessao.execute(consulta)]
+        )
+
+    async def pagar_ids(self, ids):
+        consulta = (
+            update(Cobranca)
+            .where(Cobranca.id.in_(list(ids)), Cobranca.status_pagamento.is_(False))
+            .values(status_pagamento=True)
+            .returning(Cobranca)
+        )
+        return await self._executar(
+            lambda sessao: [
+                como_dict(cobranca)
+                for cobranca in sessao.scalars(consulta, execution_options={"populate_existing": True})
+            ]
+        )
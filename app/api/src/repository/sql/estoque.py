@@ -0,0 +1,117 @@
+# Estoque SQL repository
+"""Acesso à tabela 'Estoque' pelo SQLAlchemy."""
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.api.src.models.outbox import OutboxAplicado
+from app.api.src.models.produto import Estoque
+from app.api.src.repository.estoque import COLUNAS_LINHA, EstoqueRepository
+from app.api.src.repository.sql.base import SqlRepository, como_dict, insert_do_dialeto
+
+
+def incrementar_na_sessao(
+    sessao: Session, categoria: str, quantidade: int, observacao: Optional[str] = None, criar: bool = True
+) -> List[Estoque]:
+    """Mesma lógica da função 'incrementar_estoque', dentro de uma transação já aberta."""
+    if criar:
+        consulta = insert_do_dialeto(sessao, Estoque).values(
+            categoria=categoria, quantidade=quantidade, preco_unitario=0, observacao=observacao
+        )
+        consulta = consulta.on_conflict_do_update(
+            index_elements=[Estoque.categoria],
+            set_={
+                "quantidade": Estoque.quantidade + consulta.excluded.quantidade,
+                "observacao": func.coalesce(consulta.excluded.observacao, Estoque.observacao),
+            },
+        )
+    else:
+        consulta = (
+            update(Estoque)
+            .where(Estoque.categoria == categoria)
+            .values(
+                quantidade=Estoque.quantidade + quantidade,
+                observacao=func.coalesce(observacao, Estoque.observacao),
+            )
+        )
+    return list(sessao.scalars(consulta.returning(Estoque), execution_options={"populate_existing": True}))
+
+
+def incrementar_idempotente_na_sessao(
+    sessao: Session, categoria: str, itens: Sequence[Tuple[str, int]], observacao: Optional[str] = None
+) -> List[Estoque]:
+    """Mesma lógica da função 'incrementar_estoque_outbox', dentro de uma transação já aberta."""
+    consulta = insert_do_dialeto(sessao, OutboxAplicado).values([{"chave": chave} for chave, _ in itens])
+    consulta = consulta.on_conflict_do_nothing(index_elements=[OutboxAplicado.chave])
+    novas = set(sessao.scalars(consulta.returning(OutboxAplicado.chave)))
+    if not novas:
+        # Tudo já aplicado em uma chamada anterior: só devolve a linha atual
+        return list(sessao.scalars(select(Estoque).where(Estoque.categoria == categoria)))
+    quantidade = sum(quantidade for chave, quantidade in itens if chave in novas)
+    return incrementar_na_sessao(sessao, categoria, quantidade, observacao)
+
+
+class SqlEstoqueRepository(SqlRepository, EstoqueRepository):
+    modelo = Estoque
+
+    async def listar(self, colunas):
+        consulta = select(*(getattr(Estoque, nome) for nome in colunas))
+        return await self._executar(
+            lambda sessao: [dict(linha._mapping) for linha in sessao.execute(consulta)]
+        )
+
+    async def obter(self, categoria, *, timeout=None):
+        consulta = select(Estoque).where(Estoque.categoria == categoria).limit(1)
+
+        def _obter(sessao: Session):
+            linha = sessao.scalars(consulta).first()
+            return como_dict(linha, COLUNAS_LINHA) if linha else None
+
+        return await self._executar(_obter)
+
+    async def obter_varios(self, categorias):
+        consulta = select(Estoque).where(Estoque.categoria.in_(list(categorias)))
+        return await self._executar(
+            lambda sessao: [como_dict(linha, COLUNAS_LINHA) for linha in sessao.scalars(consulta)]
+        )
+
+    async def salvar(self, linha):
+        def _salvar(sessao: Session):
+            consulta = insert_do_dialeto(sessao, Estoque).values(**linha)
+            consulta = consulta.on_conflict_do_update(
+                index_elements=[Estoque.categoria],
+                set_={nome: consulta.excluded[nome] for nome in linha if nome != "categoria"},
+            )
+            linhas = sessao.scalars(consulta.returning(Estoque), execution_options={"populate_existing": True})
+            return [como_dict(gravada) for gravada in linhas]
+
+        return await self._executar(_salvar)
+
+    async def definir_quantidade(self, categoria, quantidade):
+        consulta = (
+            update(Estoque)
+            .where(Estoque.categoria == categoria)
+            .values(quantidade=quantidade)
+            .returning(Estoque)
+        )
+        return await self._executar(
+            lambda sessao: [
+                como_dict(linha)
+                for linha in sessao.scalars(consulta, execution_options={"populate_existing": True})
+            ]
+        )
+
+    async def incrementar(self, categoria, quantidade, observacao=None, criar=True):
+        return await self._executar(
+            lambda sessao: [
+                como_dict(linha) for linha in incrementar_na_sessao(sessao, categoria, quantidade, observacao, criar)
+            ]
+        )
+
+    async def incrementar_idempotente(self, categoria, itens, observacao=None):
+        return await self._executar(
+            lambda sessao: [
+                como_dict(linha) for linha in incrementar_idempotente_na_sessao(sessao, categoria, itens, observacao)
+            ]
+        )
@@ -0,0 +1,108 @@
+# Venda SQL repository
+"""Acesso à tabela 'Venda' e ao registro transacional de vendas pelo SQLAlchemy."""
+from datetime import datetime
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app.api.src.models.cobranca import Cobranca
+from app.api.src.models.produto import Estoque
+from app.api.src.models.venda import Venda
+from app.api.src.repository.sql.base import SqlRepository, como_dict, valores_do_modelo
+from app.api.src.repository.sql.estoque import incrementar_na_sessao
+from app.api.src.repository.venda import VendaRepository
+
+
+def _cobranca_da_venda(venda: Venda) -> Cobranca:
+    return Cobranca(
+        cliente=venda.cliente,
+        vencimento=venda.data_vencimento,
+        valor=venda.valor_total,
+        status_pagamento=venda.status_pagamento,
+        data_venda=venda.data_venda,
+    )
+
+
+class SqlVendaRepository(SqlRepository, VendaRepository):
+    modelo = Venda
+
+    @staticmethod
+    def _filtros(categoria, inicio=None, fim=None, apos=None):
+        filtros = [Venda.categoria_produto == categoria] if categoria is not None else []
+        if inicio is not None:
+            filtros.append(Venda.data_venda >= inicio)
+        if fim is not None:
+            filtros.append(Venda.data_venda < fim)
+        if apos is not None:
+            data_venda, venda_id = datetime.fromisoformat(apos[0]), apos[1]
+            filtros.append(or_(
+                Venda.data_venda < data_venda,
+                and_(Venda.data_venda == data_venda, Venda.id < venda_id),
+            ))
+        return filtros
+
+    async def inserir(self, vendas):
+        def _inserir(sessao: Session):
+            objetos = [Venda(**valores_do_modelo(Venda, venda)) for venda in vendas]
+            sessao.add_all(objetos)
+            sessao.flush()
+            return [como_dict(objeto) for objeto in objetos]
+
+        return await self._executar(_inserir)
+
+    async def historico(self, categoria, *, limite=None, offset=0, inicio=None, fim=None, apos=None):
+        consulta = (
+            select(Venda)
+            .where(*self._filtros(categoria, inicio, fim, apos))
+            .order_by(Venda.data_venda.desc(), Venda.id.desc())
+            .limit(limite)
+            .offset(offset or None)
+        )
+        return await self._executar(
+            lambda sessao: [como_dict(venda) for venda in sessao.scalars(consulta)]
+        )
+
+    def paginas(self, categoria, inicio, fim, tamanho_pagina, *, colunas=None, apos_id=None):
+        if colunas is None:
+            colunas = [coluna.key for coluna in Venda.__table__.columns]
+        return self._paginas(self._filtros(categoria, inicio, fim), colunas, tamanho_pagina, apos_id=apos_id)
+
+    async def registrar_transacional(self, venda):
+        # Mesmos passos da função 'registrar_venda' do banco, em uma transação do SQLAlchemy
+        def _registrar(sessao: Session):
+            dados = valores_do_modelo(Venda, venda)
+            if dados.get("valor_unitario") is None:
+                dados["valor_unitario"] = sessao.scalar(
+                    select(Estoque.preco_unitario).where(Estoque.categoria == dados["categoria_produto"])
+                )
+            nova_venda = Venda(**dados)
+            cobranca = _cobranca_da_venda(nova_venda)
+            sessao.add_all([nova_venda, cobranca])
+            sessao.flush()
+            estoque = incrementar_na_sessao(
+                sessao,
+                nova_venda.categoria_produto,
+                -nova_venda.qtd_unidades,
+                f"Adicao de {-nova_venda.qtd_unidades} unidade(s) ao estoque",
+            )
+            return {
+                "venda": como_dict(nova_venda),
+                "cobranca": como_dict(cobranca),
+                "estoque": como_dict(estoque[0]) if estoque else None,
+            }
+
+        return await self._executar(_registrar)
+
+    async def registrar_lote(self, vendas):
+        # Mesmos passos da função 'registrar_vendas_lote' do banco, em uma transação do SQLAlchemy
+        def _registrar(sessao: Session):
+            novas = [Venda(**valores_do_modelo(Venda, venda)) for venda in vendas]
+            cobrancas = [_cobranca_da_venda(venda) for venda in novas]
+            sessao.add_all(novas + cobrancas)
+            sessao.flush()
+            return {
+                "vendas": [como_dict(venda) for venda in novas],
+                "cobrancas": [como_dict(cobranca) for cobranca in cobrancas],
+            }
+
+        return await self._executar(_registrar)
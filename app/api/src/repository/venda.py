@@ -1 +1,113 @@
 # Venda repository
+"""Acesso à tabela 'Venda' e ao registro transacional de vendas."""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from app.api.src.repository.base import RestRepository
+
+
+class VendaRepository(ABC):
+
+    @abstractmethod
+    async def inserir(self, vendas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insere as vendas (um único comando) e devolve as linhas criadas, na mesma ordem."""
+
+    @abstractmethod
+    async def historico(
+        self,
+        categoria: str,
+        *,
+        limite: Optional[int] = None,
+        offset: int = 0,
+        inicio: Optional[datetime] = None,
+        fim: Optional[datetime] = None,
+        apos: Optional[Tuple[str, int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Vendas da categoria em ordem (data_venda, id) decrescente.
+
+        `inicio` é inclusivo e `fim` exclusivo; `apos` é a chave (data_venda, id)
+        da última venda já entregue (paginação por cursor).
+        """
+
+    @abstractmethod
+    def paginas(
+        self,
+        categoria: Optional[str],
+        inicio: Optional[datetime],
+        fim: Optional[datetime],
+        tamanho_pagina: int,
+        *,
+        colunas: Optional[Sequence[str]] = None,
+        apos_id: Optional[int] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Todas as vendas do filtro, em páginas ordenadas por `id`.
+
+        `categoria` None percorre todas as categorias; `colunas` None traz
+        todas as colunas (senão, a lista deve incluir `id`); `apos_id` traz
+        só as vendas com `id` maior.
+        """
+
+    @abstractmethod
+    async def registrar_transacional(self, venda: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Insere a Venda, a Cobranca e baixa o Estoque em uma única transação.
+
+        Returns:
+            {"venda": {...}, "cobranca": {...}, "estoque": {...}}.
+        """
+
+    @abstractmethod
+    async def registrar_lote(self, vendas: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Insere as vendas e a cobrança de cada uma em uma única transação (tudo
+        ou nada). A baixa de estoque fica de fora.
+
+        Returns:
+            {"vendas": [...], "cobrancas": [...]}, na ordem de `vendas`.
+        """
+
+
+class RestVendaRepository(RestRepository, VendaRepository):
+    tabela = "Venda"
+
+    @staticmethod
+    def _filtros(categoria, inicio=None, fim=None, apos=None):
+        # Lista de pares (e não um dict): 'data_venda' pode aparecer duas vezes
+        params = [("categoria_produto", f"eq.{categoria}")] if categoria is not None else []
+        if inicio is not None:
+            params.append(("data_venda", f"gte.{inicio.isoformat()}"))
+        if fim is not None:
+            params.append(("data_venda", f"lt.{fim.isoformat()}"))
+        if apos is not None:
+            data_venda, venda_id = apos
+            params.append(("or", f'(data_venda.lt."{data_venda}",and(data_venda.eq."{data_venda}",id.lt.{venda_id}))'))
+        return params
+
+    async def inserir(self, vendas):
+        return await self._requisitar("POST", json=vendas)
+
+    async def historico(self, categoria, *, limite=None, offset=0, inicio=None, fim=None, apos=None):
+        params = self._filtros(categoria, inicio, fim, apos)
+        params += [("select", "*"), ("order", "data_venda.desc,id.desc")]
+        if limite is not None:
+            params.append(("limit", str(limite)))
+        if offset:
+            params.append(("offset", str(offset)))
+        return await self._requisitar("GET", params=params)
+
+    def paginas(self, categoria, inicio, fim, tamanho_pagina, *, colunas=None, apos_id=None):
+        select = ",".join(colunas) if colunas is not None else "*"
+        return self._paginas(
+            self._filtros(categoria, inicio, fim) + [("select", select)], tamanho_pagina, apos_id=apos_id
+        )
+
+    async def registrar_transacional(self, venda):
+        # Função 'registrar_venda' do banco (supabase/migrations)
+        return await self._requisitar("POST", "rpc/registrar_venda", json={"p_venda": venda})
+
+    async def registrar_lote(self, vendas):
+        # Função 'registrar_vendas_lote' do banco (supabase/migrations)
+        return await self._requisitar("POST", "rpc/registrar_vendas_lote", json={"p_vendas": vendas})
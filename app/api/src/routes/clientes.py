@@ -1,29 +1,15 @@
 # Continuação do seu arquivo principal da API (ex: main.py ou routers/clientes.py)
-import requests
 from pydantic import BaseModel
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
 
-import os
-from dotenv import load_dotenv
+from app.api.src.api.deps import get_repositorios, get_settings
+from app.api.src.repository.base import RepositorioError
+from app.api.src.core.etag import responder_com_etag
+from app.api.src.core.streaming import formato_streaming, responder_streaming
 
 router = APIRouter()
 
-# --- Configuração do Supabase ---
-load_dotenv()
-SUPABASE_URL = os.environ.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
-
-from typing import List, Dict, Any
-def _get_headers() -> dict:
-    """
-    Cria os cabeçalhos de autenticação para as requisições ao Supabase.
-    """
-    return {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json",
-        "Prefer": "return=representation"  # ✅ Header importante!
-    }
+from typing import List, Dict, Any, Optional
 
 # --- Modelo de Dados de Entrada ---
 # --- Modelo de Dados de Saída ---
@@ -46,48 +32,46 @@ class ClienteOutput(BaseModel):
     summary="Lista todos os clientes",
     description="Busca todos os registros da tabela 'Cliente' no Supabase."
 )
-def listar_clientes():
+async def listar_clientes(
+    request: Request,
+    formato: Optional[str] = Query(default=None, alias="format", description="json (padrão), ndjson ou csv"),
+):
     """
     Busca e retorna todos os clientes da tabela 'Cliente' no Supabase.
 
+    Com `format=ndjson|csv` (ou o cabeçalho `Accept` correspondente), os
+    clientes são enviados em streaming, página por página.
+
+    A resposta JSON leva um ETag: um `If-None-Match` com a lista atual recebe 304.
+
     Returns:
         Uma lista de objetos ClienteOutput.
 
     Raises:
         HTTPException: Se a requisição ao Supabase falhar.
     """
-    table_name = "Cliente"
+    formato = formato_streaming(request, formato)
+    if formato:
+        colunas = list(ClienteOutput.model_fields)
+        return await responder_streaming(
+            get_repositorios().cliente.paginas(colunas, get_settings().tamanho_pagina_streaming),
+            formato,
+            colunas=colunas,
+            transformar=lambda cliente: ClienteOutput(**cliente).model_dump(),
+            nome_arquivo="clientes",
+        )
     
     try:
-        headers = _get_headers()
+        # Todas as colunas da tabela 'Cliente'
+        clientes_data: List[Dict[str, Any]] = await get_repositorios().cliente.listar()
         
-        # URL para buscar todos os dados da tabela 'Cliente'
-        # O parâmetro 'select=*' (opcional, mas recomendado) garante que todas as colunas sejam retornadas
-        url = f"{SUPABASE_URL}/rest/v1/{table_name}?select=*"
-        
-        # O método HTTP para leitura de dados é GET
-        response = requests.get(url, headers=headers, timeout=15.0)
-        
-        # Lança exceção se a resposta não for 2xx
-        response.raise_for_status()
-        
-        # O Supabase retorna uma lista de dicionários
-        clientes_data: List[Dict[str, Any]] = response.json()
-        
-    except requests.exceptions.HTTPError as e:
-        # Captura erros HTTP (400, 404, 500, etc.)
-        error_detail = e.response.text if e.response else str(e)
-        raise HTTPException(
-            status_code=e.response.status_code if e.response else 500,
-            detail=f"Erro do Supabase: {error_detail}"
-        )
-    except requests.exceptions.RequestException as e:
-        # Captura erros de conexão, timeout, etc.
+    except RepositorioError as e:
+        # Captura erros HTTP (400, 404, 500, etc.) e de conexão
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"Erro de comunicação com o Supabase: {e}"
+            status_code=e.status_code,
+            detail=f"Erro do Supabase: {e.mensagem}"
         )
     
-    # O Pydantic (usado por FastAPI) irá validar a lista de dicionários
-    # com base no modelo ClienteOutput antes de retornar a resposta.
-    return clientes_data
\ No newline at end of file
+    # A lista de dicionários é validada com base no modelo ClienteOutput
+    # antes de calcular o ETag da resposta.
+    return responder_com_etag(request, clientes_data, modelo=List[ClienteOutput], vary="Accept")
@@ -1,37 +1,21 @@
-import requests
+import asyncio
 from datetime import datetime,timezone, date
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Header, HTTPException, Query, Request, status
 from typing import Optional
-import os
 from datetime import date, datetime, time, timedelta
 from pydantic import BaseModel
-from dotenv import load_dotenv
 from app.api.src.routes.vender import Venda
-from typing import List, Dict, Any
-TODAY = date.today() # Data de hoje (apenas a parte da data)
+from typing import List, Dict, Any, Tuple
 router = APIRouter()
 from app.api.src.schemas.cobranca import CobrancaDetalheResponse, CobrancaPagaResponse, FinancialSummaryResponse, PagarCobrancaInput,PagarCobrancaResponse
-# --- Configuração do Supabase ---
-load_dotenv()
-SUPABASE_URL = os.environ.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
-
-# Validação das variáveis de ambiente
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("SUPABASE_URL e SUPABASE_KEY devem estar configuradas no .env")
-
-# --- Funções Auxiliares ---
-def _get_headers() -> dict:
-    """
-    Cria os cabeçalhos de autenticação para as requisições ao Supabase.
-    """
-    return {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json",
-        "Prefer": "return=representation"  # ✅ Header importante!
-    }
-
+from app.api.src.schemas.cobranca import CobrancaAnalyticsResponse
+from app.api.src.schemas.cobranca import PagarLoteItem, PagarLoteItemResultado, PagarLoteResponse
+from app.api.src.api.deps import get_repositorios, get_settings
+from app.api.src.repository.base import RepositorioError
+from app.api.src.core.idempotencia import responder_idempotente
+from app.api.src.core.recebiveis import registrar_cobrancas_criadas, registrar_cobrancas_pagas, resumo_em_memoria
+from app.api.src.core.response_cache import invalidar_tabelas, responder_com_cache
+from app.api.src.core.streaming import formato_streaming, responder_streaming
 # --- Modelo de Dados de Entrada ---
 class CobrancaInput(BaseModel):
     """
@@ -73,7 +57,7 @@ def criar_cobranca_de_venda(venda: Venda) -> CobrancaInput:
     )
     return cobranca
 
-def adicionar_cobranca(cobranca: CobrancaInput):
+async def adicionar_cobranca(cobranca: CobrancaInput):
     """
     Recebe os dados de uma nova cobrança e os insere na tabela 'Cobranca' do Supabase.
     
@@ -86,52 +70,46 @@ def adicionar_cobranca(cobranca: CobrancaInput):
     Raises:
         HTTPException: Se a requisição ao Supabase falhar.
     """
-    table_name = "Cobranca"
-    
     # ✅ Converte para dict e serializa datetime para ISO format
-    payload = cobranca.model_dump(mode="json")
-    
-    # Se você quiser enviar como array (para inserção em lote):
-    # payload = [cobranca.model_dump(mode="json")]
+    payload = [cobranca.model_dump(mode="json")]
     
     try:
-        headers = _get_headers()
-        url = f"{SUPABASE_URL}/rest/v1/{table_name}"
-        
-        response = requests.post(url, headers=headers, json=payload, timeout=15.0)
-        
-        # Para debug, você pode descomentar:
-        # print(f"Status: {response.status_code}")
-        # print(f"Response: {response.text}")
-        
-        response.raise_for_status()
+        # Pega os dados retornados pelo banco (a linha criada)
+        data = await get_repositorios().cobranca.inserir(payload)
         
-        # Pega os dados retornados pelo Supabase
-        data = response.json()
-        
-    except requests.exceptions.HTTPError as e:
-        # Captura erros HTTP específicos (400, 404, 500, etc.)
-        error_detail = e.response.text if e.response else str(e)
-        # Log para debug
-        print(f"Erro HTTP Status: {e.response.status_code if e.response else 'N/A'}")
-        print(f"Payload enviado: {payload}")
-        print(f"Response do Supabase: {error_detail}")
-        raise HTTPException(
-            status_code=e.response.status_code if e.response else 500,
-            detail=f"Erro do Supabase: {error_detail}"
-        )
-    except requests.exceptions.RequestException as e:
-        # Captura erros de conexão, timeout, etc.
+    except RepositorioError as e:
+        # Captura erros HTTP específicos (400, 404, 500, etc.) e de conexão
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"Erro de comunicação com o Supabase: {e}"
+            status_code=e.status_code,
+            detail=f"Erro do Supabase: {e.mensagem}"
         )
+    finally:
+        # Mesmo uma falha (ex: timeout) pode ter gravado a linha
+        invalidar_tabelas("Cobranca")
+    registrar_cobrancas_criadas(data)
     
     return {
         "message": f"Cobrança para o cliente '{cobranca.cliente}' adicionada com sucesso!",
         "data": data
     }
 
+@router.post(
+    "/adicionar_cobranca",
+    status_code=status.HTTP_201_CREATED,
+    summary="Adiciona uma nova cobrança"
+)
+async def criar_cobranca(
+    cobranca: CobrancaInput,
+    request: Request,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key", description="Chave única da cobrança; repetições com a mesma chave não gravam de novo"),
+):
+    """
+    Endpoint para inserir uma cobrança na tabela 'Cobranca' (ver `adicionar_cobranca`).
+
+    Com o cabeçalho `Idempotency-Key`, uma repetição da mesma requisição
+    recebe a resposta da primeira sem gravar uma nova cobrança.
+    """
+    return await responder_idempotente(request, idempotency_key, lambda: adicionar_cobranca(cobranca))
 
 # Supondo que você tenha este roteador definido e que as variáveis de ambiente
 # e a função _get_headers já estejam importadas/disponíveis.
@@ -139,60 +117,77 @@ def adicionar_cobranca(cobranca: CobrancaInput):
 
 
 # --- Rota para o Relatório de Pendências ---
-@router.get("/pendentes",response_model=FinancialSummaryResponse)
-def obter_relatorio_pendentes():
+async def _obter_resumo_pendentes() -> Dict[str, Any]:
     """
-    Consulta a tabela 'Cobranca' e retorna um relatório com o total de
-    cobranças pendentes, vencidas e o valor total a receber.
+    Obtém a quantidade e a soma das cobranças pendentes e vencidas.
+
+    Usa os totais mantidos em memória (ver `core/recebiveis.py`) e, enquanto
+    eles não foram carregados, calcula no banco (sem trafegar as linhas).
     """
-    table_name = "Cobranca"
-    
-    # 1. Busca apenas as cobranças que não foram pagas
-    url = f"{SUPABASE_URL}/rest/v1/{table_name}?status_pagamento=eq.false"
-    
+    resumo = resumo_em_memoria()
+    if resumo is not None:
+        return resumo
     try:
-        headers = _get_headers()
-        response = requests.get(url, headers=headers, timeout=15.0)
-        response.raise_for_status()
-        cobrancas_nao_pagas = response.json()
-    except requests.exceptions.HTTPError as e:
-        error_detail = e.response.text if e.response else str(e)
+        return await get_repositorios().cobranca.resumo()
+    except RepositorioError as e:
         raise HTTPException(
-            status_code=e.response.status_code if e.response else 500,
-            detail=f"Erro do Supabase: {error_detail}"
+            status_code=e.status_code,
+            detail=f"Erro do Supabase: {e.mensagem}"
         )
-    except requests.exceptions.RequestException as e:
+
+async def _listar_cobrancas_nao_pagas(limite: Optional[int] = None, pagina: int = 1) -> List[Dict[str, Any]]:
+    """Lista as cobranças não pagas por ordem de vencimento, opcionalmente paginadas."""
+    offset = (pagina - 1) * limite if limite is not None else 0
+    try:
+        return await get_repositorios().cobranca.listar(False, limite=limite, offset=offset, ordenar=True)
+    except RepositorioError as e:
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"Erro de comunicação com o Supabase: {e}"
+            status_code=e.status_code,
+            detail=f"Erro do Supabase: {e.mensagem}"
         )
 
-    # 2. Processa os dados para classificar e somar
-    agora_utc = datetime.now(timezone.utc)
-    
-    relatorio = {
-        "pendentes": {"quantidade": 0, "valor_total": 0.0},
-        "vencidas": {"quantidade": 0, "valor_total": 0.0}
-    }
+@router.get("/pendentes",response_model=FinancialSummaryResponse)
+async def obter_relatorio_pendentes(
+    request: Request,
+    detalhes: bool = Query(default=True, description="Se falso, retorna apenas os totais (sem a lista de cobranças)"),
+    limite: Optional[int] = Query(default=None, gt=0, description="Tamanho da página da lista de cobranças"),
+    pagina: int = Query(default=1, gt=0, description="Página da lista de cobranças (usada com 'limite')"),
+):
+    """
+    Consulta a tabela 'Cobranca' e retorna um relatório com o total de
+    cobranças pendentes, vencidas e o valor total a receber.
+
+    Os totais vêm dos contadores em memória (ver `core/recebiveis.py`),
+    ajustados a cada escrita em 'Cobranca'; antes da primeira carga deles, são
+    calculados no próprio banco. A lista
+    `cobrancas_nao_pagas` é opcional (`detalhes=false` a omite) e pode ser
+    paginada com `limite`/`pagina`.
+
+    A resposta passa pelo cache de respostas (ver `core/response_cache.py`),
+    invalidado a cada escrita em 'Cobranca'.
+    """
+    return await responder_com_cache(
+        request,
+        ("Cobranca",),
+        lambda: _montar_relatorio_pendentes(detalhes, limite, pagina),
+        modelo=FinancialSummaryResponse,
+    )
 
-    for cobranca in cobrancas_nao_pagas:
-        # Converte a data de vencimento string para um objeto datetime com timezone
-        vencimento = datetime.fromisoformat(cobranca["vencimento"])
-        valor = float(cobranca["valor"])
-
-        if vencimento > agora_utc:
-            # Se a data de vencimento for no futuro, está pendente.
-            relatorio["pendentes"]["quantidade"] += 1
-            relatorio["pendentes"]["valor_total"] += valor
-        else:
-            # Se a data de vencimento for no passado ou hoje, está vencida.
-            relatorio["vencidas"]["quantidade"] += 1
-            relatorio["vencidas"]["valor_total"] += valor
-
-    # 3. Calcula o total a receber
+async def _montar_relatorio_pendentes(detalhes: bool, limite: Optional[int], pagina: int) -> Dict[str, Any]:
+    """Monta o relatório de `GET /pendentes` a partir do banco."""
+    # 1. Busca os totais e, se pedida, a lista de cobranças em paralelo
+    if detalhes:
+        relatorio, cobrancas_nao_pagas = await asyncio.gather(
+            _obter_resumo_pendentes(),
+            _listar_cobrancas_nao_pagas(limite, pagina),
+        )
+    else:
+        relatorio, cobrancas_nao_pagas = await _obter_resumo_pendentes(), None
+
+    # 2. Calcula o total a receber
     total_a_receber = relatorio["pendentes"]["valor_total"] + relatorio["vencidas"]["valor_total"]
 
-    # 4. Retorna o resultado no formato do response_model
+    # 3. Retorna o resultado no formato do response_model
     return {
         "pendentes": relatorio["pendentes"],
         "vencidas": relatorio["vencidas"],
@@ -200,13 +195,77 @@ def obter_relatorio_pendentes():
         "cobrancas_nao_pagas":cobrancas_nao_pagas
     }
 
+# --- Rota de indicadores da carteira ---
+COLUNAS_ANALYTICS = ["cliente", "vencimento", "valor", "data_venda"]
+
+async def _carregar_cobrancas(
+    status_pagamento: bool, data_venda_desde: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Lê as cobranças de um status (opcionalmente só as vendidas a partir de
+    `data_venda_desde`), página a página, só com as colunas dos indicadores.
+    """
+    linhas: List[Dict[str, Any]] = []
+    try:
+        async for pagina in get_repositorios().cobranca.paginas(
+            status_pagamento,
+            COLUNAS_ANALYTICS,
+            get_settings().tamanho_pagina_streaming,
+            data_venda_desde=data_venda_desde,
+        ):
+            linhas.extend(pagina)
+    except RepositorioError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"Erro do Supabase: {e.mensagem}"
+        )
+    return linhas
+
+@router.get("/analytics", response_model=CobrancaAnalyticsResponse)
+async def obter_analytics_cobrancas(
+    request: Request,
+    dias_dso: int = Query(default=90, ge=1, le=3650, description="Período de vendas do DSO, em dias"),
+):
+    """
+    Indicadores da carteira de cobranças:
+
+    - **aging**: cobranças em aberto por faixa de atraso (a vencer, 0-30,
+      31-60, 61-90 e mais de 90 dias);
+    - **clientes**: valor em aberto, vencido e maior atraso de cada cliente,
+      do maior valor em aberto para o menor;
+    - **dso**: valor em aberto / vendas a prazo dos últimos `dias_dso` dias x
+      `dias_dso`.
+
+    Os cálculos são vetorizados com NumPy (ver `core/analytics.py`), e a
+    resposta passa pelo cache de respostas, invalidado a cada escrita em 'Cobranca'.
+    """
+    return await responder_com_cache(
+        request,
+        ("Cobranca",),
+        lambda: _montar_analytics(dias_dso),
+        modelo=CobrancaAnalyticsResponse,
+    )
+
+async def _montar_analytics(dias_dso: int) -> Dict[str, Any]:
+    # O NumPy só é importado na primeira chamada, fora da inicialização da aplicação
+    from app.api.src.core.analytics import Carteira, calcular_analytics
+
+    # 1. Lê as cobranças em aberto e, das pagas, só as vendidas no período do DSO
+    agora = datetime.now(timezone.utc)
+    abertas, pagas = await asyncio.gather(
+        _carregar_cobrancas(False),
+        _carregar_cobrancas(True, data_venda_desde=agora - timedelta(days=dias_dso)),
+    )
+    # 2. Converte em colunas e calcula os indicadores
+    return calcular_analytics(Carteira.de_linhas(abertas, pagas), dias_dso, agora)
+
 
 @router.get(
     "/cobrancas_ativas",
     response_model=List[CobrancaDetalheResponse],
     summary="Lista todas as cobranças com pagamento pendente"
 )
-def listar_cobrancas_ativas():
+async def listar_cobrancas_ativas(request: Request):
     """
     Consulta a tabela 'Cobrancas' no Supabase e retorna uma lista com todas as
     cobranças que ainda não foram pagas (`status_pagamento` = FALSE).
@@ -215,26 +274,26 @@ def listar_cobrancas_ativas():
     - **Pendente**: Se a data de vencimento for hoje ou no futuro.
     - **Vencido**: Se a data de vencimento já passou.
 
+    A resposta passa pelo cache de respostas, invalidado a cada escrita em 'Cobranca'.
+
     Returns:
         Uma lista de objetos, cada um representando uma cobrança ativa.
 
     Raises:
         HTTPException: Se ocorrer um erro na comunicação com o Supabase.
     """
-    table_name = "Cobrancas"
+    return await responder_com_cache(
+        request, ("Cobranca",), _formatar_cobrancas_ativas, modelo=List[CobrancaDetalheResponse]
+    )
+
+async def _formatar_cobrancas_ativas() -> List[CobrancaDetalheResponse]:
+    """Busca as cobranças não pagas e calcula o status de cada uma."""
     hoje = date.today()
     cobrancas_formatadas = []
-
-    table_name = "Cobranca"
     
     # 1. Busca apenas as cobranças que não foram pagas
-    url = f"{SUPABASE_URL}/rest/v1/{table_name}?status_pagamento=eq.false"
     try:
-        headers = _get_headers()
-        response = requests.get(url, headers=headers, timeout=15.0)
-        response.raise_for_status()
-
-        cobrancas_ativas = response.json()
+        cobrancas_ativas = await get_repositorios().cobranca.listar(False)
 
         # ✅ Itera sobre os resultados para formatar a resposta
         for cobranca in cobrancas_ativas:
@@ -252,16 +311,10 @@ def listar_cobrancas_ativas():
             )
             cobrancas_formatadas.append(item_formatado)
 
-    except requests.exceptions.HTTPError as e:
-        error_detail = e.response.text if e.response else str(e)
-        raise HTTPException(
-            status_code=e.response.status_code if e.response else 500,
-            detail=f"Erro ao buscar cobranças no Supabase: {error_detail}"
-        )
-    except requests.exceptions.RequestException as e:
+    except RepositorioError as e:
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"Erro de comunicação com o Supabase: {e}"
+            status_code=e.status_code,
+            detail=f"Erro ao buscar cobranças no Supabase: {e.mensagem}"
         )
     except (KeyError, TypeError) as e:
          raise HTTPException(
@@ -281,59 +334,80 @@ def listar_cobrancas_ativas():
 
 
 
+def _formatar_cobranca_paga(cobranca: Dict[str, Any]) -> CobrancaPagaResponse:
+    """Converte uma linha da tabela 'Cobranca' no item da lista de cobranças pagas."""
+    # Converte a string de data/hora para um objeto de data Python
+    vencimento_dt = datetime.fromisoformat(cobranca['vencimento']).date()
+
+    # ✅ Utiliza o novo modelo de resposta
+    return CobrancaPagaResponse(
+        cliente=cobranca.get('cliente', 'N/A'),
+        vencimento=str(vencimento_dt),
+        valor=cobranca.get('valor', 0.0)
+        # O status "Pago" é definido pelo modelo Pydantic
+    )
+
 @router.get(
     "/cobrancas_pagas",
     response_model=List[CobrancaPagaResponse],
     summary="Lista todas as cobranças que já foram pagas"
 )
-def listar_cobrancas_pagas():
+async def listar_cobrancas_pagas(
+    request: Request,
+    formato: Optional[str] = Query(default=None, alias="format", description="json (padrão), ndjson ou csv"),
+):
     """
     Consulta a tabela 'Cobranca' no Supabase e retorna uma lista com todas as
     cobranças que já foram pagas (`status_pagamento` = TRUE).
 
+    Com `format=ndjson|csv` (ou `Accept: application/x-ndjson` / `text/csv`),
+    a lista é enviada em streaming, página por página, sem montar o resultado
+    inteiro em memória. A resposta JSON passa pelo cache de respostas,
+    invalidado a cada escrita em 'Cobranca'.
+
     Returns:
         Uma lista de objetos, cada um representando uma cobrança paga.
 
     Raises:
         HTTPException: Se ocorrer um erro na comunicação com o Supabase.
     """
+    formato = formato_streaming(request, formato)
+    if formato:
+        paginas = get_repositorios().cobranca.paginas(
+            True, ["id", "cliente", "vencimento", "valor"], get_settings().tamanho_pagina_streaming
+        )
+        return await responder_streaming(
+            paginas,
+            formato,
+            colunas=list(CobrancaPagaResponse.model_fields),
+            transformar=lambda cobranca: _formatar_cobranca_paga(cobranca).model_dump(),
+            nome_arquivo="cobrancas_pagas",
+        )
+
+    return await responder_com_cache(
+        request,
+        ("Cobranca",),
+        _formatar_cobrancas_pagas,
+        modelo=List[CobrancaPagaResponse],
+        vary="Accept",
+    )
+
+async def _formatar_cobrancas_pagas() -> List[CobrancaPagaResponse]:
+    """Busca as cobranças pagas e as converte nos itens da resposta."""
     cobrancas_formatadas = []
-    table_name = "Cobranca"
-    
-    # ✅ Altera o filtro para buscar cobranças com status_pagamento igual a TRUE
-    url = f"{SUPABASE_URL}/rest/v1/{table_name}?status_pagamento=eq.true"
-    
-    try:
-        headers = _get_headers()
-        response = requests.get(url, headers=headers, timeout=15.0)
-        response.raise_for_status()
 
-        cobrancas_pagas = response.json()
+    try:
+        # ✅ Busca as cobranças com status_pagamento igual a TRUE
+        cobrancas_pagas = await get_repositorios().cobranca.listar(True)
 
         # Itera sobre os resultados para formatar a resposta
         for cobranca in cobrancas_pagas:
-            # Converte a string de data/hora para um objeto de data Python
-            vencimento_dt = datetime.fromisoformat(cobranca['vencimento']).date()
-
-            # ✅ Utiliza o novo modelo de resposta
-            item_formatado = CobrancaPagaResponse(
-                cliente=cobranca.get('cliente', 'N/A'),
-                vencimento=str(vencimento_dt),
-                valor=cobranca.get('valor', 0.0)
-                # O status "Pago" é definido pelo modelo Pydantic
-            )
-            cobrancas_formatadas.append(item_formatado)
+            cobrancas_formatadas.append(_formatar_cobranca_paga(cobranca))
 
-    except requests.exceptions.HTTPError as e:
-        error_detail = e.response.text if e.response else str(e)
+    except RepositorioError as e:
         raise HTTPException(
-            status_code=e.response.status_code if e.response else 500,
-            detail=f"Erro ao buscar cobranças no Supabase: {error_detail}"
-        )
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"Erro de comunicação com o Supabase: {e}"
+            status_code=e.status_code,
+            detail=f"Erro ao buscar cobranças no Supabase: {e.mensagem}"
         )
     except (KeyError, TypeError) as e:
          raise HTTPException(
@@ -344,12 +418,13 @@ def listar_cobrancas_pagas():
     return cobrancas_formatadas
 
 @router.post("/pagar_cobranca", response_model=PagarCobrancaResponse)
-def pagar_cobranca(cobranca_info: PagarCobrancaInput):
+async def pagar_cobranca(cobranca_info: PagarCobrancaInput):
     """
     Recebe os dados de uma cobrança (cliente, vencimento e valor), localiza o
     registro correspondente no Supabase e atualiza seu 'status_pagamento' para TRUE.
 
-    A busca pelo 'vencimento' considera apenas a data, ignorando a hora.
+    A busca pelo 'vencimento' considera apenas a data, ignorando a hora, e só
+    cobranças ainda não pagas contam: pagar de novo responde 404.
     
     Args:
         cobranca_info: Um objeto contendo 'cliente', 'vencimento' e 'valor'.
@@ -360,34 +435,17 @@ def pagar_cobranca(cobranca_info: PagarCobrancaInput):
     Raises:
         HTTPException: Se a cobrança não for encontrada ou se a requisição ao Supabase falhar.
     """
-    table_name = "Cobranca"
-    
-    # 1. Define o payload da atualização (o que vamos mudar)
-    payload = {"status_pagamento": True}
-    
-    # 2. Constrói os filtros para a busca (query params)
+    # 1. Constrói o intervalo de busca do vencimento
     # Para buscar pela data de vencimento ignorando a hora, criamos um intervalo
     # que vai do início ao fim do dia informado.
     start_of_day = datetime.combine(cobranca_info.vencimento, time.min)
     end_of_day = start_of_day + timedelta(days=1)
-    
-    params = {
-        "cliente": f"eq.{cobranca_info.cliente}",
-        "valor": f"eq.{cobranca_info.valor}",
-        "vencimento": f"gte.{start_of_day.isoformat()}", # gte = Greater Than or Equal
-        "vencimento": f"lt.{end_of_day.isoformat()}",   # lt = Less Than
-    }
 
     try:
-        headers = _get_headers()
-        url = f"{SUPABASE_URL}/rest/v1/{table_name}"
-        
-        # Usamos o método PATCH para atualizar dados existentes
-        response = requests.patch(url, headers=headers, params=params, json=payload, timeout=15.0)
-        
-        response.raise_for_status()
-        
-        data = response.json()
+        # 2. Marca como paga(s) a(s) cobrança(s) encontrada(s): status_pagamento = TRUE
+        data = await get_repositorios().cobranca.pagar(
+            cobranca_info.cliente, cobranca_info.valor, start_of_day, end_of_day
+        )
         
         # Se a resposta for uma lista vazia, nenhum registro foi encontrado/atualizado
         if not data:
@@ -396,17 +454,14 @@ def pagar_cobranca(cobranca_info: PagarCobrancaInput):
                 detail="Nenhuma cobrança encontrada com os critérios especificados."
             )
             
-    except requests.exceptions.HTTPError as e:
-        error_detail = e.response.text if e.response else str(e)
-        raise HTTPException(
-            status_code=e.response.status_code if e.response else 500,
-            detail=f"Erro do Supabase: {error_detail}"
-        )
-    except requests.exceptions.RequestException as e:
+    except RepositorioError as e:
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"Erro de comunicação com o Supabase: {e}"
+            status_code=e.status_code,
+            detail=f"Erro do Supabase: {e.mensagem}"
         )
+    finally:
+        invalidar_tabelas("Cobranca")
+    registrar_cobrancas_pagas(data)
         
     return {
         "message": f"Pagamento da cobrança para '{cobranca_info.cliente}' registrado com sucesso!",
@@ -414,23 +469,89 @@ def pagar_cobranca(cobranca_info: PagarCobrancaInput):
     }
 
 
+# --- Pagamento em lote ---
+# Chaves (cliente/vencimento/valor) resolvidas por consulta; consultas em paralelo
+# para manter a URL de cada uma curta
+CHAVES_POR_CONSULTA = 50
+LIMITE_PAGAR_LOTE = 1000
 
+def _intervalo_do_dia(dia: date) -> Tuple[datetime, datetime]:
+    """Intervalo [início, fim) do dia, como em `pagar_cobranca`."""
+    inicio = datetime.combine(dia, time.min)
+    return inicio, inicio + timedelta(days=1)
 
+def _casa_com_chave(cobranca: Dict[str, Any], item: PagarLoteItem) -> bool:
+    """Se a linha (com as colunas da chave) corresponde ao item cliente/vencimento/valor."""
+    return (
+        cobranca["cliente"] == item.cliente
+        and float(cobranca["valor"]) == item.valor
+        and datetime.fromisoformat(cobranca["vencimento"]).date() == item.vencimento
+    )
 
+@router.post("/pagar_lote", response_model=PagarLoteResponse)
+async def pagar_cobrancas_em_lote(itens: List[PagarLoteItem]):
+    """
+    Marca várias cobranças como pagas de uma só vez (ex: um cliente quitando o mês).
+
+    Cada item identifica a cobrança pelo `id` ou por `cliente`, `vencimento` e
+    `valor` (mesmo critério de `/pagar_cobranca`, inclusive pagando todas as
+    cobranças que casarem). Só cobranças ainda não pagas contam: as já pagas
+    aparecem em `nao_encontradas`. As chaves são resolvidas em IDs com poucas
+    consultas, e todas as cobranças são pagas com um único PATCH
+    (`id=in.(...)`). A resposta separa os itens encontrados dos não encontrados.
+    """
+    if len(itens) > LIMITE_PAGAR_LOTE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Envie no máximo {LIMITE_PAGAR_LOTE} cobranças por lote."
+        )
+    repo = get_repositorios().cobranca
+    por_chave = [(indice, item) for indice, item in enumerate(itens) if item.id is None]
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+    try:
+        # 1. Resolve as chaves cliente/vencimento/valor em IDs
+        candidatas: List[Dict[str, Any]] = []
+        if por_chave:
+            grupos = [por_chave[i:i + CHAVES_POR_CONSULTA] for i in range(0, len(por_chave), CHAVES_POR_CONSULTA)]
+            respostas = await asyncio.gather(*(
+                repo.buscar_por_chaves([
+                    (item.cliente, item.valor, *_intervalo_do_dia(item.vencimento)) for _, item in grupo
+                ])
+                for grupo in grupos
+            ))
+            candidatas = [linha for resposta in respostas for linha in resposta]
+
+        ids_por_indice: Dict[int, List[int]] = {}
+        for indice, item in enumerate(itens):
+            if item.id is not None:
+                ids_por_indice[indice] = [item.id]
+            else:
+                ids_por_indice[indice] = sorted({c["id"] for c in candidatas if _casa_com_chave(c, item)})
+
+        # 2. Paga todas as cobranças encontradas com um único PATCH
+        todos_ids = sorted({id_ for ids in ids_por_indice.values() for id_ in ids})
+        data = await repo.pagar_ids(todos_ids) if todos_ids else []
+
+    except RepositorioError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"Erro do Supabase ao pagar cobranças em lote: {e.mensagem}"
+        )
+    finally:
+        invalidar_tabelas("Cobranca")
+    registrar_cobrancas_pagas(data)
+
+    # 3. Um item foi encontrado se alguma das suas cobranças foi atualizada
+    atualizados = {linha["id"] for linha in data}
+    encontradas, nao_encontradas = [], []
+    for indice, item in enumerate(itens):
+        ids = [id_ for id_ in ids_por_indice[indice] if id_ in atualizados]
+        resultado = PagarLoteItemResultado(indice=indice, item=item, ids=ids)
+        (encontradas if ids else nao_encontradas).append(resultado)
+
+    return PagarLoteResponse(
+        message=f"{len(encontradas)} de {len(itens)} cobrança(s) marcada(s) como paga(s).",
+        encontradas=encontradas,
+        nao_encontradas=nao_encontradas,
+        data=data,
+    )
@@ -1,15 +1,14 @@
+import asyncio
 from typing import List
 from app.api.src.schemas.produto import EstoqueRequest,AtualizarEstoqueRequest,PrecoUnitarioRequest
-import requests
 from typing import Dict, Any, Optional
 import json
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
 from fastapi import APIRouter
-import os
-from dotenv import load_dotenv
-load_dotenv()
-SUPABASE_URL = os.environ.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
+from app.api.src.api.deps import get_repositorios
+from app.api.src.repository.base import RepositorioError
+from app.api.src.core.cache import estoque_cache, atualizar_estoque_cache
+from app.api.src.core.etag import responder_com_etag
 router = APIRouter()
 class StandardHTTPException(Exception):
     """
@@ -37,35 +36,9 @@ class StandardHTTPException(Exception):
         )
 
 # O router é prefixado com '/produtos' no arquivo principal da API
-def _get_headers() -> dict:
-    """Cria os cabeçalhos padrão para a autenticação na API do Supabase."""
-    if not SUPABASE_KEY:
-        raise ValueError("A chave do Supabase não foi definida.")
-    
-    return {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        "Prefer": "return=representation",
-    }
-
 # --- Funções ---
 
-def _get_headers() -> dict:
-    """Cria os cabeçalhos padrão para a autenticação na API do Supabase."""
-    if not SUPABASE_KEY:
-        raise ValueError("A chave do Supabase não foi definida.")
-    
-    return {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        "Prefer": "return=representation",
-    }
-
-def estoque_por_categoria() -> List[Dict[str, Any]]:
+async def estoque_por_categoria() -> List[Dict[str, Any]]:
     """
     Obtém uma lista com a quantidade em estoque para cada categoria de produto.
 
@@ -73,62 +46,37 @@ def estoque_por_categoria() -> List[Dict[str, Any]]:
         Uma lista de dicionários, onde cada dicionário contém a 'categoria'
         e a 'quantidade' em estoque. Ex: [{'categoria': 'Brownie', 'quantidade': 50}]
     """
-    table_name = "Estoque"
     try:
-        headers = _get_headers()
-        url = f"{SUPABASE_URL}/rest/v1/{table_name}"
-        
-        # Modificação: Seleciona as colunas 'categoria' e 'quantidade' para todos os registros.
+        # Seleciona as colunas 'categoria' e 'quantidade' para todos os registros.
         # Não há filtro por uma categoria específica.
-        params = {"select": "categoria,quantidade"}
-        
-        response = requests.get(url, headers=headers, params=params, timeout=15.0)
-
-        if response.status_code >= 400:
-            try:
-                detail = response.json()
-            except json.JSONDecodeError:
-                detail = {"message": response.text}
-            raise StandardHTTPException(detail=detail, status_code=response.status_code)
-        
-        # A API já retorna uma lista de dicionários no formato desejado.
-        return response.json()
+        return await get_repositorios().estoque.listar(["categoria", "quantidade"])
 
-    except requests.exceptions.RequestException as req_err:
-        raise StandardHTTPException(detail={"message": f"Erro de conexão: {req_err}"}, status_code=503)
+    except RepositorioError as e:
+        raise StandardHTTPException(detail=e.detail, status_code=e.status_code)
     except Exception as e:
         if isinstance(e, StandardHTTPException):
             raise
         raise StandardHTTPException(detail={"message": f"Erro inesperado: {e}"}, status_code=500)
 
-def obter_estoque(categoria_produto: str) -> int:
-    """Obtém a quantidade em estoque de uma categoria de produto."""
-    table_name = "Estoque"
+async def obter_estoque(categoria_produto: str) -> int:
+    """
+    Obtém a quantidade em estoque de uma categoria de produto, sempre lida do
+    banco (o cache de Estoque pode estar atrás de escritas de outros processos).
+    """
     try:
-        headers = _get_headers()
-        url = f"{SUPABASE_URL}/rest/v1/{table_name}"
-        params = {"categoria": f"eq.{categoria_produto}", "select": "quantidade"}
-        
-        response = requests.get(url, headers=headers, params=params, timeout=15.0)
-
-        if response.status_code >= 400:
-            try:
-                detail = response.json()
-            except json.JSONDecodeError:
-                detail = {"message": response.text}
-            raise StandardHTTPException(detail=detail, status_code=response.status_code)
-        
-        data = response.json()
-        if not data:
+        # Traz a linha completa para renovar o cache usado na busca de preço
+        linha = await get_repositorios().estoque.obter(categoria_produto)
+        if linha is None:
             raise StandardHTTPException(
                 detail={"message": f"A categoria de produto '{categoria_produto}' não foi encontrada."},
                 status_code=404
             )
             
-        return data[0]['quantidade']
+        atualizar_estoque_cache([linha], categoria_produto)
+        return linha['quantidade']
 
-    except requests.exceptions.RequestException as req_err:
-        raise StandardHTTPException(detail={"message": f"Erro de conexão: {req_err}"}, status_code=503)
+    except RepositorioError as e:
+        raise StandardHTTPException(detail=e.detail, status_code=e.status_code)
     except Exception as e:
         if isinstance(e, StandardHTTPException):
             raise
@@ -138,51 +86,92 @@ def obter_estoque(categoria_produto: str) -> int:
     summary="Obter Estoque Atual de Todos os Produtos",
     description="Retorna uma lista completa de todos os produtos e suas respectivas quantidades em estoque."
 )
-def obter_estoque_atual(
+async def obter_estoque_atual(
     req: EstoqueRequest,
     # db: Session = Depends(deps.get_db) (removido)
 ) -> int:
     """
     Endpoint para buscar o status atual do estoque de todos os produtos.
     """
-    return obter_estoque(req.categoria)
+    return await obter_estoque(req.categoria)
+
+@router.get(
+    "/estoque_atual",
+    response_model=int,
+    summary="Obter Estoque Atual de uma Categoria (GET)",
+    description="Mesma consulta de POST /estoque_atual, com a categoria na query string; responde com ETag e Cache-Control."
+)
+async def obter_estoque_atual_get(
+    request: Request,
+    categoria: str = Query(..., description="Categoria do produto"),
+):
+    """
+    Versão GET de `obter_estoque_atual`: pode ser guardada por caches HTTP e
+    revalidada com `If-None-Match` (resposta 304 se a quantidade não mudou).
+    """
+    return responder_com_etag(request, await obter_estoque(categoria))
 
 
 
-def _obter_ultimo_preco_unitario(categoria: str) -> Optional[float]:
+async def _obter_ultimo_preco_unitario(categoria: str) -> Optional[float]:
     """
-    Busca o último 'preco_unitario' conhecido para a categoria no Supabase.
+    Busca o último 'preco_unitario' conhecido para a categoria no Supabase
+    (ou no cache de Estoque, se a linha da categoria estiver em cache).
     """
-    table_name = "Estoque"
-    headers = _get_headers()
+    linha = estoque_cache.get(categoria)
+    if linha is not None:
+        return linha["preco_unitario"]
+
     try:
-        url = f"{SUPABASE_URL}/rest/v1/{table_name}?categoria=eq.{categoria}&select=preco_unitario"
-        response = requests.get(url, headers=headers, timeout=10.0)
-        response.raise_for_status()
-        data = response.json()
+        linha = await get_repositorios().estoque.obter(categoria, timeout=10.0)
         
-        if data:
-            return data[0].get("preco_unitario")
+        if linha is not None:
+            atualizar_estoque_cache([linha], categoria)
+            return linha.get("preco_unitario")
         return None
 
-    except requests.exceptions.RequestException as e:
+    except RepositorioError as e:
         print(f"Alerta: Falha ao buscar preço unitário no Supabase: {e}")
         return None
 
+async def _obter_precos_unitarios(categorias: List[str]) -> Dict[str, Optional[float]]:
+    """
+    Busca o 'preco_unitario' de várias categorias com uma única consulta ao Supabase.
+
+    Categorias já presentes no cache de Estoque não são consultadas.
+    Categorias não encontradas (ou uma falha na consulta) resultam em None.
+    """
+    precos: Dict[str, Optional[float]] = {}
+    faltantes = []
+    for categoria in categorias:
+        linha = estoque_cache.get(categoria)
+        if linha is not None:
+            precos[categoria] = linha["preco_unitario"]
+        else:
+            precos[categoria] = None
+            faltantes.append(categoria)
+    if not faltantes:
+        return precos
+    try:
+        for item in await get_repositorios().estoque.obter_varios(faltantes):
+            atualizar_estoque_cache([item], item["categoria"])
+            precos[item["categoria"]] = item.get("preco_unitario")
+    except RepositorioError as e:
+        print(f"Alerta: Falha ao buscar preços unitários no Supabase: {e}")
+    return precos
+
 @router.post(
     "/atualizar_estoque",
     status_code=status.HTTP_200_OK,  # Melhor que 201 para UPSERT
     summary="Atualiza o estoque de uma categoria de produto (UPSERT)",
     description="Cria um novo registro de estoque ou atualiza um existente com base na categoria."
 )
-def atualizar_estoque_por_categoria(req: AtualizarEstoqueRequest):
+async def atualizar_estoque_por_categoria(req: AtualizarEstoqueRequest):
     """
     Endpoint para atualizar o estoque de uma categoria de produto no Supabase.
     Esta função realiza um 'UPSERT'.
     """
-    table_name = "Estoque"
-
-    preco_unitario_existente = _obter_ultimo_preco_unitario(req.categoria)
+    preco_unitario_existente = await _obter_ultimo_preco_unitario(req.categoria)
     preco_para_uso = preco_unitario_existente if preco_unitario_existente is not None else 0.0
 
     payload = {
@@ -193,19 +182,9 @@ def atualizar_estoque_por_categoria(req: AtualizarEstoqueRequest):
     }
 
     try:
-        headers = _get_headers()
-        headers["Prefer"] = "resolution=merge-duplicates"
-
-        # ✅ Adiciona on_conflict na URL
-        url = f"{SUPABASE_URL}/rest/v1/{table_name}?on_conflict=categoria"
-
-        response = requests.post(url, headers=headers, json=payload, timeout=15.0)
-        response.raise_for_status()
-
-        try:
-            data = response.json() if response.content else None
-        except ValueError:
-            data = None
+        # ✅ UPSERT com conflito em 'categoria'
+        data = await get_repositorios().estoque.salvar(payload)
+        atualizar_estoque_cache(data, req.categoria)
 
         return {
             "message": f"Estoque da categoria '{req.categoria}' atualizado com sucesso.",
@@ -213,16 +192,10 @@ def atualizar_estoque_por_categoria(req: AtualizarEstoqueRequest):
 }
 
 
-    except requests.exceptions.HTTPError as e:
-        error_detail = e.response.text if e.response else str(e)
+    except RepositorioError as e:
         raise HTTPException(
-            status_code=e.response.status_code if e.response else 500,
-            detail=f"Erro do Supabase ao atualizar estoque: {error_detail}"
-        )
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"Erro de comunicação: {e}"
+            status_code=e.status_code,
+            detail=f"Erro do Supabase ao atualizar estoque: {e.mensagem}"
         )
 @router.post(
     "/adicionar_ao_estoque",
@@ -230,60 +203,27 @@ def atualizar_estoque_por_categoria(req: AtualizarEstoqueRequest):
     summary="Adiciona uma quantidade ao estoque de uma categoria (UPSERT)",
     description="Adiciona a quantidade fornecida ao estoque existente ou cria um novo registro se ele não existir."
 )
-def adicionar_ao_estoque(req: AtualizarEstoqueRequest):
+async def adicionar_ao_estoque(req: AtualizarEstoqueRequest):
     """
     Endpoint para ADICIONAR uma quantidade ao estoque de uma categoria no Supabase.
     """
-    table_name = "Estoque"
     try:
-        # Tenta obter o estoque atual. Se não encontrar (404), considera como 0.
-        try:
-            estoque_atual = obter_estoque(req.categoria)
-        except StandardHTTPException as e:
-            if e.status_code == 404:
-                estoque_atual = 0
-            else:
-                raise  # Propaga outros erros
-
-        nova_quantidade = estoque_atual + req.quantidade
-        preco_unitario_existente = _obter_ultimo_preco_unitario(req.categoria)
-        preco_para_uso = preco_unitario_existente if preco_unitario_existente is not None else 0.0
-
-        payload = {
-            "categoria": req.categoria,
-            "quantidade": nova_quantidade,
-            "preco_unitario": preco_para_uso,
-            "observacao": f"Adicao de {req.quantidade} unidade(s) ao estoque"
-        }
-
-        headers = _get_headers()
-        headers["Prefer"] = "resolution=merge-duplicates"
-
-        # ✅ Adiciona on_conflict na URL
-        url = f"{SUPABASE_URL}/rest/v1/{table_name}?on_conflict=categoria"
-
-        response = requests.post(url, headers=headers, json=payload, timeout=15.0)
-        
-
-        
-        response.raise_for_status()
-        data = None
-        if response.status_code != 204 and response.text:
-            try:
-                data = response.json()
-            except json.JSONDecodeError:
-                # ✅ TRATA RESPOSTA INVÁLIDA DE FORMA MAIS CLARA
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"A API externa respondeu com um corpo não-JSON. Conteúdo: {response.text}"
-                )
+        # O incremento é feito pelo próprio banco, em um único comando: sem
+        # leitura prévia e sem perda de atualizações quando há vendas
+        # concorrentes da mesma categoria. Se a categoria não existir, ela é
+        # criada (UPSERT em 'categoria').
+        data = await get_repositorios().estoque.incrementar(
+            req.categoria,
+            req.quantidade,
+            observacao=f"Adicao de {req.quantidade} unidade(s) ao estoque",
+            criar=True,
+        )
         
+        # 'data' contém a linha atualizada, já com a nova quantidade
+        atualizar_estoque_cache(data, req.categoria)
         return {"message": f"Estoque da categoria '{req.categoria}' incrementado com sucesso.", "data": data}
-    except requests.exceptions.HTTPError as e:
-        error_detail = e.response.text if e.response else str(e)
-        raise HTTPException(status_code=e.response.status_code if e.response else 500, detail=f"Erro do Supabase ao adicionar ao estoque: {error_detail}")
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Erro de comunicação: {e}")
+    except RepositorioError as e:
+        raise HTTPException(status_code=e.status_code, detail=f"Erro do Supabase ao adicionar ao estoque: {e.mensagem}")
 
 @router.get(
     "/categorias_estoque",
@@ -291,63 +231,41 @@ def adicionar_ao_estoque(req: AtualizarEstoqueRequest):
     description="Retorna uma lista com os nomes de todas as categorias de produtos existentes no estoque.",
     response_model=List[str]
 )
-def get_categorias_estoque():
+async def get_categorias_estoque(request: Request):
     """
     Endpoint para buscar todas as categorias de produtos no estoque.
+
+    Responde com ETag: um `If-None-Match` com a lista atual recebe 304.
     """
-    table_name = "Estoque"
     try:
-        headers = _get_headers()
-        url = f"{SUPABASE_URL}/rest/v1/{table_name}"
-        params = {"select": "categoria"}
-        
-        response = requests.get(url, headers=headers, params=params, timeout=15.0)
-        response.raise_for_status()
-        
-        data = response.json()
+        data = await get_repositorios().estoque.listar(["categoria"])
         categorias = [item['categoria'] for item in data]
         
-        return categorias
+        return responder_com_etag(request, categorias)
 
-    except requests.exceptions.HTTPError as e:
-        error_detail = e.response.text if e.response else str(e)
-        raise HTTPException(status_code=e.response.status_code if e.response else 500, detail=f"Erro do Supabase: {error_detail}")
-    except requests.exceptions.RequestException as req_err:
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Erro de comunicação: {req_err}")
+    except RepositorioError as e:
+        raise HTTPException(status_code=e.status_code, detail=f"Erro do Supabase: {e.mensagem}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro inesperado: {e}")
-@router.get('/estoque')
-def estoque_por_categoria() -> List[Dict[str, Any]]:
+@router.get('/estoque', response_model=List[Dict[str, Any]])
+async def estoque_por_categoria(request: Request):
     """
     Obtém uma lista com a quantidade em estoque para cada categoria de produto.
 
+    Responde com ETag: um `If-None-Match` com a lista atual recebe 304.
+
     Returns:
         Uma lista de dicionários, onde cada dicionário contém a 'categoria'
         e a 'quantidade' em estoque. Ex: [{'categoria': 'Brownie', 'quantidade': 50}]
     """
-    table_name = "Estoque"
     try:
-        headers = _get_headers()
-        url = f"{SUPABASE_URL}/rest/v1/{table_name}"
-        
-        # Modificação: Seleciona as colunas 'categoria' e 'quantidade' para todos os registros.
+        # Seleciona as colunas 'categoria' e 'quantidade' para todos os registros.
         # Não há filtro por uma categoria específica.
-        params = {"select": "categoria,quantidade"}
-        
-        response = requests.get(url, headers=headers, params=params, timeout=15.0)
-
-        if response.status_code >= 400:
-            try:
-                detail = response.json()
-            except json.JSONDecodeError:
-                detail = {"message": response.text}
-            raise StandardHTTPException(detail=detail, status_code=response.status_code)
-        
-        # A API já retorna uma lista de dicionários no formato desejado.
-        return response.json()
+        linhas = await get_repositorios().estoque.listar(["categoria", "quantidade"])
+        return responder_com_etag(request, linhas)
 
-    except requests.exceptions.RequestException as req_err:
-        raise StandardHTTPException(detail={"message": f"Erro de conexão: {req_err}"}, status_code=503)
+    except RepositorioError as e:
+        raise StandardHTTPException(detail=e.detail, status_code=e.status_code)
     except Exception as e:
         if isinstance(e, StandardHTTPException):
             raise
@@ -360,13 +278,13 @@ def estoque_por_categoria() -> List[Dict[str, Any]]:
     summary="Obtém o preço unitário de uma categoria",
     description="Busca e retorna o último preço unitário registrado para a categoria fornecida."
 )
-def obter_preco_unitario(req: PrecoUnitarioRequest):
+async def obter_preco_unitario(req: PrecoUnitarioRequest):
     """
     Endpoint para obter o último preço unitário de uma categoria no Supabase.
     """
     try:
         # Utiliza a função auxiliar para buscar o preço
-        preco_unitario = _obter_ultimo_preco_unitario(req.categoria)
+        preco_unitario = await _obter_ultimo_preco_unitario(req.categoria)
 
         # Se a função retornar None, significa que a categoria não foi encontrada
         if preco_unitario is None:
@@ -386,11 +304,28 @@ def obter_preco_unitario(req: PrecoUnitarioRequest):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ocorreu um erro interno ao buscar o preço unitário: {str(e)}"
         )
+
+@router.get(
+    "/preco_unitario",
+    response_model=float,
+    status_code=status.HTTP_200_OK,
+    summary="Obtém o preço unitário de uma categoria (GET)",
+    description="Mesma consulta de POST /preco_unitario, com a categoria na query string; responde com ETag e Cache-Control."
+)
+async def obter_preco_unitario_get(
+    request: Request,
+    categoria: str = Query(..., description="Categoria do produto"),
+):
+    """
+    Versão GET de `obter_preco_unitario`, revalidável com `If-None-Match`.
+    """
+    preco_unitario = await obter_preco_unitario(PrecoUnitarioRequest(categoria=categoria))
+    return responder_com_etag(request, preco_unitario)
 # --- Bloco de Teste ---
 if __name__ == "__main__":
 
     print("\n\n--- Iniciando teste para ADICIONAR ao estoque ---")
     dados_adicao = {"categoria": "Pizza", "quantidade": 5}
     dados_adicao = AtualizarEstoqueRequest(**dados_adicao)
-    adicionar_ao_estoque(dados_adicao)
+    asyncio.run(adicionar_ao_estoque(dados_adicao))
    
\ No newline at end of file
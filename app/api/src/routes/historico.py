@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Path
+from fastapi import APIRouter, HTTPException, Path, Query, Request, status
 from pydantic import BaseModel, Field
-from typing import Dict, Any, List
-import requests, json
-from app.api.src.schemas.venda import Venda,CategoriaSchema
-from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+import base64
+import json
+from app.api.src.schemas.venda import Venda,CategoriaSchema,VendaHistorico,HistoricoPaginaResponse
+from app.api.src.api.deps import get_repositorios, get_settings
+from app.api.src.repository.base import RepositorioError
+from app.api.src.core.etag import responder_com_etag
+from app.api.src.core.streaming import formato_streaming, responder_streaming
+from datetime import date, datetime, time, timedelta
 router = APIRouter()
 
 # --- Constante para definir o tamanho da página ---
 ITENS_POR_PAGINA = 20
+LIMITE_MAXIMO_POR_PAGINA = 100
 class StandardHTTPException(Exception):
     """
     Exceção aprimorada para encapsular erros de requisição HTTP,
@@ -33,51 +39,65 @@ class StandardHTTPException(Exception):
             f"{detailed_response}"
 # ... (rota POST "/" existente) ...
         )
-import os
-from dotenv import load_dotenv
-load_dotenv()
-SUPABASE_URL = os.environ.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
-
-def _get_headers() -> dict:
-    """Cria os cabeçalhos padrão para a autenticação na API do Supabase."""
-    if not SUPABASE_KEY:
-        raise ValueError("A chave do Supabase não foi definida.")
-    
-    return {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        "Prefer": "return=representation",
-    }
-
-def obter_historico(categoria: str) -> List[Venda]:
-    """Retorna o histórico de vendas para uma categoria de produto específica."""
-    table_name = "Venda"
+def _codificar_cursor(venda: VendaHistorico) -> str:
+    """Gera um cursor opaco a partir da chave (data_venda, id) da última venda da página."""
+    chave = json.dumps([venda.data_venda.isoformat(), venda.id])
+    return base64.urlsafe_b64encode(chave.encode()).decode()
+
+def _decodificar_cursor(cursor: str) -> Tuple[str, int]:
+    """Lê um cursor gerado por `_codificar_cursor`."""
     try:
-        headers = _get_headers()
-        url = f"{SUPABASE_URL}/rest/v1/{table_name}"
-        params = {"categoria_produto": f"eq.{categoria}", "select": "*"}
-
-        response = requests.get(url, headers=headers, params=params, timeout=15.0)
-
-        if response.status_code >= 400:
-            try:
-                detail = response.json()
-            except json.JSONDecodeError:
-                detail = {"message": response.text}
-            raise StandardHTTPException(detail=detail, status_code=response.status_code)
-        
-        data = response.json()
+        data_venda, venda_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(data_venda).isoformat(), int(venda_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginação inválido.")
+
+def _intervalo_historico(
+    de: Optional[date] = None,
+    ate: Optional[date] = None,
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Converte as datas do filtro em um intervalo [início, fim) de 'data_venda'.
+
+    'ate' é inclusivo: o fim do intervalo é o início do dia seguinte.
+    """
+    inicio = datetime.combine(de, time.min) if de is not None else None
+    fim = datetime.combine(ate + timedelta(days=1), time.min) if ate is not None else None
+    return inicio, fim
+
+async def obter_historico(
+    categoria: str,
+    *,
+    limite: Optional[int] = None,
+    offset: int = 0,
+    de: Optional[date] = None,
+    ate: Optional[date] = None,
+    cursor: Optional[str] = None,
+) -> List[VendaHistorico]:
+    """
+    Retorna o histórico de vendas para uma categoria de produto específica,
+    das mais recentes para as mais antigas.
+
+    A paginação ('limit'/'offset' ou o cursor, sempre em ordem (data_venda, id)
+    decrescente) e o intervalo de datas são aplicados pelo próprio banco, então
+    apenas as linhas da página trafegam.
+    """
+    try:
+        inicio, fim = _intervalo_historico(de, ate)
+        # Keyset: apenas vendas anteriores à última chave (data_venda, id) já entregue
+        apos = _decodificar_cursor(cursor) if cursor is not None else None
+
+        data = await get_repositorios().venda.historico(
+            categoria, limite=limite, offset=offset, inicio=inicio, fim=fim, apos=apos
+        )
         
         # Converte cada item do dicionário JSON em um objeto Venda
-        return [Venda(**item) for item in data]
+        return [VendaHistorico(**item) for item in data]
 
-    except requests.exceptions.RequestException as req_err:
-        raise StandardHTTPException(detail={"message": f"Erro de conexão: {req_err}"}, status_code=503)
+    except RepositorioError as e:
+        raise StandardHTTPException(detail=e.detail, status_code=e.status_code)
     except Exception as e:
-        if isinstance(e, StandardHTTPException):
+        if isinstance(e, (StandardHTTPException, HTTPException)):
             raise
         raise StandardHTTPException(detail={"message": f"Erro inesperado: {e}"}, status_code=500)
 
@@ -89,19 +109,91 @@ def obter_historico(categoria: str) -> List[Venda]:
     response_model=List[Venda],
     summary="Obter Histórico de Vendas Paginado"
 )
-def obter_historico_de_vendas(
+async def obter_historico_de_vendas(
     *,
     categoria_dto: CategoriaSchema, # DTO vem no corpo da requisição
-    pagina: int = Path(..., gt=0, description="O número da página para retornar")
+    pagina: int = Path(..., gt=0, description="O número da página para retornar"),
+    de: Optional[date] = Query(default=None, description="Data inicial (inclusiva) das vendas"),
+    ate: Optional[date] = Query(default=None, description="Data final (inclusiva) das vendas"),
 )-> List[Venda]:
     """
     Endpoint para obter o histórico de vendas de forma paginada,
     filtrado por uma categoria enviada no corpo da requisição.
+
+    Apenas a página pedida é buscada no banco ('limit'/'offset').
+    Para históricos muito longos, prefira `GET /historico/vendas`, que usa cursor.
     """
-    historico_completo = obter_historico(categoria_dto.categoria)
-    
     # Lógica de paginação
     inicio = (pagina - 1) * ITENS_POR_PAGINA
-    fim = pagina * ITENS_POR_PAGINA
     
-    return historico_completo[inicio:fim]
\ No newline at end of file
+    return await obter_historico(
+        categoria_dto.categoria, limite=ITENS_POR_PAGINA, offset=inicio, de=de, ate=ate
+    )
+
+
+@router.get(
+    "/historico/{pagina}",
+    response_model=List[Venda],
+    summary="Obter Histórico de Vendas Paginado (GET)"
+)
+async def obter_historico_de_vendas_get(
+    request: Request,
+    pagina: int = Path(..., gt=0, description="O número da página para retornar"),
+    categoria: str = Query(..., description="Categoria do produto para filtrar o histórico"),
+    de: Optional[date] = Query(default=None, description="Data inicial (inclusiva) das vendas"),
+    ate: Optional[date] = Query(default=None, description="Data final (inclusiva) das vendas"),
+):
+    """
+    Versão GET de `obter_historico_de_vendas`, com a categoria na query string.
+
+    A resposta leva ETag e `Cache-Control`: um `If-None-Match` com a página
+    atual recebe 304.
+    """
+    inicio = (pagina - 1) * ITENS_POR_PAGINA
+    itens = await obter_historico(categoria, limite=ITENS_POR_PAGINA, offset=inicio, de=de, ate=ate)
+    return responder_com_etag(request, itens, modelo=List[Venda])
+
+
+@router.get(
+    "/vendas",
+    response_model=HistoricoPaginaResponse,
+    summary="Obter Histórico de Vendas por Cursor"
+)
+async def obter_historico_por_cursor(
+    request: Request,
+    categoria: str = Query(..., description="Categoria do produto para filtrar o histórico"),
+    limite: int = Query(default=ITENS_POR_PAGINA, gt=0, le=LIMITE_MAXIMO_POR_PAGINA, description="Itens por página"),
+    cursor: Optional[str] = Query(default=None, description="Valor de 'proximo_cursor' da página anterior"),
+    de: Optional[date] = Query(default=None, description="Data inicial (inclusiva) das vendas"),
+    ate: Optional[date] = Query(default=None, description="Data final (inclusiva) das vendas"),
+    formato: Optional[str] = Query(default=None, alias="format", description="json (padrão), ndjson ou csv"),
+) -> HistoricoPaginaResponse:
+    """
+    Endpoint para obter o histórico de vendas paginado por cursor (keyset em
+    `(data_venda, id)`).
+
+    Ao contrário da paginação por número de página, o custo de cada página não
+    cresce com o tamanho do histórico: o banco segue o índice a partir da
+    última venda entregue em vez de pular as anteriores.
+
+    Com `format=ndjson|csv` (ou o cabeçalho `Accept` correspondente), todo o
+    histórico do intervalo é exportado em streaming (`limite` e `cursor` são
+    ignorados), em ordem de `id`.
+    """
+    formato = formato_streaming(request, formato)
+    if formato:
+        return await responder_streaming(
+            get_repositorios().venda.paginas(categoria, *_intervalo_historico(de, ate), get_settings().tamanho_pagina_streaming),
+            formato,
+            colunas=list(VendaHistorico.model_fields),
+            transformar=lambda venda: VendaHistorico(**venda).model_dump(mode="json"),
+            nome_arquivo="historico_vendas",
+        )
+
+    # Busca um item a mais para saber se existe próxima página
+    itens = await obter_historico(categoria, limite=limite + 1, de=de, ate=ate, cursor=cursor)
+    proximo_cursor = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        proximo_cursor = _codificar_cursor(itens[-1])
+    return HistoricoPaginaResponse(itens=itens, proximo_cursor=proximo_cursor)
@@ -1,20 +1,25 @@
 # src/brownie_api/api/v1/endpoints/vendas.py
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Header, HTTPException, Query, Request, status
 router = APIRouter()
-import requests
-from typing import Dict, Any
+import asyncio
+from collections import defaultdict
+from typing import Dict, Any, List, Optional
 import json
+from datetime import date, datetime, timedelta, timezone
 from app.api.src.schemas.produto import AtualizarEstoqueRequest
 from app.api.src.routes.estoque_atual import adicionar_ao_estoque
-from app.api.src.schemas.venda import Venda
+from app.api.src.schemas.venda import ResumoVendasResponse, Venda, VendaLoteItemResultado, VendaLoteResponse
 from app.api.src.routes.cobranca import criar_cobranca_de_venda,adicionar_cobranca
-from app.api.src.routes.estoque_atual import _obter_ultimo_preco_unitario
-import os
-from dotenv import load_dotenv
-load_dotenv()
-SUPABASE_URL = os.environ.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
+from app.api.src.routes.estoque_atual import _obter_ultimo_preco_unitario, _obter_precos_unitarios
+from app.api.src.api.deps import get_repositorios, get_settings
+from app.api.src.repository.base import RepositorioError
+from app.api.src.core.cache import atualizar_estoque_cache, estoque_cache
+from app.api.src.core.idempotencia import responder_idempotente
+from app.api.src.core.recebiveis import registrar_cobrancas_criadas
+from app.api.src.core.resumo_vendas import DIA, SEMANA, consultar_resumo, registrar_vendas
+from app.api.src.core.outbox import COBRANCA, ESTOQUE, confirmar_escritas, descartar_escritas, reservar_escritas
+from app.api.src.core.response_cache import invalidar_tabelas
 
 
 class StandardHTTPException(Exception):
@@ -41,26 +46,18 @@ class StandardHTTPException(Exception):
             f"--- Resposta completa da API ---\n"
             f"{detailed_response}"
         )
-def _get_headers() -> dict:
-    """Cria os cabeçalhos padrão para a autenticação na API do Supabase."""
-    if not SUPABASE_KEY:
-        raise ValueError("A chave do Supabase não foi definida.")
-    
-    return {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        "Prefer": "return=representation",
-    }
-
-def registrar_nova_venda(venda: Venda) -> Dict[str, Any]:
+async def registrar_nova_venda(venda: Venda) -> Dict[str, Any]:
     """
     Registra uma nova venda na tabela 'Venda' do Supabase.
 
     A função recebe um objeto (presumivelmente um modelo Pydantic 'Venda') 
     e o insere como uma nova linha na tabela.
 
+    Com `VENDA_WRITE_BEHIND` ativo, a cobrança não é gravada aqui: ela (e,
+    com `VENDA_WRITE_BEHIND_ESTOQUE`, a baixa de estoque) é reservada no outbox
+    local antes da venda, liberada para o worker depois que a venda foi gravada
+    e descartada se a venda falhar (ver `core/outbox.py`).
+
     Args:
         venda (Venda): O objeto contendo os dados da venda a serem inseridos.
                        Assume-se que este objeto já tem todos os campos necessários
@@ -74,54 +71,95 @@ def registrar_nova_venda(venda: Venda) -> Dict[str, Any]:
         StandardHTTPException: Lançada em caso de erro na requisição HTTP (status >= 400),
                                erro de conexão ou outro erro inesperado.
     """
-    table_name = "Venda"
     if not venda.valor_unitario:
-        venda.valor_unitario = _obter_ultimo_preco_unitario(venda.categoria_produto)
+        venda.valor_unitario = await _obter_ultimo_preco_unitario(venda.categoria_produto)
     try:
-        # 1. Reutiliza a função para obter os cabeçalhos de autenticação
-        headers = _get_headers()
-        url = f"{SUPABASE_URL}/rest/v1/{table_name}"
-
-        # 2. Converte o objeto 'venda' em um dicionário para o payload JSON.
-        #    A API do Supabase espera uma lista de registros para inserção.
+        # 1. Converte o objeto 'venda' em um dicionário para o payload JSON.
+        #    A inserção recebe uma lista de registros.
         payload = [venda.model_dump(mode="json")]
 
-        
-        response = requests.post(url, headers=headers, json=payload, timeout=15.0)
+        # 2. Gera a cobrança correspondente à venda
         cobranca = criar_cobranca_de_venda(venda)
-        adicionar_cobranca(cobranca)
 
-        # 4. Reutiliza o padrão de tratamento de erros HTTP
-        if response.status_code >= 400:
+        settings = get_settings()
+        if settings.venda_write_behind:
+            # Anotadas antes da venda: uma queda logo depois de gravá-la não perde a cobrança
+            escritas = [(COBRANCA, cobranca.model_dump(mode="json"))]
+            if settings.venda_write_behind_estoque:
+                escritas.append((ESTOQUE, {"categoria": venda.categoria_produto, "quantidade": -venda.qtd_unidades}))
+            reservadas = await reservar_escritas(escritas)
+            try:
+                created_data = await get_repositorios().venda.inserir(payload)
+            except BaseException:
+                await descartar_escritas(reservadas)
+                raise
+            registrar_vendas(created_data)
             try:
-                detail = response.json()
-            except json.JSONDecodeError:
-                detail = {"message": response.text}
-            raise StandardHTTPException(detail=detail, status_code=response.status_code)
-
-        # 5. A API, com o header "Prefer: return=representation", retorna uma lista
-        #    contendo os registros que foram criados.
-        created_data = response.json()
+                await confirmar_escritas(reservadas)
+            except Exception as e:
+                # A venda já foi gravada: a reserva é enviada ao fim de OUTBOX_RESERVA
+                print(f"Alerta: Falha ao liberar as escritas da venda no outbox: {e}")
+            return created_data[0]
+
+        # 3. Insere a venda e, só depois que ela foi gravada, a cobrança
+        #    (uma falha na venda não pode deixar uma cobrança sem venda)
+        created_data = await get_repositorios().venda.inserir(payload)
+        registrar_vendas(created_data)
+        await adicionar_cobranca(cobranca)
         
-        # Retorna o primeiro (e único) registro do resultado
+        # 4. Retorna o primeiro (e único) registro criado
         return created_data[0]
 
-    except requests.exceptions.RequestException as req_err:
-        # Reutiliza o padrão de tratamento de erro de conexão
-        raise StandardHTTPException(detail={"message": f"Erro de conexão ao registrar venda: {req_err}"}, status_code=503)
+    except RepositorioError as e:
+        # Reutiliza o padrão de tratamento de erros HTTP
+        raise StandardHTTPException(detail=e.detail, status_code=e.status_code)
     except Exception as e:
         # Reutiliza o padrão de tratamento de erro genérico
         if isinstance(e, StandardHTTPException):
             raise
         raise StandardHTTPException(detail={"message": f"Erro inesperado ao registrar venda: {e}"}, status_code=500)
+    finally:
+        # A cobrança já invalida 'Cobranca' em adicionar_cobranca
+        invalidar_tabelas("Venda")
+async def registrar_venda_transacional(venda: Venda) -> Dict[str, Any]:
+    """
+    Registra a venda completa com uma única chamada à função 'registrar_venda' do banco.
+
+    A função insere a Venda, insere a Cobranca e baixa o Estoque dentro de uma
+    mesma transação: ou tudo é gravado, ou nada é. Se 'valor_unitario' não for
+    informado, o banco usa o preço atual da categoria.
+
+    Returns:
+        Dict[str, Any]: {"venda": {...}, "cobranca": {...}, "estoque": {...}}.
+
+    Raises:
+        StandardHTTPException: Em caso de erro HTTP, de conexão ou inesperado.
+    """
+    try:
+        resultado = await get_repositorios().venda.registrar_transacional(venda.model_dump(mode="json"))
+        atualizar_estoque_cache([resultado.get("estoque")], venda.categoria_produto)
+        registrar_cobrancas_criadas([resultado.get("cobranca")])
+        registrar_vendas([resultado.get("venda")])
+        return resultado
+
+    except RepositorioError as e:
+        raise StandardHTTPException(detail=e.detail, status_code=e.status_code)
+    except Exception as e:
+        if isinstance(e, StandardHTTPException):
+            raise
+        raise StandardHTTPException(detail={"message": f"Erro inesperado ao registrar venda: {e}"}, status_code=500)
+    finally:
+        invalidar_tabelas("Venda", "Cobranca")
 @router.post(
     "/vender",
     status_code=status.HTTP_201_CREATED,
     summary="Registrar uma Nova Venda",
     description="Cria um novo registro de venda e atualiza o estoque do produto correspondente."
 )
-def registrar_venda(
-    venda_in: Venda
+async def registrar_venda(
+    venda_in: Venda,
+    request: Request,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key", description="Chave única da venda; repetições com a mesma chave não gravam de novo"),
 ):
     """
     Endpoint para registrar uma nova venda.
@@ -131,9 +169,167 @@ def registrar_venda(
     - **unidades**: Quantidade vendida (deve ser maior que 0).
     - **prazo_dias**: Prazo em dias para o pagamento.
     - **valor_unitario**: Preço do produto no momento da venda.
+
+    Com `VENDA_TRANSACIONAL` ativo, toda a venda é gravada em uma única
+    transação no banco (ver `registrar_venda_transacional`).
+
+    Com o cabeçalho `Idempotency-Key`, uma repetição da mesma venda (ex: após
+    um timeout do tablet) recebe a resposta da primeira sem gravar de novo
+    (ver `core/idempotencia.py`).
     """
-    print(venda_in)
-    registrar_nova_venda(venda_in)
+    return await responder_idempotente(request, idempotency_key, lambda: _registrar_venda(venda_in))
+
+
+async def _registrar_venda(venda_in: Venda) -> Optional[Dict[str, Any]]:
+    """Grava a venda, a cobrança e a baixa de estoque de `POST /vender`."""
+    settings = get_settings()
+    if settings.venda_transacional:
+        # Venda, cobrança e baixa de estoque em uma transação, com um único round trip
+        return await registrar_venda_transacional(venda_in)
+    await registrar_nova_venda(venda_in)
+    if settings.venda_write_behind and settings.venda_write_behind_estoque:
+        # A baixa ficou no outbox; a quantidade em cache deixaria de refleti-la
+        estoque_cache.invalidar(venda_in.categoria_produto)
+        return
     req = AtualizarEstoqueRequest(categoria=venda_in.categoria_produto,quantidade=-venda_in.qtd_unidades)
-    adicionar_ao_estoque(req)
+    await adicionar_ao_estoque(req)
+
+
+@router.post(
+    "/vender_lote",
+    response_model=VendaLoteResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Registrar Vendas em Lote",
+    description="Registra várias vendas de uma vez: vendas e cobranças em uma única transação e uma baixa de estoque por categoria."
+)
+async def registrar_vendas_em_lote(
+    vendas_in: List[Venda]
+) -> VendaLoteResponse:
+    """
+    Endpoint para registrar muitas vendas de uma só vez (ex: fechamento do dia).
+
+    - Os preços unitários faltantes são buscados em uma única consulta.
+    - Todas as vendas e as suas cobranças são inseridas em uma única chamada à
+      função 'registrar_vendas_lote' do banco, dentro de uma transação.
+    - As baixas de estoque são somadas por `categoria_produto`, com uma única
+      atualização atômica por categoria.
+
+    A inserção de vendas e cobranças é tudo-ou-nada: se falhar, nenhuma venda
+    nem cobrança do lote é gravada. As baixas de estoque vêm depois, fora dessa
+    transação, e o resultado de cada uma é informado individualmente por item.
+    """
+    if not vendas_in:
+        return VendaLoteResponse(message="Nenhuma venda enviada.", resultados=[])
+
+    # 1. Completa os preços unitários faltantes com uma única consulta
+    sem_preco = sorted({v.categoria_produto for v in vendas_in if not v.valor_unitario})
+    if sem_preco:
+        precos = await _obter_precos_unitarios(sem_preco)
+        for venda in vendas_in:
+            if not venda.valor_unitario:
+                venda.valor_unitario = precos.get(venda.categoria_produto)
+
+    try:
+        # 2. Insere todas as vendas e as suas cobranças em uma única transação
+        payload = [venda.model_dump(mode="json") for venda in vendas_in]
+        criadas = await get_repositorios().venda.registrar_lote(payload)
+        vendas_criadas = criadas["vendas"]
+        registrar_vendas(vendas_criadas)
+        registrar_cobrancas_criadas(criadas["cobrancas"])
+
+    except RepositorioError as e:
+        raise StandardHTTPException(detail=e.detail, status_code=e.status_code)
+    except Exception as e:
+        if isinstance(e, StandardHTTPException):
+            raise
+        raise StandardHTTPException(detail={"message": f"Erro inesperado ao registrar vendas em lote: {e}"}, status_code=500)
+    finally:
+        invalidar_tabelas("Venda", "Cobranca")
+
+    # 3. Soma as unidades vendidas por categoria e faz uma baixa de estoque por categoria
+    unidades_por_categoria: Dict[str, int] = defaultdict(int)
+    for venda in vendas_in:
+        unidades_por_categoria[venda.categoria_produto] += venda.qtd_unidades
+
+    categorias = list(unidades_por_categoria)
+    baixas = await asyncio.gather(
+        *(
+            adicionar_ao_estoque(AtualizarEstoqueRequest(categoria=categoria, quantidade=-unidades_por_categoria[categoria]))
+            for categoria in categorias
+        ),
+        return_exceptions=True,
+    )
+    baixa_por_categoria = dict(zip(categorias, baixas))
+
+    # 4. Monta o resultado de cada item
+    resultados = []
+    for indice, venda in enumerate(vendas_in):
+        criada = vendas_criadas[indice] if indice < len(vendas_criadas) else {}
+        baixa = baixa_por_categoria[venda.categoria_produto]
+        resultado = VendaLoteItemResultado(
+            indice=indice,
+            categoria_produto=venda.categoria_produto,
+            venda_id=criada.get("id"),
+        )
+        if isinstance(baixa, Exception):
+            resultado.erro = str(getattr(baixa, "detail", baixa))
+        else:
+            linhas = baixa.get("data") or []
+            resultado.estoque_atualizado = True
+            resultado.estoque_restante = linhas[0].get("quantidade") if linhas else None
+        resultados.append(resultado)
+
+    return VendaLoteResponse(
+        message=f"{len(vendas_in)} venda(s) registrada(s) com sucesso.",
+        resultados=resultados,
+    )
+
+
+# Intervalo máximo de `GET /vendas/resumo`, em dias
+LIMITE_DIAS_RESUMO = 3660
+
+
+@router.get(
+    "/resumo",
+    response_model=ResumoVendasResponse,
+    summary="Resumo de Vendas por Categoria e Período",
+    description="Unidades e receita por categoria de produto, por dia ou por semana, a partir de totais diários mantidos em memória."
+)
+async def obter_resumo_vendas(
+    de: Optional[date] = Query(default=None, description="Data inicial (YYYY-MM-DD, inclusiva); padrão: 29 dias antes de 'ate'"),
+    ate: Optional[date] = Query(default=None, description="Data final (YYYY-MM-DD, inclusiva); padrão: hoje (UTC)"),
+    categoria: Optional[str] = Query(default=None, description="Limita o resumo a uma categoria de produto"),
+    agrupamento: str = Query(default=DIA, pattern=f"^({DIA}|{SEMANA})$", description="'dia' ou 'semana' (iniciada na segunda-feira)"),
+) -> ResumoVendasResponse:
+    """
+    Endpoint para painéis: quantas unidades e quanto de receita cada categoria
+    vendeu por dia (ou semana) no intervalo, com os dias contados em UTC.
+
+    A resposta vem dos totais por (categoria, dia) de `core/resumo_vendas.py`,
+    atualizados a cada venda, reconstruídos a partir do histórico na
+    inicialização e completados periodicamente com as vendas novas, então custa proporcional ao número de dias do intervalo e
+    não ao número de vendas.
+    """
+    ate = ate or datetime.now(timezone.utc).date()
+    de = de or ate - timedelta(days=29)
+    if de > ate:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'de' deve ser anterior ou igual a 'ate'.")
+    if (ate - de).days >= LIMITE_DIAS_RESUMO:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"O intervalo deve ter no máximo {LIMITE_DIAS_RESUMO} dias."
+        )
+
+    try:
+        itens = await consultar_resumo(de, ate, categoria, agrupamento)
+    except RepositorioError as e:
+        raise StandardHTTPException(detail=e.detail, status_code=e.status_code)
 
+    return ResumoVendasResponse(
+        de=de,
+        ate=ate,
+        agrupamento=agrupamento,
+        itens=itens,
+        total_unidades=sum(item["unidades"] for item in itens),
+        total_receita=round(sum(item["receita"] for item in itens), 2),
+    )
@@ -1,6 +1,6 @@
 # models.py (ou no mesmo arquivo da rota)
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional
 from datetime import datetime,date
 
@@ -90,7 +90,7 @@ class FinancialSummaryResponse(BaseModel):
     pendentes: StatusSummary
     vencidas: StatusSummary
     total_a_receber: float
-    cobrancas_nao_pagas: List[NonPaidBill]
+    cobrancas_nao_pagas: Optional[List[NonPaidBill]] = None  # Omitida no modo apenas-resumo (detalhes=false)
 class PagarCobrancaInput(BaseModel):
     """Schema para os dados de entrada da rota de pagamento."""
     cliente: str = Field(..., description="Nome do cliente para identificar a cobrança.")
@@ -110,4 +110,65 @@ class CobrancaData(BaseModel):
 class PagarCobrancaResponse(BaseModel):
     """Schema para a resposta de sucesso da rota."""
     message: str
-    data: List[CobrancaData]
\ No newline at end of file
+    data: List[CobrancaData]
+
+# --- Schemas do pagamento em lote ---
+
+class PagarLoteItem(BaseModel):
+    """
+    Cobrança a ser paga em `POST /pagar_lote`: pelo `id` ou pela mesma chave de
+    `/pagar_cobranca` (cliente, data de vencimento e valor).
+    """
+    id: Optional[int] = Field(default=None, description="ID da cobrança.")
+    cliente: Optional[str] = Field(default=None, description="Nome do cliente (sem 'id').")
+    vencimento: Optional[date] = Field(default=None, description="Data de vencimento, YYYY-MM-DD (sem 'id').")
+    valor: Optional[float] = Field(default=None, description="Valor exato da cobrança (sem 'id').")
+
+    @model_validator(mode="after")
+    def _id_ou_chave(self):
+        if self.id is None and None in (self.cliente, self.vencimento, self.valor):
+            raise ValueError("Informe 'id' ou 'cliente', 'vencimento' e 'valor'.")
+        return self
+
+class PagarLoteItemResultado(BaseModel):
+    """Resultado de um item de `POST /pagar_lote`."""
+    indice: int = Field(..., description="Posição do item na lista enviada")
+    item: PagarLoteItem
+    ids: List[int] = Field(default_factory=list, description="IDs das cobranças marcadas como pagas")
+
+class PagarLoteResponse(BaseModel):
+    """Resposta da rota POST /pagar_lote."""
+    message: str
+    encontradas: List[PagarLoteItemResultado]
+    nao_encontradas: List[PagarLoteItemResultado]
+    data: List[CobrancaData]
+
+# --- Schemas da rota GET /analytics ---
+
+class FaixaAging(BaseModel):
+    """Cobranças em aberto em uma faixa de atraso."""
+    faixa: str = Field(..., description="'a_vencer', '0-30', '31-60', '61-90' ou '90+' (dias de atraso).")
+    quantidade: int = Field(..., description="Número de cobranças na faixa.")
+    valor_total: float = Field(..., description="Soma dos valores das cobranças na faixa.")
+
+class ExposicaoCliente(BaseModel):
+    """Valor em aberto de um cliente."""
+    cliente: str
+    quantidade: int = Field(..., description="Número de cobranças em aberto do cliente.")
+    em_aberto: float = Field(..., description="Soma das cobranças em aberto (a vencer e vencidas).")
+    vencido: float = Field(..., description="Soma das cobranças vencidas.")
+    maior_atraso_dias: int = Field(..., description="Atraso, em dias, da cobrança vencida mais antiga (0 se nenhuma).")
+
+class IndicadorDSO(BaseModel):
+    """Days sales outstanding: em quantos dias de vendas a prazo está o valor em aberto."""
+    periodo_dias: int = Field(..., description="Período de vendas considerado, em dias.")
+    vendas_no_periodo: float = Field(..., description="Soma das cobranças com data de venda no período.")
+    dias: Optional[float] = Field(..., description="Valor em aberto / vendas no período x dias do período (nulo sem vendas).")
+
+class CobrancaAnalyticsResponse(BaseModel):
+    """Resposta da rota GET /analytics."""
+    data_referencia: datetime
+    total_em_aberto: float
+    aging: List[FaixaAging]
+    clientes: List[ExposicaoCliente]
+    dso: IndicadorDSO
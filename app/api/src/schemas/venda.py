@@ -1,8 +1,8 @@
 # Venda schema
 from pydantic import BaseModel, Field, computed_field
-from datetime import datetime
+from datetime import date, datetime
 from .msg import StatusPagamento
-from typing import Optional 
+from typing import List, Optional 
 # --- Schemas de Venda ---
 
 # Schema base com os campos que vêm do request de criação
@@ -54,4 +54,50 @@ class Venda(BaseModel):
 
     # Configuração para permitir a criação do modelo a partir de um objeto de banco de dados
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# --- Schemas do histórico de vendas ---
+
+class VendaHistorico(Venda):
+    """Venda lida do banco, incluindo a chave usada na paginação por cursor."""
+    id: int
+    created_at: Optional[datetime] = None
+
+class HistoricoPaginaResponse(BaseModel):
+    """Página do histórico de vendas paginado por cursor (keyset)."""
+    itens: List[VendaHistorico]
+    proximo_cursor: Optional[str] = Field(default=None, description="Cursor da próxima página; ausente na última página")
+
+# --- Schemas da venda em lote ---
+
+class VendaLoteItemResultado(BaseModel):
+    """Resultado de um item da rota POST /vendas/vender_lote."""
+    indice: int = Field(..., description="Posição do item na lista enviada")
+    categoria_produto: str
+    venda_id: Optional[int] = Field(default=None, description="ID da venda criada")
+    estoque_atualizado: bool = Field(default=False, description="Se o estoque da categoria foi baixado")
+    estoque_restante: Optional[int] = Field(default=None, description="Quantidade em estoque após a baixa")
+    erro: Optional[str] = Field(default=None, description="Mensagem de erro da baixa de estoque, se houver")
+
+class VendaLoteResponse(BaseModel):
+    """Resposta da rota POST /vendas/vender_lote."""
+    message: str
+    resultados: List[VendaLoteItemResultado]
+
+# --- Schemas do resumo de vendas ---
+
+class ResumoVendasItem(BaseModel):
+    """Totais de uma categoria em um período (dia ou semana)."""
+    categoria: str
+    periodo: date = Field(..., description="O dia, ou a segunda-feira que inicia a semana")
+    unidades: int
+    receita: float = Field(..., description="Soma de 'valor_total' das vendas do período")
+
+class ResumoVendasResponse(BaseModel):
+    """Resposta da rota GET /vendas/resumo."""
+    de: date
+    ate: date
+    agrupamento: str
+    itens: List[ResumoVendasItem]
+    total_unidades: int
+    total_receita: float
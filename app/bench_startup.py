@@ -0,0 +1,82 @@
+"""
+Mede o tempo de importação de `app.main` (a maior parte da partida a frio de
+um container) em interpretadores novos, um por rodada.
+
+Uso:
+    python -m app.bench_startup --rodadas 10 --top 15
+
+Para cada rodada, um processo Python novo importa `app.main` com
+`-X importtime`; o script mostra o tempo total (mediana, mínimo e máximo) e os
+módulos que mais pesaram na importação (tempo acumulado, mediana das rodadas).
+Nenhuma conexão é aberta e nenhuma variável de ambiente é exigida: a
+configuração só é carregada quando a aplicação inicia.
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+# Linha do -X importtime: "import time: self [us] | cumulative | imported package"
+_LINHA_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def medir_importacao(modulo: str) -> Tuple[float, Dict[str, int]]:
+    """
+    Importa `modulo` em um processo novo.
+
+    Returns:
+        O tempo total em ms e o tempo acumulado (em µs) de cada módulo importado
+        diretamente por `modulo`.
+    """
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0
+    filhos: Dict[str, int] = {}
+    acumulados: Dict[str, int] = {}
+    # Na saída, os módulos importados aparecem antes de quem os importou, com 2 espaços a mais de recuo
+    for linha in resultado.stderr.splitlines():
+        casamento = _LINHA_IMPORTTIME.match(linha)
+        if casamento is None:
+            continue
+        _, acumulado, recuo, nome = casamento.groups()
+        if len(recuo) == 3:
+            filhos[nome] = int(acumulado)
+        elif len(recuo) == 1:
+            if nome == modulo:
+                total, acumulados = int(acumulado), filhos
+            filhos = {}
+    return total / 1000, acumulados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tempo de importação de app.main em processos novos.")
+    parser.add_argument("--modulo", default="app.main")
+    parser.add_argument("--rodadas", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15, help="Quantos módulos mais lentos listar")
+    args = parser.parse_args()
+
+    totais: List[float] = []
+    por_modulo: Dict[str, List[int]] = defaultdict(list)
+    for _ in range(args.rodadas):
+        total, acumulados = medir_importacao(args.modulo)
+        totais.append(total)
+        for nome, microssegundos in acumulados.items():
+            por_modulo[nome].append(microssegundos)
+
+    print(f"import {args.modulo}: mediana {statistics.median(totais):.1f} ms "
+          f"(mín {min(totais):.1f}, máx {max(totais):.1f}, {args.rodadas} rodadas)")
+    print(f"\nImportações diretas de {args.modulo} mais lentas (ms acumulados, mediana):")
+    ranking = sorted(por_modulo.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for nome, valores in ranking[:args.top]:
+        print(f"  {statistics.median(valores) / 1000:8.1f}  {nome}")
+
+
+if __name__ == "__main__":
+    main()
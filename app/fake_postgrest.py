@@ -0,0 +1,501 @@
+"""
+Servidor local que imita o subconjunto do PostgREST (Supabase) usado pela API,
+para testes de carga sem tocar no projeto real.
+
+Uso:
+    python -m app.fake_postgrest --porta 54321 --latencia lognormal:40,0.6 --taxa-erro 0.02
+
+e, em outro terminal, a API apontando para ele:
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_KEY=fake poetry run uvicorn app.main:app
+
+O que é suportado, nas tabelas 'Estoque', 'Venda', 'Cobranca' e 'Cliente':
+- GET com filtros `eq`, `neq`, `lt`, `lte`, `gt`, `gte`, `in`, `is` e os grupos
+  `or=(...)` / `and(...)`, além de `select`, `order`, `limit`/`offset` e o
+  cabeçalho `Range` (a resposta traz `Content-Range`);
+- POST de um objeto ou de uma lista, com `on_conflict` +
+  `Prefer: resolution=merge-duplicates` (UPSERT) ou
+  `Prefer: resolution=ignore-duplicates` (linhas repetidas ignoradas);
+- PATCH com filtros;
+- `Prefer: return=representation` (sem ele, a resposta vem vazia);
+- as funções `rpc/incrementar_estoque`, `rpc/incrementar_estoque_outbox`,
+  `rpc/registrar_venda`, `rpc/registrar_vendas_lote` e `rpc/resumo_cobrancas`.
+
+Injeção de falhas (também alterável em execução via `POST /_fake/config`):
+- `latencia`: distribuição do atraso de cada requisição, em ms:
+  `fixa:50`, `uniforme:20,80`, `normal:50,15` ou `lognormal:40,0.6`
+  (mediana em ms e desvio do logaritmo);
+- `taxa_erro`: fração das requisições que falham com `status_erro` (padrão 503).
+
+`GET /_fake/stats` mostra as contagens de requisições e erros injetados;
+`POST /_fake/reset` volta os dados ao estado inicial.
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+# --- Configuração padrão (variáveis de ambiente ou argumentos da linha de comando) ---
+FAKE_LATENCIA = os.environ.get("FAKE_LATENCIA", "fixa:0")
+FAKE_TAXA_ERRO = float(os.environ.get("FAKE_TAXA_ERRO", "0"))
+FAKE_STATUS_ERRO = int(os.environ.get("FAKE_STATUS_ERRO", "503"))
+
+TABELAS = ("Estoque", "Venda", "Cobranca", "Cliente")
+# Colunas com restrição de unicidade (além de 'id')
+UNICAS = {"Estoque": ("categoria",), "Cobranca": ("chave_outbox",)}
+PARAMETROS_RESERVADOS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+app = FastAPI(title="Fake PostgREST", description="Imitação local do PostgREST para testes de carga.")
+
+
+# --- Estado em memória ---
+
+class Configuracao(BaseModel):
+    latencia: str = FAKE_LATENCIA
+    taxa_erro: float = FAKE_TAXA_ERRO
+    status_erro: int = FAKE_STATUS_ERRO
+
+
+config = Configuracao()
+dados: Dict[str, List[Dict[str, Any]]] = {}
+proximo_id: Dict[str, int] = {}
+# Chaves já aplicadas por 'incrementar_estoque_outbox' (tabela 'OutboxAplicado')
+outbox_aplicado: set = set()
+estatisticas: Dict[str, int] = {"requisicoes": 0, "erros_injetados": 0}
+
+
+def _agora() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def resetar_dados() -> None:
+    """Recria as tabelas com algumas linhas de exemplo."""
+    dados.clear()
+    proximo_id.clear()
+    outbox_aplicado.clear()
+    for tabela in TABELAS:
+        dados[tabela] = []
+        proximo_id[tabela] = 1
+    for categoria, quantidade, preco in (("Brownie", 100, 8.0), ("Pizza", 50, 12.5), ("Bolo", 20, 30.0)):
+        _inserir("Estoque", {"categoria": categoria, "quantidade": quantidade, "preco_unitario": preco})
+    for nome in ("Ana", "Bruno", "Carla"):
+        _inserir("Cliente", {"name": nome, "status": True})
+
+
+def _inserir(tabela: str, linha: Dict[str, Any]) -> Dict[str, Any]:
+    nova = {"id": proximo_id[tabela], "created_at": _agora(), **linha}
+    proximo_id[tabela] += 1
+    dados[tabela].append(nova)
+    return nova
+
+
+# --- Erros no formato do PostgREST ---
+
+def _erro(status_code: int, mensagem: str, codigo: str = "PGRST000") -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"code": codigo, "details": None, "hint": None, "message": mensagem},
+    )
+
+
+class ErroPostgrest(Exception):
+    def __init__(self, status_code: int, mensagem: str, codigo: str = "PGRST100"):
+        self.status_code = status_code
+        self.mensagem = mensagem
+        self.codigo = codigo
+
+
+@app.exception_handler(ErroPostgrest)
+async def _tratar_erro(_request: Request, e: ErroPostgrest):
+    return _erro(e.status_code, e.mensagem, e.codigo)
+
+
+# --- Latência e falhas injetadas ---
+
+def sortear_latencia(especificacao: str) -> float:
+    """Sorteia um atraso (em segundos) segundo a especificação `tipo:parametros`."""
+    tipo, _, parametros = especificacao.partition(":")
+    valores = [float(v) for v in parametros.split(",") if v]
+    if tipo == "fixa":
+        ms = valores[0] if valores else 0.0
+    elif tipo == "uniforme":
+        ms = random.uniform(valores[0], valores[1])
+    elif tipo == "normal":
+        ms = random.gauss(valores[0], valores[1])
+    elif tipo == "lognormal":
+        ms = random.lognormvariate(math.log(valores[0]), valores[1])
+    else:
+        raise ValueError(f"Distribuição de latência desconhecida: '{tipo}'")
+    return max(ms, 0.0) / 1000
+
+
+@app.middleware("http")
+async def _injetar_falhas(request: Request, call_next):
+    if request.url.path.startswith("/_fake"):
+        return await call_next(request)
+
+    estatisticas["requisicoes"] += 1
+    atraso = sortear_latencia(config.latencia)
+    if atraso:
+        await asyncio.sleep(atraso)
+    if config.taxa_erro and random.random() < config.taxa_erro:
+        estatisticas["erros_injetados"] += 1
+        return _erro(config.status_erro, "Falha injetada pelo fake PostgREST.", "FAKE")
+    return await call_next(request)
+
+
+# --- Filtros ---
+
+def _dividir(texto: str) -> List[str]:
+    """Divide `texto` nas vírgulas de nível zero (fora de parênteses e aspas)."""
+    partes, atual, nivel, aspas, escapado = [], [], 0, False, False
+    for caractere in texto:
+        if escapado:
+            escapado = False
+        elif aspas and caractere == "\\":
+            escapado = True
+        elif caractere == '"':
+            aspas = not aspas
+        elif not aspas and caractere == "(":
+            nivel += 1
+        elif not aspas and caractere == ")":
+            nivel -= 1
+        elif not aspas and nivel == 0 and caractere == ",":
+            partes.append("".join(atual))
+            atual = []
+            continue
+        atual.append(caractere)
+    if atual:
+        partes.append("".join(atual))
+    return partes
+
+
+def _sem_aspas(valor: str) -> str:
+    """Remove as aspas de um valor e desfaz os escapes (`\\"`, `\\\\`) de dentro delas."""
+    if len(valor) >= 2 and valor[0] == valor[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", valor[1:-1])
+    return valor
+
+
+def _como_data(valor: Any) -> Optional[datetime]:
+    if not isinstance(valor, str) or len(valor) < 10 or valor[4:5] != "-":
+        return None
+    try:
+        data = datetime.fromisoformat(valor.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return data if data.tzinfo else data.replace(tzinfo=timezone.utc)
+
+
+def _coagir(valor_linha: Any, texto: str) -> Tuple[Any, Any]:
+    """Converte o valor do filtro (texto) para o tipo do valor armazenado."""
+    if isinstance(valor_linha, bool):
+        return valor_linha, texto.lower() == "true"
+    if isinstance(valor_linha, (int, float)):
+        return valor_linha, float(texto)
+    data_linha, data_filtro = _como_data(valor_linha), _como_data(texto)
+    if data_linha is not None and data_filtro is not None:
+        return data_linha, data_filtro
+    return valor_linha, texto
+
+
+OPERADORES = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+}
+
+
+def _avaliar(linha: Dict[str, Any], coluna: str, expressao: str) -> bool:
+    """Avalia `coluna=op.valor` (ex: `quantidade=gte.10`) para uma linha."""
+    negar = expressao.startswith("not.")
+    if negar:
+        expressao = expressao[4:]
+    operador, _, texto = expressao.partition(".")
+    valor = linha.get(coluna)
+
+    if operador == "is":
+        resultado = valor is None if texto == "null" else valor is (texto == "true")
+    elif operador == "in":
+        opcoes = [_sem_aspas(item) for item in _dividir(texto.strip("()"))]
+        resultado = valor is not None and any(a == b for a, b in (_coagir(valor, item) for item in opcoes))
+    elif operador in OPERADORES:
+        if valor is None:
+            resultado = False
+        else:
+            try:
+                a, b = _coagir(valor, _sem_aspas(texto))
+                resultado = OPERADORES[operador](a, b)
+            except (TypeError, ValueError):
+                raise ErroPostgrest(400, f"Valor inválido para o filtro '{coluna}={expressao}'.", "22P02")
+    else:
+        raise ErroPostgrest(400, f"Operador não suportado: '{operador}'.")
+    return not resultado if negar else resultado
+
+
+def _avaliar_grupo(linha: Dict[str, Any], logico: str, corpo: str) -> bool:
+    """Avalia `or=(...)` / `and(...)`, com grupos aninhados."""
+    resultados = []
+    for termo in _dividir(corpo.strip()[1:-1]):
+        termo = termo.strip()
+        if termo.startswith(("and(", "or(")):
+            interno, _, resto = termo.partition("(")
+            resultados.append(_avaliar_grupo(linha, interno, "(" + resto))
+        else:
+            coluna, _, expressao = termo.partition(".")
+            resultados.append(_avaliar(linha, coluna, expressao))
+    return any(resultados) if logico == "or" else all(resultados)
+
+
+def _filtrar(linhas: List[Dict[str, Any]], request: Request) -> List[Dict[str, Any]]:
+    filtros = [(k, v) for k, v in request.query_params.multi_items() if k not in PARAMETROS_RESERVADOS]
+
+    def _atende(linha):
+        for chave, valor in filtros:
+            if chave in ("or", "and"):
+                if not _avaliar_grupo(linha, chave, valor):
+                    return False
+            elif not _avaliar(linha, chave, valor):
+                return False
+        return True
+
+    return [linha for linha in linhas if _atende(linha)]
+
+
+def _ordenar(linhas: List[Dict[str, Any]], ordem: Optional[str]) -> List[Dict[str, Any]]:
+    if not ordem:
+        return linhas
+    # Ordenações estáveis, da última chave para a primeira
+    for termo in reversed(ordem.split(",")):
+        coluna, _, direcao = termo.partition(".")
+        decrescente = direcao.startswith("desc")
+
+        def _chave(linha, coluna=coluna):
+            valor = linha.get(coluna)
+            data = _como_data(valor)
+            return (valor is None, data if data is not None else valor)
+
+        linhas = sorted(linhas, key=_chave, reverse=decrescente)
+    return linhas
+
+
+def _selecionar(linhas: List[Dict[str, Any]], select: Optional[str]) -> List[Dict[str, Any]]:
+    if not select or select == "*":
+        return linhas
+    colunas = [coluna.strip() for coluna in select.split(",")]
+    return [{coluna: linha.get(coluna) for coluna in colunas} for linha in linhas]
+
+
+def _prefer(request: Request) -> set:
+    return {item.strip() for item in request.headers.get("prefer", "").split(",") if item.strip()}
+
+
+def _tabela(tabela: str) -> List[Dict[str, Any]]:
+    if tabela not in dados:
+        raise ErroPostgrest(404, f'relation "public.{tabela}" does not exist', "42P01")
+    return dados[tabela]
+
+
+def _representacao(request: Request, linhas: List[Dict[str, Any]], status_code: int) -> Response:
+    if "return=representation" in _prefer(request):
+        return JSONResponse(status_code=status_code, content=_selecionar(linhas, request.query_params.get("select")))
+    return Response(status_code=status_code)
+
+
+# --- Funções do banco (rpc) ---
+
+def _incrementar_estoque(categoria: str, quantidade: int, observacao: Optional[str] = None, criar: bool = True):
+    linhas = [linha for linha in dados["Estoque"] if linha["categoria"] == categoria]
+    if not linhas:
+        if not criar:
+            return []
+        return [_inserir("Estoque", {"categoria": categoria, "quantidade": quantidade, "preco_unitario": 0, "observacao": observacao})]
+    linha = linhas[0]
+    linha["quantidade"] += quantidade
+    if observacao is not None:
+        linha["observacao"] = observacao
+    return [linha]
+
+
+def _incrementar_estoque_outbox(categoria: str, itens: List[Dict[str, Any]], observacao: Optional[str] = None):
+    novos = [item for item in itens if item["chave"] not in outbox_aplicado]
+    if not novos:
+        return [linha for linha in dados["Estoque"] if linha["categoria"] == categoria]
+    outbox_aplicado.update(item["chave"] for item in novos)
+    return _incrementar_estoque(categoria, sum(item["quantidade"] for item in novos), observacao)
+
+
+def _registrar_venda(venda: Dict[str, Any]) -> Dict[str, Any]:
+    if venda.get("valor_unitario") is None:
+        estoque = [linha for linha in dados["Estoque"] if linha["categoria"] == venda["categoria_produto"]]
+        venda["valor_unitario"] = estoque[0]["preco_unitario"] if estoque else None
+    nova = _inserir("Venda", venda)
+    cobranca = _inserir_cobranca_da_venda(nova)
+    quantidade = -nova["qtd_unidades"]
+    estoque = _incrementar_estoque(nova["categoria_produto"], quantidade, f"Adicao de {quantidade} unidade(s) ao estoque")
+    return {"venda": nova, "cobranca": cobranca, "estoque": estoque[0]}
+
+
+def _inserir_cobranca_da_venda(venda: Dict[str, Any]) -> Dict[str, Any]:
+    return _inserir("Cobranca", {
+        "cliente": venda["cliente"],
+        "vencimento": venda["data_vencimento"],
+        "valor": venda["valor_total"],
+        "status_pagamento": venda["status_pagamento"],
+        "data_venda": venda["data_venda"],
+    })
+
+
+def _registrar_vendas_lote(vendas: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # Sem await entre as inserções: nenhuma outra requisição vê o lote pela metade
+    novas = [_inserir("Venda", dict(venda)) for venda in vendas]
+    return {"vendas": novas, "cobrancas": [_inserir_cobranca_da_venda(nova) for nova in novas]}
+
+
+def _resumo_cobrancas() -> Dict[str, Any]:
+    agora = datetime.now(timezone.utc)
+    resumo = {"pendentes": {"quantidade": 0, "valor_total": 0.0}, "vencidas": {"quantidade": 0, "valor_total": 0.0}}
+    for cobranca in dados["Cobranca"]:
+        if cobranca.get("status_pagamento"):
+            continue
+        grupo = "pendentes" if _como_data(cobranca["vencimento"]) > agora else "vencidas"
+        resumo[grupo]["quantidade"] += 1
+        resumo[grupo]["valor_total"] += cobranca["valor"]
+    return resumo
+
+
+@app.post("/rest/v1/rpc/{funcao}")
+async def rpc(funcao: str, request: Request):
+    corpo = await request.json() if await request.body() else {}
+    if funcao == "incrementar_estoque":
+        return _incrementar_estoque(
+            corpo["p_categoria"], corpo["p_quantidade"], corpo.get("p_observacao"), corpo.get("p_criar", True)
+        )
+    if funcao == "incrementar_estoque_outbox":
+        return _incrementar_estoque_outbox(corpo["p_categoria"], corpo["p_itens"], corpo.get("p_observacao"))
+    if funcao == "registrar_venda":
+        return _registrar_venda(dict(corpo["p_venda"]))
+    if funcao == "registrar_vendas_lote":
+        return _registrar_vendas_lote(corpo["p_vendas"])
+    if funcao == "resumo_cobrancas":
+        return _resumo_cobrancas()
+    raise ErroPostgrest(404, f"Could not find the function public.{funcao}", "PGRST202")
+
+
+# --- Tabelas ---
+
+@app.get("/rest/v1/{tabela}")
+async def consultar(tabela: str, request: Request):
+    params = request.query_params
+    linhas = _ordenar(_filtrar(_tabela(tabela), request), params.get("order"))
+    total = len(linhas)
+
+    inicio = int(params.get("offset", 0))
+    fim = inicio + int(params["limit"]) if "limit" in params else None
+    intervalo = request.headers.get("range")
+    if intervalo:
+        primeiro, _, ultimo = intervalo.partition("-")
+        inicio = int(primeiro)
+        fim = int(ultimo) + 1 if ultimo else None
+    pagina = linhas[inicio:fim]
+
+    contagem = str(total) if "count=exact" in _prefer(request) else "*"
+    content_range = f"{inicio}-{inicio + len(pagina) - 1}/{contagem}" if pagina else f"*/{contagem}"
+    status_code = 206 if intervalo and fim is not None and fim < total else 200
+    return JSONResponse(
+        status_code=status_code,
+        content=_selecionar(pagina, params.get("select")),
+        headers={"Content-Range": content_range},
+    )
+
+
+@app.post("/rest/v1/{tabela}")
+async def inserir(tabela: str, request: Request):
+    linhas = _tabela(tabela)
+    corpo = await request.json()
+    registros = corpo if isinstance(corpo, list) else [corpo]
+    on_conflict = request.query_params.get("on_conflict")
+    mesclar = "resolution=merge-duplicates" in _prefer(request)
+    ignorar = "resolution=ignore-duplicates" in _prefer(request)
+
+    resultado = []
+    for registro in registros:
+        chaves = [on_conflict] if on_conflict else list(UNICAS.get(tabela, ()))
+        existente = next(
+            (
+                linha
+                for linha in linhas
+                for chave in chaves
+                if registro.get(chave) is not None and linha.get(chave) == registro[chave]
+            ),
+            None,
+        )
+        if existente is not None:
+            if on_conflict and ignorar:
+                continue
+            if not (on_conflict and mesclar):
+                raise ErroPostgrest(409, f'duplicate key value violates unique constraint "{tabela}_{chaves[0]}_key"', "23505")
+            existente.update(registro)
+            resultado.append(existente)
+        else:
+            resultado.append(_inserir(tabela, registro))
+    return _representacao(request, resultado, 201)
+
+
+@app.patch("/rest/v1/{tabela}")
+async def atualizar(tabela: str, request: Request):
+    alteracoes = await request.json()
+    linhas = _filtrar(_tabela(tabela), request)
+    for linha in linhas:
+        linha.update(alteracoes)
+    return _representacao(request, linhas, 200)
+
+
+# --- Controle do fake ---
+
+@app.get("/_fake/stats")
+async def obter_estatisticas():
+    return {**estatisticas, "config": config.model_dump(), "linhas": {t: len(l) for t, l in dados.items()}}
+
+
+@app.post("/_fake/config")
+async def alterar_configuracao(nova: Configuracao):
+    sortear_latencia(nova.latencia)  # valida a especificação
+    config.latencia, config.taxa_erro, config.status_erro = nova.latencia, nova.taxa_erro, nova.status_erro
+    return config
+
+
+@app.post("/_fake/reset")
+async def resetar():
+    resetar_dados()
+    estatisticas.update(requisicoes=0, erros_injetados=0)
+    return {"message": "Dados do fake PostgREST reiniciados."}
+
+
+resetar_dados()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake PostgREST para testes de carga.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=54321)
+    parser.add_argument("--latencia", default=config.latencia, help="fixa:50 | uniforme:20,80 | normal:50,15 | lognormal:40,0.6")
+    parser.add_argument("--taxa-erro", type=float, default=config.taxa_erro, help="Fração das requisições que falham (0 a 1)")
+    parser.add_argument("--status-erro", type=int, default=config.status_erro, help="Status HTTP das falhas injetadas")
+    args = parser.parse_args()
+
+    sortear_latencia(args.latencia)
+    config.latencia, config.taxa_erro, config.status_erro = args.latencia, args.taxa_erro, args.status_erro
+    uvicorn.run(app, host=args.host, port=args.porta)
@@ -1,33 +1,106 @@
-from fastapi import APIRouter, FastAPI # Import FastAPI
+import math
+import time
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, Request # Import FastAPI
+from fastapi.responses import JSONResponse
+from app.api.src.core.config import get_settings
+from app.api.src.core.outbox import iniciar_outbox, parar_outbox
+from app.api.src.core.recebiveis import iniciar_recebiveis, parar_recebiveis
+from app.api.src.core.resumo_vendas import iniciar_resumo_vendas, parar_resumo_vendas
+from app.api.src.core.metrics import REQUEST_LATENCY, responder_metricas, rota_da_requisicao
+from app.api.src.core.resiliencia import circuito_supabase
+from app.api.src.core.server_timing import iniciar_coleta, montar_cabecalho
+from app.api.src.db.session import close_engine, close_supabase
 # NOTE: Adjust the import path for your endpoints based on your actual file structure
 from app.api.src.routes.atualizar_estoque import router as atualizar_estoque_router
-from app.api.src.routes.estoque_atual import router as produtos_router
 from app.api.src.routes.vender import router as vendas_router
 from app.api.src.routes.historico import router as historico_router
 from app.api.src.routes.estoque_atual import router as estoque_atual_router
 from app.api.src.routes.cobranca import router as cobranca_router
 from app.api.src.routes.clientes import router as clientes_router
+from app.api.src.routes import atualizar_estoque, estoque_atual, historico, vender
 # 1. Create the top-level API router for v1
 api_router = APIRouter()
 
 # 2. Include the endpoint routers
 api_router.include_router(atualizar_estoque_router, prefix="/estoque", tags=["Estoque"])
-api_router.include_router(produtos_router, prefix="/produtos", tags=["Produtos"])
+api_router.include_router(estoque_atual_router, prefix="/produtos", tags=["Produtos"])
 api_router.include_router(vendas_router, prefix="/vendas", tags=["Vendas"])
 api_router.include_router(historico_router, prefix="/historico", tags=["Histórico de Vendas"])
 api_router.include_router(estoque_atual_router, prefix="/estoque", tags=["Estoque"])
 api_router.include_router(cobranca_router,prefix='/cobranca',tags=['Cobrança'])
 api_router.include_router(clientes_router,prefix='/clientes',tags=['Clientes'])
-# 3. Create the main FastAPI application instance
+# 3. Run the background tasks while the application is up (outbox worker for
+#    write-behind sales, loading of the receivables totals and of the sales
+#    rollups), then close the shared connection pools (Supabase REST and SQL)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load (and validate) the settings once, before starting the background tasks
+    get_settings()
+    iniciar_outbox()
+    iniciar_recebiveis()
+    iniciar_resumo_vendas()
+    yield
+    await parar_resumo_vendas()
+    await parar_recebiveis()
+    await parar_outbox()
+    await close_supabase()
+    close_engine()
+
+# 4. Create the main FastAPI application instance
 app = FastAPI(
     title="Brownie API",
     version="1.0.0",
-    description="API for managing Bonobrownie sales and inventory."
+    description="API for managing Bonobrownie sales and inventory.",
+    lifespan=lifespan
 )
 
-# 4. Include the v1 router into the main application, usually with a prefix
+# 5. Include the v1 router into the main application, usually with a prefix
 app.include_router(api_router, prefix="/api/v1") 
 
+# 6. Record the latency of every request, per route template and status code
+@app.middleware("http")
+async def medir_latencia(request: Request, call_next):
+    inicio = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        REQUEST_LATENCY.labels(
+            request.method, rota_da_requisicao(request), str(status_code)
+        ).observe(time.perf_counter() - inicio)
+
+# 7. Break out every upstream call of the request in a Server-Timing header
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    if not get_settings().server_timing:
+        return await call_next(request)
+    chamadas = iniciar_coleta()
+    response = await call_next(request)
+    response.headers["Server-Timing"] = montar_cabecalho(chamadas)
+    return response
+
+# 8. Expose the metrics in the Prometheus text format
+app.add_api_route("/metrics", responder_metricas, methods=["GET"], include_in_schema=False)
+
+# 9. While the Supabase circuit is open, tell clients when to retry a 503
+@app.middleware("http")
+async def retry_after(request: Request, call_next):
+    response = await call_next(request)
+    espera = circuito_supabase.segundos_para_reabrir()
+    if response.status_code == 503 and espera > 0:
+        response.headers["Retry-After"] = str(math.ceil(espera))
+    return response
+
+# 10. Answer each router's StandardHTTPException with its own status code
+async def responder_standard_http_exception(request: Request, exc):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+for modulo in (atualizar_estoque, estoque_atual, historico, vender):
+    app.add_exception_handler(modulo.StandardHTTPException, responder_standard_http_exception)
+
 # Optional: Add a root endpoint for health check/discovery
 @app.get("/")
 def read_root():
@@ -0,0 +1,39 @@
+-- Incremento atômico de estoque em uma única chamada:
+--   POST /rest/v1/rpc/incrementar_estoque
+--   {"p_categoria": "Pizza", "p_quantidade": -3, "p_observacao": "...", "p_criar": true}
+--
+-- O incremento é aplicado pelo próprio banco (quantidade = quantidade + delta),
+-- então vendas concorrentes da mesma categoria não perdem atualizações.
+-- Retorna a linha atualizada, já com a nova quantidade.
+--
+-- p_criar = true  -> UPSERT em "categoria" (cria a linha se não existir, com preço 0)
+-- p_criar = false -> apenas UPDATE (nenhuma linha retornada se a categoria não existir)
+
+create or replace function public.incrementar_estoque(
+    p_categoria text,
+    p_quantidade integer,
+    p_observacao text default null,
+    p_criar boolean default true
+)
+returns setof public."Estoque"
+language plpgsql
+as $$
+begin
+    if p_criar then
+        return query
+        insert into public."Estoque" as e (categoria, quantidade, preco_unitario, observacao)
+        values (p_categoria, p_quantidade, 0, p_observacao)
+        on conflict (categoria) do update
+            set quantidade = e.quantidade + excluded.quantidade,
+                observacao = coalesce(excluded.observacao, e.observacao)
+        returning e.*;
+    else
+        return query
+        update public."Estoque" as e
+           set quantidade = e.quantidade + p_quantidade,
+               observacao = coalesce(p_observacao, e.observacao)
+         where e.categoria = p_categoria
+        returning e.*;
+    end if;
+end;
+$$;
@@ -0,0 +1,58 @@
+-- Registro de venda completo em uma única chamada (e uma única transação):
+--   POST /rest/v1/rpc/registrar_venda
+--   {"p_venda": {"cliente": "...", "categoria_produto": "...", "qtd_unidades": 3, ...}}
+--
+-- Insere a Venda, insere a Cobranca correspondente e baixa o Estoque da
+-- categoria. Se qualquer passo falhar, nada é gravado (não há venda parcial).
+-- Quando 'valor_unitario' não é informado, usa o preço atual do Estoque.
+--
+-- Retorna {"venda": {...}, "cobranca": {...}, "estoque": {...}}.
+-- Depende de public.incrementar_estoque (20261018000100_incrementar_estoque.sql).
+
+create or replace function public.registrar_venda(p_venda jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_dados public."Venda";
+    v_venda public."Venda";
+    v_cobranca public."Cobranca";
+    v_estoque public."Estoque";
+begin
+    v_dados := jsonb_populate_record(null::public."Venda", p_venda);
+
+    if v_dados.valor_unitario is null then
+        select e.preco_unitario into v_dados.valor_unitario
+          from public."Estoque" e
+         where e.categoria = v_dados.categoria_produto;
+    end if;
+
+    insert into public."Venda" (
+        cliente, categoria_produto, qtd_unidades, valor_unitario,
+        status_pagamento, data_venda, data_vencimento, valor_total
+    )
+    values (
+        v_dados.cliente, v_dados.categoria_produto, v_dados.qtd_unidades, v_dados.valor_unitario,
+        v_dados.status_pagamento, v_dados.data_venda, v_dados.data_vencimento, v_dados.valor_total
+    )
+    returning * into v_venda;
+
+    insert into public."Cobranca" (cliente, vencimento, valor, status_pagamento, data_venda)
+    values (v_venda.cliente, v_venda.data_vencimento, v_venda.valor_total, v_venda.status_pagamento, v_venda.data_venda)
+    returning * into v_cobranca;
+
+    select * into v_estoque
+      from public.incrementar_estoque(
+          v_venda.categoria_produto,
+          -v_venda.qtd_unidades,
+          format('Adicao de %s unidade(s) ao estoque', -v_venda.qtd_unidades),
+          true
+      );
+
+    return jsonb_build_object(
+        'venda', to_jsonb(v_venda),
+        'cobranca', to_jsonb(v_cobranca),
+        'estoque', to_jsonb(v_estoque)
+    );
+end;
+$$;
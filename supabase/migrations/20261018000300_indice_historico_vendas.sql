@@ -0,0 +1,7 @@
+-- Índice para o histórico de vendas por categoria (GET /historico/vendas e
+-- POST /historico/historico/{pagina}): cobre o filtro por categoria, o intervalo
+-- de datas e a ordem/cursor em (data_venda, id), de modo que cada página custa
+-- o mesmo independentemente do tamanho do histórico.
+
+create index if not exists venda_categoria_data_venda_id_idx
+    on public."Venda" (categoria_produto, data_venda desc, id desc);
@@ -0,0 +1,30 @@
+-- Resumo das cobranças não pagas calculado no banco (GET /cobranca/pendentes):
+--   POST /rest/v1/rpc/resumo_cobrancas
+--
+-- Retorna {"pendentes": {"quantidade", "valor_total"}, "vencidas": {...}}.
+-- Uma cobrança está pendente se vence depois de agora; caso contrário, vencida.
+-- O tamanho da resposta não depende da quantidade de cobranças em aberto.
+
+create or replace function public.resumo_cobrancas()
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'pendentes', jsonb_build_object(
+            'quantidade', count(*) filter (where c.vencimento > now()),
+            'valor_total', coalesce(sum(c.valor) filter (where c.vencimento > now()), 0)
+        ),
+        'vencidas', jsonb_build_object(
+            'quantidade', count(*) filter (where c.vencimento <= now()),
+            'valor_total', coalesce(sum(c.valor) filter (where c.vencimento <= now()), 0)
+        )
+    )
+    from public."Cobranca" c
+    where c.status_pagamento = false;
+$$;
+
+-- Índice parcial: só as cobranças em aberto, ordenadas por vencimento.
+create index if not exists cobranca_nao_paga_vencimento_idx
+    on public."Cobranca" (vencimento, id)
+    where status_pagamento = false;
@@ -0,0 +1,7 @@
+-- Índice para o DSO de GET /cobranca/analytics: das cobranças pagas, só as
+-- vendidas nos últimos `dias_dso` dias são lidas (data_venda=gte....), de modo
+-- que o custo acompanha o período pedido, e não o histórico inteiro.
+
+create index if not exists cobranca_paga_data_venda_idx
+    on public."Cobranca" (data_venda, id)
+    where status_pagamento = true;
@@ -0,0 +1,46 @@
+-- Registro de um lote de vendas em uma única chamada (e uma única transação):
+--   POST /rest/v1/rpc/registrar_vendas_lote
+--   {"p_vendas": [{"cliente": "...", "categoria_produto": "...", "qtd_unidades": 3, ...}, ...]}
+--
+-- Insere cada Venda e a Cobranca correspondente (os mesmos campos de
+-- public.registrar_venda). Se qualquer linha falhar, nada é gravado: não ficam
+-- cobranças sem venda nem vendas sem cobrança. A baixa de estoque não faz parte
+-- da função; POST /vendas/vender_lote a faz depois, uma vez por categoria.
+--
+-- Retorna {"vendas": [...], "cobrancas": [...]}, na ordem de p_vendas.
+
+create or replace function public.registrar_vendas_lote(p_vendas jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_dados public."Venda";
+    v_venda public."Venda";
+    v_cobranca public."Cobranca";
+    v_vendas jsonb := '[]'::jsonb;
+    v_cobrancas jsonb := '[]'::jsonb;
+begin
+    for v_dados in
+        select * from jsonb_populate_recordset(null::public."Venda", p_vendas)
+    loop
+        insert into public."Venda" (
+            cliente, categoria_produto, qtd_unidades, valor_unitario,
+            status_pagamento, data_venda, data_vencimento, valor_total
+        )
+        values (
+            v_dados.cliente, v_dados.categoria_produto, v_dados.qtd_unidades, v_dados.valor_unitario,
+            v_dados.status_pagamento, v_dados.data_venda, v_dados.data_vencimento, v_dados.valor_total
+        )
+        returning * into v_venda;
+
+        insert into public."Cobranca" (cliente, vencimento, valor, status_pagamento, data_venda)
+        values (v_venda.cliente, v_venda.data_vencimento, v_venda.valor_total, v_venda.status_pagamento, v_venda.data_venda)
+        returning * into v_cobranca;
+
+        v_vendas := v_vendas || jsonb_build_array(to_jsonb(v_venda));
+        v_cobrancas := v_cobrancas || jsonb_build_array(to_jsonb(v_cobranca));
+    end loop;
+
+    return jsonb_build_object('vendas', v_vendas, 'cobrancas', v_cobrancas);
+end;
+$$;
@@ -0,0 +1,58 @@
+-- Escritas do outbox (app/api/src/core/outbox.py) idempotentes: se o banco
+-- gravou mas a resposta se perdeu (timeout, 5xx), o reenvio não tem efeito.
+--
+-- Cobranças: cada anotação leva uma chave gerada pela API, gravada em
+-- "Cobranca".chave_outbox (única). O worker insere com
+--   POST /rest/v1/Cobranca?on_conflict=chave_outbox
+--   Prefer: return=representation,resolution=ignore-duplicates
+-- e as cobranças já gravadas ficam de fora da resposta.
+--
+-- Baixas de estoque:
+--   POST /rest/v1/rpc/incrementar_estoque_outbox
+--   {"p_categoria": "Pizza", "p_itens": [{"chave": "...", "quantidade": -3}], "p_observacao": "..."}
+-- As chaves são registradas em "OutboxAplicado" na mesma transação do
+-- incremento, e só as ainda não registradas entram na soma. Retorna a linha
+-- da categoria (atualizada ou, se nada era novo, como está).
+
+alter table public."Cobranca" add column if not exists chave_outbox text;
+
+create unique index if not exists cobranca_chave_outbox_key
+    on public."Cobranca" (chave_outbox);
+
+create table if not exists public."OutboxAplicado" (
+    chave text primary key,
+    aplicado_em timestamptz not null default now()
+);
+
+create or replace function public.incrementar_estoque_outbox(
+    p_categoria text,
+    p_itens jsonb,
+    p_observacao text default null
+)
+returns setof public."Estoque"
+language plpgsql
+as $$
+declare
+    v_novas integer;
+    v_quantidade integer;
+begin
+    -- Um reenvio concorrente espera no índice único até esta transação terminar
+    with itens as (
+        select * from jsonb_to_recordset(p_itens) as i(chave text, quantidade integer)
+    ), novas as (
+        insert into public."OutboxAplicado" (chave)
+        select chave from itens
+        on conflict (chave) do nothing
+        returning chave
+    )
+    select count(*), coalesce(sum(itens.quantidade), 0)
+      into v_novas, v_quantidade
+      from itens join novas using (chave);
+
+    if v_novas = 0 then
+        return query select e.* from public."Estoque" as e where e.categoria = p_categoria;
+    else
+        return query select * from public.incrementar_estoque(p_categoria, v_quantidade, p_observacao, true);
+    end if;
+end;
+$$;
@@ -0,0 +1,153 @@
+"""
+Fixtures compartilhadas pelos testes.
+
+A API roda no próprio processo (`httpx.ASGITransport`), sem rede:
+
+- `fake`: backend REST, com o cliente do Supabase apontando para
+  `app/fake_postgrest.py` (dados de exemplo recriados a cada teste);
+- `sqlite`: backend SQLite em um arquivo novo dentro de `tmp_path`, com o
+  mesmo estoque inicial do fake;
+- `backend`: parametriza o teste nos dois.
+
+O estado global (configuração, repositórios, cliente, engine, outbox e caches
+em memória) é descartado antes e depois de cada teste.
+"""
+from typing import Callable, Optional, Set
+
+import httpx
+import pytest
+
+from app import fake_postgrest
+from app.api.src.api import deps
+from app.api.src.core import outbox
+from app.api.src.core.cache import estoque_cache
+from app.api.src.core.config import get_settings
+from app.api.src.core.idempotencia import idempotency_store
+from app.api.src.core.resiliencia import CircuitBreaker, OrcamentoRetentativas, circuito_supabase
+from app.api.src.core.response_cache import response_cache
+from app.api.src.db import session
+from app.api.src.models.produto import Estoque
+from app.main import app
+
+# Mesmo estoque inicial de fake_postgrest.resetar_dados()
+ESTOQUE_INICIAL = (("Brownie", 100, 8.0), ("Pizza", 50, 12.5), ("Bolo", 20, 30.0))
+
+
+def _limpar_estado() -> None:
+    get_settings.cache_clear()
+    deps._repositorios = None
+    session._client = None
+    session.close_engine()
+    idempotency_store._registros.clear()
+    estoque_cache.limpar()
+    response_cache.limpar()
+    circuito_supabase.registrar_sucesso()
+    if outbox._outbox is not None:
+        outbox._outbox.fechar()
+        outbox._outbox = None
+
+
+@pytest.fixture
+def anyio_backend():
+    # O cliente do Supabase usa asyncio diretamente (tarefas do single-flight)
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def ambiente(monkeypatch, tmp_path):
+    """Variáveis de ambiente dos testes; devolve o `monkeypatch` para ajustes."""
+    monkeypatch.setenv("SUPABASE_URL", "http://fake")
+    monkeypatch.setenv("SUPABASE_KEY", "fake")
+    monkeypatch.setenv("OUTBOX_PATH", str(tmp_path / "outbox.db"))
+    _limpar_estado()
+    yield monkeypatch
+    _limpar_estado()
+
+
+class TransporteFake(httpx.AsyncBaseTransport):
+    """
+    Encaminha as requisições ao fake do PostgREST.
+
+    `recusar` pode responder no lugar do fake (ex: um 400 para um corpo
+    específico); a próxima resposta de cada caminho em `perder` é trocada por
+    um 503 depois que o fake já gravou, como em um timeout após o commit.
+    """
+
+    def __init__(self):
+        self._fake = httpx.ASGITransport(app=fake_postgrest.app)
+        self.recusar: Optional[Callable[[httpx.Request], Optional[httpx.Response]]] = None
+        self.perder: Set[str] = set()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.recusar is not None:
+            recusa = self.recusar(request)
+            if recusa is not None:
+                return recusa
+        response = await self._fake.handle_async_request(request)
+        if request.url.path in self.perder:
+            self.perder.discard(request.url.path)
+            await response.aread()
+            return httpx.Response(503, json={"message": "resposta perdida"})
+        return response
+
+
+@pytest.fixture
+def transporte() -> TransporteFake:
+    return TransporteFake()
+
+
+@pytest.fixture
+def fake(transporte):
+    """Backend REST sobre o fake do PostgREST; devolve o módulo do fake (`.dados`, `.config`)."""
+    fake_postgrest.resetar_dados()
+    cliente = session.get_supabase()
+    cliente._client = httpx.AsyncClient(
+        base_url="http://fake/rest/v1", headers=cliente._client.headers, transport=transporte
+    )
+    return fake_postgrest
+
+
+@pytest.fixture
+def sqlite(ambiente, tmp_path):
+    """Backend SQLite em um arquivo novo, com o estoque inicial do fake."""
+    ambiente.setenv("BACKEND_DADOS", "sqlite")
+    ambiente.setenv("SQLITE_PATH", str(tmp_path / "dados.db"))
+    get_settings.cache_clear()
+    with session.get_session() as sessao, sessao.begin():
+        sessao.add_all(
+            Estoque(categoria=categoria, quantidade=quantidade, preco_unitario=preco)
+            for categoria, quantidade, preco in ESTOQUE_INICIAL
+        )
+
+
+@pytest.fixture(params=["rest", "sqlite"])
+def backend(request) -> str:
+    request.getfixturevalue("fake" if request.param == "rest" else "sqlite")
+    return request.param
+
+
+@pytest.fixture
+async def api():
+    """Cliente HTTP da aplicação (sem o lifespan: nenhum worker em segundo plano)."""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as cliente:
+        yield cliente
+
+
+@pytest.fixture
+def novo_cliente_supabase():
+    """
+    Fábrica de `SupabaseClient` sobre um `httpx.MockTransport`, com circuito e
+    orçamento de repetições próprios (sem repetições, salvo se pedidas).
+    """
+
+    def _criar(handler, **kwargs) -> session.SupabaseClient:
+        kwargs.setdefault("circuito", CircuitBreaker())
+        kwargs.setdefault("orcamento", OrcamentoRetentativas())
+        kwargs.setdefault("tentativas", 0)
+        cliente = session.SupabaseClient("http://supabase", "chave", **kwargs)
+        cliente._client = httpx.AsyncClient(
+            base_url="http://supabase/rest/v1", transport=httpx.MockTransport(handler)
+        )
+        return cliente
+
+    return _criar
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.api.src.core.analytics import Carteira, calcular_analytics, datetimes_utc
+
+AGORA = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+
+def _cobranca(cliente: str, dias_de_atraso: int, valor: float, dias_desde_a_venda: int = 45) -> dict:
+    return {
+        "cliente": cliente,
+        "vencimento": (AGORA - timedelta(days=dias_de_atraso)).isoformat(),
+        "valor": valor,
+        "data_venda": (AGORA - timedelta(days=dias_desde_a_venda)).isoformat(),
+    }
+
+
+def test_faixas_de_aging_nos_limites():
+    abertas = [
+        _cobranca("Ana", -5, 1.0),
+        _cobranca("Ana", 0, 2.0),
+        _cobranca("Ana", 30, 4.0),
+        _cobranca("Bruno", 31, 8.0),
+        _cobranca("Bruno", 60, 16.0),
+        _cobranca("Bruno", 61, 32.0),
+        _cobranca("Carla", 90, 64.0),
+        _cobranca("Carla", 91, 128.0),
+    ]
+
+    resultado = calcular_analytics(Carteira.de_linhas(abertas, []), 30, AGORA)
+
+    assert [(faixa["faixa"], faixa["quantidade"], faixa["valor_total"]) for faixa in resultado["aging"]] == [
+        ("a_vencer", 1, 1.0),
+        ("0-30", 2, 6.0),
+        ("31-60", 2, 24.0),
+        ("61-90", 2, 96.0),
+        ("90+", 1, 128.0),
+    ]
+    assert resultado["total_em_aberto"] == 255.0
+
+
+def test_exposicao_por_cliente_ordenada_pelo_valor_em_aberto():
+    abertas = [
+        _cobranca("Ana", -5, 1.0),
+        _cobranca("Ana", 10, 6.0),
+        _cobranca("Carla", 91, 128.0),
+        _cobranca("Bruno", 45, 50.0),
+    ]
+    pagas = [_cobranca("Ana", 200, 1000.0)]
+
+    clientes = calcular_analytics(Carteira.de_linhas(abertas, pagas), 30, AGORA)["clientes"]
+
+    assert clientes == [
+        {"cliente": "Carla", "quantidade": 1, "em_aberto": 128.0, "vencido": 128.0, "maior_atraso_dias": 91},
+        {"cliente": "Bruno", "quantidade": 1, "em_aberto": 50.0, "vencido": 50.0, "maior_atraso_dias": 45},
+        {"cliente": "Ana", "quantidade": 2, "em_aberto": 7.0, "vencido": 6.0, "maior_atraso_dias": 10},
+    ]
+
+
+def test_dso_usa_apenas_as_vendas_do_periodo():
+    abertas = [_cobranca("Ana", -5, 100.0, dias_desde_a_venda=10)]
+    pagas = [
+        _cobranca("Bruno", 0, 200.0, dias_desde_a_venda=5),
+        _cobranca("Carla", 0, 1000.0, dias_desde_a_venda=40),
+    ]
+
+    dso = calcular_analytics(Carteira.de_linhas(abertas, pagas), 30, AGORA)["dso"]
+
+    assert dso == {"periodo_dias": 30, "vendas_no_periodo": 300.0, "dias": 10.0}
+
+
+def test_carteira_vazia():
+    resultado = calcular_analytics(Carteira.de_linhas([], []), 30, AGORA)
+
+    assert resultado["total_em_aberto"] == 0
+    assert all(faixa["quantidade"] == 0 for faixa in resultado["aging"])
+    assert resultado["clientes"] == []
+    assert resultado["dso"]["dias"] is None
+
+
+def test_datetimes_utc_aplica_o_fuso():
+    datas = datetimes_utc([
+        "2026-10-18T12:00:00-03:00",
+        "2026-10-18 12:00:00.123456+00:00",
+        "2026-10-18T12:00:00Z",
+        "2026-10-18T12:00:00",
+        "2026-10-18",
+        None,
+    ])
+
+    assert datas[:5].tolist() == [
+        datetime(2026, 10, 18, 15, 0),
+        datetime(2026, 10, 18, 12, 0),
+        datetime(2026, 10, 18, 12, 0),
+        datetime(2026, 10, 18, 12, 0),
+        datetime(2026, 10, 18, 0, 0),
+    ]
+    assert np.isnat(datas[5])
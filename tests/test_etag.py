@@ -0,0 +1,52 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+VENDA = {
+    "cliente": "Ana",
+    "categoria_produto": "Pizza",
+    "qtd_unidades": 2,
+    "valor_unitario": 12.5,
+    "status_pagamento": False,
+    "data_venda": "2026-10-18T10:00:00Z",
+    "data_vencimento": "2026-11-18T10:00:00Z",
+    "valor_total": 25.0,
+}
+
+
+async def test_if_none_match_com_o_etag_atual_responde_304(api, backend):
+    primeira = await api.get("/api/v1/produtos/estoque_atual", params={"categoria": "Pizza"})
+
+    assert primeira.status_code == 200
+    assert primeira.json() == 50
+    etag = primeira.headers["etag"]
+    assert primeira.headers["cache-control"].startswith("public, max-age=")
+
+    segunda = await api.get(
+        "/api/v1/produtos/estoque_atual", params={"categoria": "Pizza"}, headers={"If-None-Match": f"W/{etag}"}
+    )
+
+    assert segunda.status_code == 304
+    assert segunda.content == b""
+    assert segunda.headers["etag"] == etag
+
+
+async def test_etag_muda_quando_os_dados_mudam(api, backend):
+    etag = (await api.get("/api/v1/produtos/estoque_atual", params={"categoria": "Pizza"})).headers["etag"]
+
+    await api.post("/api/v1/vendas/vender", json=VENDA)
+    resposta = await api.get(
+        "/api/v1/produtos/estoque_atual", params={"categoria": "Pizza"}, headers={"If-None-Match": etag}
+    )
+
+    assert resposta.status_code == 200
+    assert resposta.json() == 48
+    assert resposta.headers["etag"] != etag
+
+
+async def test_lista_de_clientes_varia_pelo_accept(api, fake):
+    resposta = await api.get("/api/v1/clientes/listar_clientes")
+
+    assert resposta.status_code == 200
+    assert resposta.headers["vary"] == "Accept"
+    assert "etag" in resposta.headers
@@ -0,0 +1,78 @@
+import pytest
+
+from app.api.src.api.deps import get_repositorios
+
+pytestmark = pytest.mark.anyio
+
+
+def _venda(cliente: str, categoria: str, data_venda: str) -> dict:
+    return {
+        "cliente": cliente,
+        "categoria_produto": categoria,
+        "qtd_unidades": 1,
+        "valor_unitario": 12.5,
+        "status_pagamento": False,
+        "data_venda": data_venda,
+        "data_vencimento": "2026-12-01T00:00:00+00:00",
+        "valor_total": 12.5,
+    }
+
+
+async def _paginas(api, limite: int, **filtros):
+    """Percorre o histórico seguindo 'proximo_cursor' até a última página."""
+    params = {"categoria": "Pizza", "limite": limite, **filtros}
+    paginas = []
+    while True:
+        resposta = await api.get("/api/v1/historico/vendas", params=params)
+        assert resposta.status_code == 200
+        corpo = resposta.json()
+        paginas.append([(item["cliente"], item["data_venda"][:10]) for item in corpo["itens"]])
+        if corpo["proximo_cursor"] is None:
+            return paginas
+        params["cursor"] = corpo["proximo_cursor"]
+
+
+async def test_cursor_percorre_o_historico_sem_repetir_nem_pular(api, backend):
+    # Várias vendas no mesmo instante: o desempate é pelo id
+    await get_repositorios().venda.inserir([
+        _venda("a", "Pizza", "2026-10-01T10:00:00+00:00"),
+        _venda("b", "Pizza", "2026-10-03T10:00:00+00:00"),
+        _venda("c", "Pizza", "2026-10-03T10:00:00+00:00"),
+        _venda("x", "Bolo", "2026-10-03T10:00:00+00:00"),
+        _venda("d", "Pizza", "2026-10-03T10:00:00+00:00"),
+        _venda("e", "Pizza", "2026-10-05T10:00:00+00:00"),
+    ])
+
+    paginas = await _paginas(api, limite=2)
+
+    assert paginas == [
+        [("e", "2026-10-05"), ("d", "2026-10-03")],
+        [("c", "2026-10-03"), ("b", "2026-10-03")],
+        [("a", "2026-10-01")],
+    ]
+
+
+async def test_cursor_respeita_o_intervalo_de_datas(api, backend):
+    await get_repositorios().venda.inserir([
+        _venda(cliente, "Pizza", f"2026-10-{dia:02d}T10:00:00+00:00")
+        for cliente, dia in (("a", 1), ("b", 2), ("c", 3), ("d", 4), ("e", 5))
+    ])
+
+    paginas = await _paginas(api, limite=2, de="2026-10-02", ate="2026-10-04")
+
+    assert [cliente for pagina in paginas for cliente, _ in pagina] == ["d", "c", "b"]
+
+
+async def test_ultima_pagina_exata_nao_tem_cursor(api, backend):
+    await get_repositorios().venda.inserir([
+        _venda("a", "Pizza", "2026-10-01T10:00:00+00:00"),
+        _venda("b", "Pizza", "2026-10-02T10:00:00+00:00"),
+    ])
+
+    assert await _paginas(api, limite=2) == [[("b", "2026-10-02"), ("a", "2026-10-01")]]
+
+
+async def test_cursor_invalido(api, backend):
+    resposta = await api.get("/api/v1/historico/vendas", params={"categoria": "Pizza", "cursor": "invalido"})
+
+    assert resposta.status_code == 400
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.src.core.idempotencia import IdempotencyStore
+
+pytestmark = pytest.mark.anyio
+
+VENDA = {
+    "cliente": "Ana",
+    "categoria_produto": "Brownie",
+    "qtd_unidades": 2,
+    "valor_unitario": 8.0,
+    "status_pagamento": False,
+    "data_venda": "2026-10-18T10:00:00Z",
+    "data_vencimento": "2026-11-18T10:00:00Z",
+    "valor_total": 16.0,
+}
+
+
+async def test_repeticao_devolve_a_resposta_guardada(api, fake):
+    primeira = await api.post("/api/v1/vendas/vender", json=VENDA, headers={"Idempotency-Key": "venda-1"})
+    repetida = await api.post("/api/v1/vendas/vender", json=VENDA, headers={"Idempotency-Key": "venda-1"})
+
+    assert primeira.status_code == repetida.status_code == 201
+    assert "Idempotent-Replayed" not in primeira.headers
+    assert repetida.headers["Idempotent-Replayed"] == "true"
+    assert repetida.content == primeira.content
+    assert len(fake.dados["Venda"]) == 1
+    assert len(fake.dados["Cobranca"]) == 1
+    assert next(linha for linha in fake.dados["Estoque"] if linha["categoria"] == "Brownie")["quantidade"] == 98
+
+
+async def test_chave_reusada_com_outro_corpo_responde_422(api, fake):
+    await api.post("/api/v1/vendas/vender", json=VENDA, headers={"Idempotency-Key": "venda-1"})
+    outra = await api.post(
+        "/api/v1/vendas/vender", json={**VENDA, "qtd_unidades": 3}, headers={"Idempotency-Key": "venda-1"}
+    )
+
+    assert outra.status_code == 422
+    assert len(fake.dados["Venda"]) == 1
+
+
+async def test_sem_chave_cada_requisicao_grava(api, fake):
+    for _ in range(2):
+        assert (await api.post("/api/v1/vendas/vender", json=VENDA)).status_code == 201
+    assert len(fake.dados["Venda"]) == 2
+
+
+async def test_repeticoes_simultaneas_executam_uma_vez():
+    store = IdempotencyStore(ttl=60, max_chaves=10)
+    liberar = asyncio.Event()
+    chamadas = []
+
+    async def executar():
+        chamadas.append(1)
+        await liberar.wait()
+        return {"ok": True}
+
+    tarefas = [asyncio.create_task(store.executar("k", "corpo", executar, 201)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    liberar.set()
+    respostas = await asyncio.gather(*tarefas)
+
+    assert len(chamadas) == 1
+    assert {resposta.body for resposta in respostas} == {b'{"ok":true}'}
+    assert sorted(resposta.headers.get("Idempotent-Replayed", "") for resposta in respostas) == ["", "true", "true"]
+
+
+async def test_falha_libera_a_chave():
+    store = IdempotencyStore(ttl=60, max_chaves=10)
+
+    async def falhar():
+        raise RuntimeError("banco fora")
+
+    async def executar():
+        return {"ok": True}
+
+    with pytest.raises(RuntimeError):
+        await store.executar("k", "corpo", falhar, 201)
+    resposta = await store.executar("k", "corpo", executar, 201)
+
+    assert resposta.status_code == 201
+    assert "Idempotent-Replayed" not in resposta.headers
+
+
+async def test_chave_expirada_ou_excedente_sai_do_store():
+    store = IdempotencyStore(ttl=60, max_chaves=2)
+
+    async def executar():
+        return {}
+
+    for chave in ("a", "b", "c"):
+        await store.executar(chave, "corpo", executar, 201)
+
+    assert len(store) == 2
+    # 'a' (a mais antiga) saiu: reusar a chave com outro corpo não é mais um erro
+    await store.executar("a", "outro", executar, 201)
+    with pytest.raises(HTTPException) as erro:
+        await store.executar("c", "outro", executar, 201)
+    assert erro.value.status_code == 422
+
+
+async def test_chave_em_andamento_nao_sai_pelo_limite_nem_expira():
+    store = IdempotencyStore(ttl=0.05, max_chaves=1)
+    liberar = asyncio.Event()
+    chamadas = []
+
+    async def lenta():
+        chamadas.append(1)
+        await liberar.wait()
+        return {"ok": True}
+
+    async def rapida():
+        return {}
+
+    primeira = asyncio.create_task(store.executar("lenta", "corpo", lenta, 201))
+    await asyncio.sleep(0.1)
+    # Acima do limite e há mais que o TTL, mas 'lenta' ainda está rodando
+    await store.executar("outra", "corpo", rapida, 201)
+    repetida = asyncio.create_task(store.executar("lenta", "corpo", lenta, 201))
+    await asyncio.sleep(0)
+    liberar.set()
+
+    assert (await primeira).status_code == (await repetida).status_code == 201
+    assert len(chamadas) == 1
+    assert (await repetida).headers["Idempotent-Replayed"] == "true"
@@ -0,0 +1,15 @@
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def test_backend_rest_nao_importa_o_sqlalchemy():
+    codigo = "import sys, app.main, app.api.src.core.outbox; print('sqlalchemy' in sys.modules)"
+
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True
+    ).stdout
+
+    assert saida.strip() == "False"
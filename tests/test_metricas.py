@@ -0,0 +1,33 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+VENDA = {
+    "cliente": "Cliente Sigiloso",
+    "categoria_produto": "Brownie",
+    "qtd_unidades": 1,
+    "valor_unitario": 8.0,
+    "status_pagamento": False,
+    "data_venda": "2026-10-18T10:00:00Z",
+    "data_vencimento": "2026-11-18T10:00:00Z",
+    "valor_total": 8.0,
+}
+
+
+async def test_latencia_por_rota_e_chamadas_ao_banco(api, fake):
+    await api.post("/api/v1/vendas/vender", json=VENDA)
+    await api.get("/api/v1/historico/historico/3", params={"categoria": "Brownie"})
+
+    metricas = (await api.get("/metrics")).text
+
+    assert 'http_request_duration_seconds_count{method="POST",route="/api/v1/vendas/vender",status="201"}' in metricas
+    # O template da rota, não o caminho com os parâmetros
+    assert 'route="/api/v1/historico/historico/{pagina}"' in metricas
+    assert "/historico/historico/3" not in metricas
+    assert 'upstream_requests_total{method="POST",resultado="ok",tabela="Venda"}' in metricas
+
+
+async def test_venda_nao_escreve_dados_do_cliente_na_saida(api, fake, capsys):
+    await api.post("/api/v1/vendas/vender", json=VENDA)
+
+    assert "Cliente Sigiloso" not in capsys.readouterr().out
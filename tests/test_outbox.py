@@ -0,0 +1,218 @@
+import sqlite3
+
+import httpx
+import pytest
+
+from app.api.src.api.deps import get_repositorios
+from app.api.src.core.config import get_settings
+from app.api.src.core.outbox import COBRANCA, ESTOQUE, Outbox, descarregar, get_outbox
+
+pytestmark = pytest.mark.anyio
+
+
+def _cobranca(cliente: str) -> dict:
+    return {
+        "cliente": cliente,
+        "vencimento": "2026-11-18T10:00:00+00:00",
+        "valor": 10.0,
+        "status_pagamento": False,
+        "data_venda": "2026-10-18T10:00:00+00:00",
+    }
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    yield outbox
+    outbox.fechar()
+
+
+VENDA = {
+    "cliente": "Ana",
+    "categoria_produto": "Pizza",
+    "qtd_unidades": 2,
+    "valor_unitario": 12.5,
+    "status_pagamento": False,
+    "data_venda": "2026-10-18T10:00:00Z",
+    "data_vencimento": "2026-11-18T10:00:00Z",
+    "valor_total": 25.0,
+}
+
+
+@pytest.fixture
+def write_behind(ambiente):
+    ambiente.setenv("VENDA_WRITE_BEHIND", "true")
+    ambiente.setenv("VENDA_WRITE_BEHIND_ESTOQUE", "true")
+    get_settings.cache_clear()
+
+
+def _vencer_esperas(outbox: Outbox) -> None:
+    """Antecipa a próxima tentativa das linhas adiadas."""
+    outbox._conexao.execute("UPDATE outbox SET proxima_tentativa = 0")
+
+
+def _estoque(fake, categoria: str) -> int:
+    return next(linha for linha in fake.dados["Estoque"] if linha["categoria"] == categoria)["quantidade"]
+
+
+async def test_descarrega_cobrancas_e_baixas_de_estoque(fake, outbox):
+    outbox.adicionar(COBRANCA, [_cobranca("Ana"), _cobranca("Bruno")])
+    outbox.adicionar(ESTOQUE, [{"categoria": "Pizza", "quantidade": -3}, {"categoria": "Pizza", "quantidade": -2}])
+
+    assert await descarregar(outbox) == 4
+
+    assert outbox.contar() == 0
+    assert sorted(linha["cliente"] for linha in fake.dados["Cobranca"]) == ["Ana", "Bruno"]
+    assert all(linha["chave_outbox"] for linha in fake.dados["Cobranca"])
+    assert _estoque(fake, "Pizza") == 45
+
+
+async def test_falha_transitoria_volta_para_a_fila(fake, outbox, ambiente):
+    outbox.adicionar(COBRANCA, [_cobranca("Ana")])
+    ambiente.setattr(fake.config, "taxa_erro", 1.0)
+
+    await descarregar(outbox)
+
+    assert outbox.contar() == 1
+    assert outbox.pendentes(10) == []  # aguardando a espera exponencial
+    assert fake.dados["Cobranca"] == []
+
+    ambiente.setattr(fake.config, "taxa_erro", 0.0)
+    _vencer_esperas(outbox)
+    await descarregar(outbox)
+
+    assert outbox.contar() == 0
+    assert [linha["cliente"] for linha in fake.dados["Cobranca"]] == ["Ana"]
+
+
+async def test_reenvio_depois_de_resposta_perdida_nao_duplica(fake, outbox, transporte):
+    outbox.adicionar(COBRANCA, [_cobranca("Ana"), _cobranca("Bruno")])
+    outbox.adicionar(ESTOQUE, [{"categoria": "Pizza", "quantidade": -3}, {"categoria": "Pizza", "quantidade": -2}])
+    # O fake grava, mas a resposta não chega: as linhas continuam no outbox
+    transporte.perder = {"/rest/v1/Cobranca", "/rest/v1/rpc/incrementar_estoque_outbox"}
+
+    await descarregar(outbox)
+    assert outbox.contar() == 4
+
+    _vencer_esperas(outbox)
+    await descarregar(outbox)
+
+    assert outbox.contar() == 0
+    assert sorted(linha["cliente"] for linha in fake.dados["Cobranca"]) == ["Ana", "Bruno"]
+    assert _estoque(fake, "Pizza") == 45
+
+
+async def test_linha_recusada_sem_travar_o_lote_e_morta_apos_o_limite(fake, outbox, transporte, ambiente):
+    ambiente.setenv("OUTBOX_MAX_TENTATIVAS", "2")
+    get_settings.cache_clear()
+    transporte.recusar = lambda request: (
+        httpx.Response(400, json={"message": "linha inválida"}) if b"Recusada" in request.content else None
+    )
+    outbox.adicionar(COBRANCA, [_cobranca("Ana"), _cobranca("Recusada")])
+
+    await descarregar(outbox)
+    assert [linha["cliente"] for linha in fake.dados["Cobranca"]] == ["Ana"]
+    assert (outbox.contar(), outbox.contar_mortas()) == (1, 0)
+
+    _vencer_esperas(outbox)
+    await descarregar(outbox)
+
+    assert (outbox.contar(), outbox.contar_mortas()) == (0, 1)
+    _vencer_esperas(outbox)
+    assert await descarregar(outbox) == 0
+
+
+async def test_falha_transitoria_nunca_mata_a_linha(fake, outbox, ambiente):
+    ambiente.setenv("OUTBOX_MAX_TENTATIVAS", "2")
+    get_settings.cache_clear()
+    ambiente.setattr(fake.config, "taxa_erro", 1.0)
+    outbox.adicionar(ESTOQUE, [{"categoria": "Pizza", "quantidade": -1}])
+
+    for _ in range(4):
+        _vencer_esperas(outbox)
+        await descarregar(outbox)
+
+    assert (outbox.contar(), outbox.contar_mortas()) == (1, 0)
+
+
+async def test_escritas_idempotentes_no_repositorio(backend):
+    repositorios = get_repositorios()
+    cobrancas = [{**_cobranca("Ana"), "chave_outbox": "c1"}, {**_cobranca("Bruno"), "chave_outbox": "c2"}]
+    baixas = [("e1", -3), ("e2", -2)]
+
+    criadas = await repositorios.cobranca.inserir_idempotente(cobrancas)
+    repetidas = await repositorios.cobranca.inserir_idempotente(cobrancas)
+    estoque = await repositorios.estoque.incrementar_idempotente("Pizza", baixas)
+    estoque_repetido = await repositorios.estoque.incrementar_idempotente("Pizza", baixas)
+    estoque_parcial = await repositorios.estoque.incrementar_idempotente("Pizza", [("e2", -2), ("e3", -1)])
+
+    assert sorted(linha["cliente"] for linha in criadas) == ["Ana", "Bruno"]
+    assert repetidas == []
+    assert len(await repositorios.cobranca.listar(False)) == 2
+    assert [linha["quantidade"] for linha in estoque + estoque_repetido + estoque_parcial] == [45, 45, 44]
+
+
+def test_arquivo_antigo_ganha_chaves_e_estado(tmp_path):
+    caminho = str(tmp_path / "antigo.db")
+    with sqlite3.connect(caminho) as conexao:
+        conexao.execute(
+            "CREATE TABLE outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, tipo TEXT NOT NULL, payload TEXT NOT NULL,"
+            " tentativas INTEGER NOT NULL DEFAULT 0, proxima_tentativa REAL NOT NULL, ultimo_erro TEXT)"
+        )
+        conexao.execute("INSERT INTO outbox (tipo, payload, proxima_tentativa) VALUES ('estoque', '{}', 0)")
+
+    outbox = Outbox(caminho)
+    try:
+        [linha] = outbox.pendentes(10)
+        assert len(linha.chave) == 32
+        assert outbox.pendentes(10)[0].chave == linha.chave
+    finally:
+        outbox.fechar()
+
+
+def test_reserva_so_e_enviada_depois_de_confirmada_ou_vencida(outbox, ambiente):
+    [cobranca, baixa] = outbox.reservar([(COBRANCA, _cobranca("Ana")), (ESTOQUE, {"categoria": "Pizza", "quantidade": -1})])
+
+    assert outbox.contar() == 2
+    assert outbox.pendentes(10) == []
+
+    outbox.confirmar([cobranca])
+    assert [linha.id for linha in outbox.pendentes(10)] == [cobranca]
+
+    # Sem confirmação (ex: o processo caiu), a reserva sai ao fim de OUTBOX_RESERVA
+    ambiente.setenv("OUTBOX_RESERVA", "0")
+    get_settings.cache_clear()
+    [perdida] = outbox.reservar([(COBRANCA, _cobranca("Bruno"))])
+    assert [linha.id for linha in outbox.pendentes(10)] == [cobranca, perdida]
+    assert baixa not in [linha.id for linha in outbox.pendentes(10)]
+
+
+async def test_venda_write_behind_libera_cobranca_e_baixa(api, fake, write_behind):
+    resposta = await api.post("/api/v1/vendas/vender", json=VENDA)
+
+    assert resposta.status_code == 201
+    assert [linha["cliente"] for linha in fake.dados["Venda"]] == ["Ana"]
+    assert fake.dados["Cobranca"] == []
+    assert await descarregar() == 2
+    assert [(linha["cliente"], linha["valor"]) for linha in fake.dados["Cobranca"]] == [("Ana", 25.0)]
+    assert _estoque(fake, "Pizza") == 48
+
+
+@pytest.mark.parametrize("status_code", [400, 503])
+async def test_falha_na_venda_write_behind_descarta_a_reserva(api, fake, transporte, write_behind, status_code):
+    transporte.recusar = lambda request: (
+        httpx.Response(status_code, json={"message": "falha"})
+        if request.method == "POST" and request.url.path == "/rest/v1/Venda"
+        else None
+    )
+
+    resposta = await api.post("/api/v1/vendas/vender", json=VENDA, headers={"Idempotency-Key": "venda-1"})
+
+    assert resposta.status_code == status_code
+    assert get_outbox().contar() == 0
+
+    # A repetição com a mesma chave grava uma única venda e uma única cobrança
+    transporte.recusar = None
+    assert (await api.post("/api/v1/vendas/vender", json=VENDA, headers={"Idempotency-Key": "venda-1"})).status_code == 201
+    await descarregar()
+    assert len(fake.dados["Venda"]) == len(fake.dados["Cobranca"]) == 1
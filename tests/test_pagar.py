@@ -0,0 +1,62 @@
+import pytest
+
+from app.api.src.api.deps import get_repositorios
+
+pytestmark = pytest.mark.anyio
+
+
+def _cobranca(cliente: str, valor: float, vencimento: str) -> dict:
+    return {
+        "cliente": cliente,
+        "valor": valor,
+        "vencimento": f"{vencimento}T10:00:00+00:00",
+        "data_venda": "2026-10-18T10:00:00+00:00",
+        "status_pagamento": False,
+    }
+
+
+@pytest.fixture
+async def cobrancas(backend):
+    return await get_repositorios().cobranca.inserir([
+        _cobranca("Ana", 10.0, "2026-11-18"),
+        _cobranca("Ana", 20.0, "2026-12-18"),
+        _cobranca("Bruno", 15.0, "2026-11-18"),
+    ])
+
+
+async def test_pagar_duas_vezes_responde_404(api, cobrancas):
+    corpo = {"cliente": "Ana", "vencimento": "2026-11-18", "valor": 10.0}
+
+    primeira = await api.post("/api/v1/cobranca/pagar_cobranca", json=corpo)
+    segunda = await api.post("/api/v1/cobranca/pagar_cobranca", json=corpo)
+
+    assert primeira.status_code == 200
+    assert [linha["id"] for linha in primeira.json()["data"]] == [cobrancas[0]["id"]]
+    assert segunda.status_code == 404
+
+
+async def test_lote_por_id_e_por_chave(api, cobrancas):
+    await api.post("/api/v1/cobranca/pagar_cobranca", json={"cliente": "Ana", "vencimento": "2026-11-18", "valor": 10.0})
+
+    resposta = await api.post("/api/v1/cobranca/pagar_lote", json=[
+        {"id": cobrancas[1]["id"]},
+        {"cliente": "Bruno", "vencimento": "2026-11-18", "valor": 15.0},
+        # Já paga
+        {"cliente": "Ana", "vencimento": "2026-11-18", "valor": 10.0},
+        {"id": 999999},
+    ])
+
+    assert resposta.status_code == 200
+    corpo = resposta.json()
+    assert [(item["indice"], item["ids"]) for item in corpo["encontradas"]] == [
+        (0, [cobrancas[1]["id"]]),
+        (1, [cobrancas[2]["id"]]),
+    ]
+    assert [item["indice"] for item in corpo["nao_encontradas"]] == [2, 3]
+    assert await get_repositorios().cobranca.listar(False) == []
+
+
+async def test_lote_valida_cada_item(api, fake):
+    resposta = await api.post("/api/v1/cobranca/pagar_lote", json=[{"cliente": "Ana"}])
+
+    assert resposta.status_code == 422
@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.api.src.core import recebiveis as modulo
+from app.api.src.core.recebiveis import ContadoresRecebiveis
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    """Relógio de parede controlado pelo teste (`relogio[0] += segundos`)."""
+    agora = [1_800_000_000.0]
+    monkeypatch.setattr(modulo.time, "time", lambda: agora[0])
+    return agora
+
+
+@pytest.fixture
+def contadores() -> ContadoresRecebiveis:
+    contadores = ContadoresRecebiveis()
+    contadores.pronto = True
+    return contadores
+
+
+def _cobranca(id_: int, vencimento: float, valor: float) -> dict:
+    return {"id": id_, "vencimento": datetime.fromtimestamp(vencimento, timezone.utc).isoformat(), "valor": valor}
+
+
+def _totais(contadores: ContadoresRecebiveis) -> dict:
+    resumo = contadores.resumo()
+    return {grupo: (totais["quantidade"], totais["valor_total"]) for grupo, totais in resumo.items()}
+
+
+def test_resumo_antes_da_primeira_carga_e_none():
+    assert ContadoresRecebiveis().resumo() is None
+
+
+def test_pendentes_viram_vencidas_quando_o_vencimento_chega(relogio, contadores):
+    agora = relogio[0]
+    contadores.registrar_criadas([
+        _cobranca(1, agora + 60, 10.0),
+        _cobranca(2, agora + 120, 5.5),
+        _cobranca(3, agora - 60, 1.0),
+    ])
+    assert _totais(contadores) == {"pendentes": (2, 15.5), "vencidas": (1, 1.0)}
+
+    relogio[0] += 90
+    assert _totais(contadores) == {"pendentes": (1, 5.5), "vencidas": (2, 11.0)}
+
+    relogio[0] += 3600
+    assert _totais(contadores) == {"pendentes": (0, 0.0), "vencidas": (3, 16.5)}
+
+
+def test_cobranca_paga_antes_de_vencer_nao_e_promovida(relogio, contadores):
+    contadores.registrar_criadas([_cobranca(1, relogio[0] + 60, 10.0)])
+    contadores.registrar_pagas([{"id": 1}])
+
+    relogio[0] += 120
+    assert _totais(contadores) == {"pendentes": (0, 0.0), "vencidas": (0, 0.0)}
+
+
+def test_vencimento_alterado_ignora_a_entrada_antiga_do_heap(relogio, contadores):
+    agora = relogio[0]
+    contadores.registrar_criadas([_cobranca(1, agora + 60, 10.0)])
+    contadores.registrar_criadas([_cobranca(1, agora + 600, 10.0)])
+
+    relogio[0] += 120
+    assert _totais(contadores) == {"pendentes": (1, 10.0), "vencidas": (0, 0.0)}
+
+    relogio[0] += 600
+    assert _totais(contadores) == {"pendentes": (0, 0.0), "vencidas": (1, 10.0)}
+
+
+def test_somas_exatas_em_decimal(relogio, contadores):
+    contadores.registrar_criadas([_cobranca(id_, relogio[0] + 60, 0.1) for id_ in range(1, 4)])
+
+    assert _totais(contadores)["pendentes"] == (3, 0.3)
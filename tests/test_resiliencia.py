@@ -0,0 +1,105 @@
+import httpx
+import pytest
+
+from app.api.src.core import resiliencia
+from app.api.src.core.resiliencia import ABERTO, FECHADO, MEIO_ABERTO, CircuitBreaker, CircuitoAbertoError
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    """Relógio monotônico controlado pelo teste (`relogio[0] += segundos`)."""
+    agora = [1000.0]
+    monkeypatch.setattr(resiliencia.time, "monotonic", lambda: agora[0])
+    return agora
+
+
+def test_sucesso_zera_as_falhas_seguidas(relogio):
+    circuito = CircuitBreaker(falhas=2, aberto_por=30)
+    circuito.registrar_falha()
+    circuito.registrar_sucesso()
+    circuito.registrar_falha()
+
+    assert circuito.estado == FECHADO
+    circuito.liberar()
+
+
+def test_abre_apos_falhas_seguidas(relogio):
+    circuito = CircuitBreaker(falhas=2, aberto_por=30)
+    circuito.registrar_falha()
+    circuito.registrar_falha()
+
+    assert circuito.estado == ABERTO
+    with pytest.raises(CircuitoAbertoError) as erro:
+        circuito.liberar()
+    assert erro.value.retry_after == pytest.approx(30)
+    relogio[0] += 10
+    assert circuito.segundos_para_reabrir() == pytest.approx(20)
+
+
+def test_meio_aberto_libera_uma_chamada_de_teste(relogio):
+    circuito = CircuitBreaker(falhas=1, aberto_por=30)
+    circuito.registrar_falha()
+    relogio[0] += 30
+
+    circuito.liberar()
+    assert circuito.estado == MEIO_ABERTO
+    with pytest.raises(CircuitoAbertoError):
+        circuito.liberar()
+
+    circuito.registrar_sucesso()
+    assert circuito.estado == FECHADO
+    circuito.liberar()
+
+
+def test_falha_no_meio_aberto_reabre(relogio):
+    circuito = CircuitBreaker(falhas=3, aberto_por=30)
+    for _ in range(3):
+        circuito.registrar_falha()
+    relogio[0] += 30
+    circuito.liberar()
+
+    circuito.registrar_falha()
+
+    assert circuito.estado == ABERTO
+    assert circuito.segundos_para_reabrir() == pytest.approx(30)
+
+
+def test_chamada_abandonada_libera_o_teste(relogio):
+    circuito = CircuitBreaker(falhas=1, aberto_por=30)
+    circuito.registrar_falha()
+    relogio[0] += 30
+    circuito.liberar()
+
+    circuito.abandonar()
+
+    circuito.liberar()
+    assert circuito.estado == MEIO_ABERTO
+
+
+@pytest.mark.anyio
+async def test_cliente_para_de_chamar_o_supabase_com_o_circuito_aberto(novo_cliente_supabase):
+    chamadas = []
+
+    def handler(request):
+        chamadas.append(request)
+        return httpx.Response(503, json={"message": "fora"})
+
+    circuito = CircuitBreaker(falhas=2, aberto_por=30)
+    cliente = novo_cliente_supabase(handler, circuito=circuito)
+    for _ in range(2):
+        assert (await cliente.post("Venda", json={})).status_code == 503
+
+    with pytest.raises(CircuitoAbertoError):
+        await cliente.post("Venda", json={})
+    assert len(chamadas) == 2
+    assert circuito.estado == ABERTO
+
+
+@pytest.mark.anyio
+async def test_erro_4xx_nao_conta_como_falha(novo_cliente_supabase):
+    circuito = CircuitBreaker(falhas=1, aberto_por=30)
+    cliente = novo_cliente_supabase(lambda request: httpx.Response(409, json={}), circuito=circuito)
+
+    for _ in range(3):
+        assert (await cliente.post("Venda", json={})).status_code == 409
+    assert circuito.estado == FECHADO
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app.api.src.api.deps import get_repositorios
+from app.api.src.core.response_cache import ResponseCache
+
+pytestmark = pytest.mark.anyio
+
+VENDA = {
+    "cliente": "Ana",
+    "categoria_produto": "Pizza",
+    "qtd_unidades": 1,
+    "valor_unitario": 12.5,
+    "status_pagamento": False,
+    "data_venda": "2026-10-18T10:00:00Z",
+    "data_vencimento": "2026-11-18T10:00:00Z",
+    "valor_total": 12.5,
+}
+
+
+def _carregador(*corpos: bytes):
+    restantes = list(corpos)
+    cargas = []
+
+    async def carregar() -> bytes:
+        cargas.append(restantes[0])
+        return restantes.pop(0)
+
+    return carregar, cargas
+
+
+async def test_entrada_vencida_e_servida_enquanto_recarrega():
+    cache = ResponseCache(ttl=0, stale=60, max_bytes=1024)
+    carregar, cargas = _carregador(b"v1", b"v2")
+
+    assert await cache.obter("chave", ("Cobranca",), carregar) == b"v1"
+    # Vencida, mas dentro do 'stale': sai a versão antiga e a nova é buscada por trás
+    assert await cache.obter("chave", ("Cobranca",), carregar) == b"v1"
+    await asyncio.sleep(0)
+    assert await cache.obter("chave", ("Cobranca",), carregar) == b"v2"
+    assert cargas == [b"v1", b"v2"]
+
+
+async def test_invalidar_remove_so_as_entradas_da_tabela():
+    cache = ResponseCache(ttl=60, stale=0, max_bytes=1024)
+    await cache.obter("cobrancas", ("Cobranca",), _carregador(b"c")[0])
+    await cache.obter("vendas", ("Venda",), _carregador(b"v")[0])
+
+    cache.invalidar_tabelas("Cobranca")
+
+    assert len(cache) == 1
+    assert await cache.obter("vendas", ("Venda",), _carregador(b"outra")[0]) == b"v"
+
+
+async def test_leitura_anterior_a_invalidacao_nao_fica_no_cache():
+    cache = ResponseCache(ttl=60, stale=0, max_bytes=1024)
+    liberar = asyncio.Event()
+
+    async def carregar_lento() -> bytes:
+        await liberar.wait()
+        return b"antigo"
+
+    leitura = asyncio.create_task(cache.obter("chave", ("Cobranca",), carregar_lento))
+    await asyncio.sleep(0)
+    cache.invalidar_tabelas("Cobranca")
+    liberar.set()
+
+    assert await leitura == b"antigo"
+    assert len(cache) == 0
+
+
+async def test_limite_de_bytes_descarta_a_menos_usada():
+    cache = ResponseCache(ttl=60, stale=0, max_bytes=4)
+    await cache.obter("a", (), _carregador(b"aa")[0])
+    await cache.obter("b", (), _carregador(b"bb")[0])
+    await cache.obter("a", (), _carregador(b"xx")[0])
+    await cache.obter("c", (), _carregador(b"cc")[0])
+
+    assert cache.tamanho_bytes == 4
+    assert await cache.obter("a", (), _carregador(b"novo")[0]) == b"aa"
+
+
+async def test_venda_invalida_o_relatorio_de_cobrancas(api, backend):
+    assert (await api.get("/api/v1/cobranca/cobrancas_ativas")).json() == []
+
+    # Escrita fora das rotas: o relatório continua saindo do cache
+    await get_repositorios().cobranca.inserir([{
+        "cliente": "Bruno", "valor": 5.0, "vencimento": "2026-11-18T10:00:00+00:00",
+        "data_venda": "2026-10-18T10:00:00+00:00", "status_pagamento": False,
+    }])
+    assert (await api.get("/api/v1/cobranca/cobrancas_ativas")).json() == []
+
+    await api.post("/api/v1/vendas/vender", json=VENDA)
+
+    clientes = [linha["cliente"] for linha in (await api.get("/api/v1/cobranca/cobrancas_ativas")).json()]
+    assert sorted(clientes) == ["Ana", "Bruno"]
@@ -0,0 +1,77 @@
+import pytest
+
+from app.api.src.api.deps import get_repositorios
+from app.api.src.core import resumo_vendas as modulo_resumo
+from app.api.src.core.resumo_vendas import ResumoVendas
+
+pytestmark = pytest.mark.anyio
+
+INTERVALO = {"de": "2026-10-12", "ate": "2026-10-18"}
+
+
+def _venda(cliente: str, dia: int, quantidade: int = 1) -> dict:
+    return {
+        "cliente": cliente,
+        "categoria_produto": "Pizza",
+        "qtd_unidades": quantidade,
+        "valor_unitario": 12.5,
+        "status_pagamento": False,
+        "data_venda": f"2026-10-{dia:02d}T10:00:00+00:00",
+        "data_vencimento": "2026-11-18T10:00:00+00:00",
+        "valor_total": 12.5 * quantidade,
+    }
+
+
+@pytest.fixture
+def resumo(monkeypatch):
+    resumo = ResumoVendas()
+    monkeypatch.setattr(modulo_resumo, "resumo_vendas", resumo)
+    return resumo
+
+
+def _unidades(resposta) -> list:
+    return [(item["periodo"], item["unidades"]) for item in resposta.json()["itens"]]
+
+
+async def test_resumo_pelo_banco_e_pela_memoria(api, backend, resumo):
+    await api.post("/api/v1/vendas/vender", json=_venda("Ana", 13, 2))
+    await api.post("/api/v1/vendas/vender", json=_venda("Bruno", 14, 1))
+    await api.post("/api/v1/vendas/vender", json=_venda("Carla", 14, 3))
+
+    # Antes da reconstrução, a rota soma as vendas do intervalo no banco
+    pelo_banco = await api.get("/api/v1/vendas/resumo", params=INTERVALO)
+    await resumo.reconstruir()
+    pela_memoria = await api.get("/api/v1/vendas/resumo", params={**INTERVALO, "agrupamento": "semana"})
+
+    assert pelo_banco.status_code == pela_memoria.status_code == 200
+    assert _unidades(pelo_banco) == [("2026-10-13", 2), ("2026-10-14", 4)]
+    assert _unidades(pela_memoria) == [("2026-10-12", 6)]
+    assert pela_memoria.json()["total_receita"] == 75.0
+
+
+async def test_reconciliacao_le_so_as_vendas_novas_sem_contar_duas_vezes(api, backend, resumo):
+    repositorio = get_repositorios().venda
+    await repositorio.inserir([_venda("Ana", 13)])
+    await resumo.reconstruir()
+
+    # Gravada por outro processo: só aparece depois da reconciliação
+    await repositorio.inserir([_venda("Bruno", 13)])
+    # Gravada por este processo: já está somada
+    await api.post("/api/v1/vendas/vender", json=_venda("Carla", 13))
+    assert _unidades(await api.get("/api/v1/vendas/resumo", params=INTERVALO)) == [("2026-10-13", 2)]
+
+    await resumo.atualizar()
+    await resumo.atualizar()
+
+    assert _unidades(await api.get("/api/v1/vendas/resumo", params=INTERVALO)) == [("2026-10-13", 3)]
+
+
+async def test_reconciliacao_nao_rele_o_historico(api, fake, resumo, transporte):
+    await get_repositorios().venda.inserir([_venda("Ana", 13), _venda("Bruno", 14)])
+    await resumo.reconstruir()
+    consultas = []
+    transporte.recusar = lambda request: consultas.append(dict(request.url.params.multi_items()))
+
+    await resumo.atualizar()
+
+    assert [consulta.get("id") for consulta in consultas] == [f"gt.{fake.dados['Venda'][-1]['id']}"]
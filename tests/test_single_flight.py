@@ -0,0 +1,95 @@
+import asyncio
+
+import httpx
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def upstream():
+    """Handler que segura as respostas até `liberar` e anota cada chamada."""
+
+    class Upstream:
+        def __init__(self):
+            self.chamadas = []
+            self.liberar = asyncio.Event()
+
+        async def __call__(self, request):
+            self.chamadas.append((request.method, str(request.url)))
+            await self.liberar.wait()
+            return httpx.Response(200, json=[{"id": len(self.chamadas)}])
+
+    return Upstream()
+
+
+async def _em_paralelo(upstream, *chamadas):
+    tarefas = [asyncio.create_task(chamada) for chamada in chamadas]
+    await asyncio.sleep(0.01)
+    upstream.liberar.set()
+    return await asyncio.gather(*tarefas)
+
+
+async def test_gets_identicos_simultaneos_compartilham_uma_chamada(upstream, novo_cliente_supabase):
+    cliente = novo_cliente_supabase(upstream, single_flight=True)
+
+    respostas = await _em_paralelo(
+        upstream, *(cliente.get("Estoque", params={"categoria": "eq.Pizza"}) for _ in range(5))
+    )
+
+    assert len(upstream.chamadas) == 1
+    assert [resposta.json() for resposta in respostas] == [[{"id": 1}]] * 5
+    assert cliente._em_andamento == {}
+
+
+async def test_parametros_diferentes_nao_sao_agrupados(upstream, novo_cliente_supabase):
+    cliente = novo_cliente_supabase(upstream, single_flight=True)
+
+    await _em_paralelo(
+        upstream,
+        cliente.get("Estoque", params={"categoria": "eq.Pizza"}),
+        cliente.get("Estoque", params={"categoria": "eq.Bolo"}),
+        cliente.get("Venda", params={"categoria": "eq.Pizza"}),
+    )
+
+    assert len(upstream.chamadas) == 3
+
+
+async def test_escritas_nunca_sao_agrupadas(upstream, novo_cliente_supabase):
+    cliente = novo_cliente_supabase(upstream, single_flight=True)
+
+    await _em_paralelo(upstream, cliente.post("Venda", json={"a": 1}), cliente.post("Venda", json={"a": 1}))
+
+    assert len(upstream.chamadas) == 2
+
+
+async def test_get_depois_da_resposta_faz_nova_chamada(upstream, novo_cliente_supabase):
+    cliente = novo_cliente_supabase(upstream, single_flight=True)
+    upstream.liberar.set()
+
+    await cliente.get("Estoque")
+    await cliente.get("Estoque")
+
+    assert len(upstream.chamadas) == 2
+
+
+async def test_desligado_cada_get_faz_sua_chamada(upstream, novo_cliente_supabase):
+    cliente = novo_cliente_supabase(upstream, single_flight=False)
+
+    await _em_paralelo(upstream, *(cliente.get("Estoque") for _ in range(3)))
+
+    assert len(upstream.chamadas) == 3
+
+
+async def test_cancelar_um_chamador_nao_cancela_os_demais(upstream, novo_cliente_supabase):
+    cliente = novo_cliente_supabase(upstream, single_flight=True)
+    primeira = asyncio.create_task(cliente.get("Estoque"))
+    segunda = asyncio.create_task(cliente.get("Estoque"))
+    await asyncio.sleep(0.01)
+
+    primeira.cancel()
+    upstream.liberar.set()
+
+    assert (await segunda).json() == [{"id": 1}]
+    assert primeira.cancelled()
+    assert len(upstream.chamadas) == 1
@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+
+import httpx
+import pytest
+
+from app.api.src.api.deps import get_repositorios
+from app.api.src.core.config import get_settings
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def paginas_pequenas(ambiente):
+    # Várias páginas mesmo com poucas linhas
+    ambiente.setenv("TAMANHO_PAGINA_STREAMING", "2")
+    get_settings.cache_clear()
+
+
+async def _inserir_vendas(quantidade: int) -> None:
+    await get_repositorios().venda.inserir([
+        {
+            "cliente": f"cliente-{i}",
+            "categoria_produto": "Pizza",
+            "qtd_unidades": 1,
+            "valor_unitario": 12.5,
+            "status_pagamento": False,
+            "data_venda": f"2026-10-{i:02d}T10:00:00+00:00",
+            "data_vencimento": "2026-12-01T00:00:00+00:00",
+            "valor_total": 12.5,
+        }
+        for i in range(1, quantidade + 1)
+    ])
+
+
+async def test_ndjson_traz_todas_as_paginas_em_ordem_de_id(api, backend):
+    await _inserir_vendas(5)
+
+    resposta = await api.get("/api/v1/historico/vendas", params={"categoria": "Pizza", "format": "ndjson"})
+
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"].startswith("application/x-ndjson")
+    linhas = [json.loads(linha) for linha in resposta.text.splitlines()]
+    assert [linha["cliente"] for linha in linhas] == [f"cliente-{i}" for i in range(1, 6)]
+
+
+async def test_csv_pelo_cabecalho_accept(api, backend):
+    await _inserir_vendas(3)
+
+    resposta = await api.get(
+        "/api/v1/historico/vendas", params={"categoria": "Pizza"}, headers={"Accept": "text/csv"}
+    )
+
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"].startswith("text/csv")
+    assert 'filename="historico_vendas.csv"' in resposta.headers["content-disposition"]
+    linhas = list(csv.DictReader(io.StringIO(resposta.text)))
+    assert [linha["cliente"] for linha in linhas] == ["cliente-1", "cliente-2", "cliente-3"]
+    assert linhas[0]["valor_total"] == "12.5"
+
+
+async def test_sem_linhas_o_csv_traz_so_o_cabecalho(api, backend):
+    resposta = await api.get("/api/v1/historico/vendas", params={"categoria": "Pizza", "format": "csv"})
+
+    assert resposta.status_code == 200
+    assert resposta.text.startswith("cliente,")
+    assert resposta.text.count("\r\n") == 1
+
+
+async def test_formato_desconhecido(api, fake):
+    resposta = await api.get("/api/v1/historico/vendas", params={"categoria": "Pizza", "format": "xml"})
+
+    assert resposta.status_code == 400
+
+
+async def test_erro_na_primeira_pagina_vira_status_http(api, fake, transporte):
+    transporte.recusar = lambda request: httpx.Response(503, json={"message": "fora"})
+
+    resposta = await api.get("/api/v1/historico/vendas", params={"categoria": "Pizza", "format": "ndjson"})
+
+    assert resposta.status_code == 503
@@ -0,0 +1,59 @@
+import pytest
+
+from app.api.src.api.deps import get_repositorios
+from app.api.src.core.config import get_settings
+from app.api.src.repository.sql import venda as repositorio_venda
+
+pytestmark = pytest.mark.anyio
+
+VENDA = {
+    "cliente": "Ana",
+    "categoria_produto": "Pizza",
+    "qtd_unidades": 3,
+    "status_pagamento": False,
+    "data_venda": "2026-10-18T10:00:00Z",
+    "data_vencimento": "2026-11-18T10:00:00Z",
+    "valor_total": 37.5,
+}
+
+
+@pytest.fixture(autouse=True)
+def transacional(ambiente):
+    ambiente.setenv("VENDA_TRANSACIONAL", "true")
+    get_settings.cache_clear()
+
+
+async def test_venda_cobranca_e_baixa_em_uma_chamada(api, backend):
+    resposta = await api.post("/api/v1/vendas/vender", json=VENDA)
+
+    assert resposta.status_code == 201
+    corpo = resposta.json()
+    # Sem 'valor_unitario', vale o preço atual da categoria
+    assert corpo["venda"]["valor_unitario"] == 12.5
+    assert (corpo["cobranca"]["cliente"], corpo["cobranca"]["valor"]) == ("Ana", 37.5)
+    assert corpo["estoque"]["quantidade"] == 47
+    assert [linha["cliente"] for linha in await get_repositorios().cobranca.listar(False)] == ["Ana"]
+
+
+async def test_rest_faz_um_unico_round_trip(api, fake, transporte):
+    caminhos = []
+    transporte.recusar = lambda request: caminhos.append((request.method, request.url.path))
+
+    await api.post("/api/v1/vendas/vender", json=VENDA)
+
+    assert caminhos == [("POST", "/rest/v1/rpc/registrar_venda")]
+
+
+async def test_falha_nao_grava_nada(api, sqlite, monkeypatch):
+    def falhar(*args, **kwargs):
+        raise ValueError("falha simulada")
+
+    monkeypatch.setattr(repositorio_venda, "incrementar_na_sessao", falhar)
+
+    resposta = await api.post("/api/v1/vendas/vender", json=VENDA)
+
+    assert resposta.status_code == 500
+    repositorios = get_repositorios()
+    assert await repositorios.cobranca.listar(False) == []
+    assert [venda async for pagina in repositorios.venda.paginas(None, None, None, 100) for venda in pagina] == []
+    assert (await repositorios.estoque.obter("Pizza"))["quantidade"] == 50
@@ -0,0 +1,39 @@
+import httpx
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+VENDA = {
+    "cliente": "Ana",
+    "categoria_produto": "Brownie",
+    "qtd_unidades": 2,
+    "valor_unitario": 8.0,
+    "status_pagamento": False,
+    "data_venda": "2026-10-18T10:00:00Z",
+    "data_vencimento": "2026-11-18T10:00:00Z",
+    "valor_total": 16.0,
+}
+
+
+async def test_venda_grava_venda_cobranca_e_baixa(api, fake):
+    resposta = await api.post("/api/v1/vendas/vender", json=VENDA)
+
+    assert resposta.status_code == 201
+    assert [linha["cliente"] for linha in fake.dados["Venda"]] == ["Ana"]
+    assert [(linha["cliente"], linha["valor"]) for linha in fake.dados["Cobranca"]] == [("Ana", 16.0)]
+    assert next(linha for linha in fake.dados["Estoque"] if linha["categoria"] == "Brownie")["quantidade"] == 98
+
+
+@pytest.mark.parametrize("status_code", [400, 503])
+async def test_falha_na_venda_nao_grava_a_cobranca(api, fake, transporte, status_code):
+    transporte.recusar = lambda request: (
+        httpx.Response(status_code, json={"message": "falha"})
+        if request.method == "POST" and request.url.path == "/rest/v1/Venda"
+        else None
+    )
+
+    resposta = await api.post("/api/v1/vendas/vender", json=VENDA)
+
+    assert resposta.status_code == status_code
+    assert fake.dados["Venda"] == []
+    assert fake.dados["Cobranca"] == []
@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.api.src.api.deps import get_repositorios
+from app.api.src.repository.sql import venda as repositorio_venda
+
+pytestmark = pytest.mark.anyio
+
+
+def _venda(cliente: str, categoria: str, quantidade: int) -> dict:
+    return {
+        "cliente": cliente,
+        "categoria_produto": categoria,
+        "qtd_unidades": quantidade,
+        "valor_unitario": 5.0,
+        "status_pagamento": False,
+        "data_venda": "2026-10-18T10:00:00Z",
+        "data_vencimento": "2026-11-18T10:00:00Z",
+        "valor_total": 5.0 * quantidade,
+    }
+
+
+async def test_lote_grava_vendas_cobrancas_e_uma_baixa_por_categoria(api, backend):
+    lote = [_venda("Ana", "Pizza", 1), _venda("Bruno", "Pizza", 2), _venda("Carla", "Bolo", 3)]
+
+    resposta = await api.post("/api/v1/vendas/vender_lote", json=lote)
+
+    assert resposta.status_code == 201
+    resultados = resposta.json()["resultados"]
+    assert [resultado["erro"] for resultado in resultados] == [None, None, None]
+    assert [resultado["estoque_restante"] for resultado in resultados] == [47, 47, 17]
+    repositorios = get_repositorios()
+    assert sorted(linha["cliente"] for linha in await repositorios.cobranca.listar(False)) == ["Ana", "Bruno", "Carla"]
+    assert (await repositorios.estoque.obter("Pizza"))["quantidade"] == 47
+    assert (await repositorios.estoque.obter("Bolo"))["quantidade"] == 17
+
+
+async def test_falha_no_meio_do_lote_nao_grava_nada(api, sqlite, monkeypatch):
+    original = repositorio_venda._cobranca_da_venda
+    chamadas = []
+
+    def falhar_na_segunda(venda):
+        chamadas.append(venda)
+        if len(chamadas) == 2:
+            raise OperationalError("INSERT", {}, Exception("falha simulada"))
+        return original(venda)
+
+    monkeypatch.setattr(repositorio_venda, "_cobranca_da_venda", falhar_na_segunda)
+
+    resposta = await api.post("/api/v1/vendas/vender_lote", json=[_venda("Ana", "Pizza", 1), _venda("Bruno", "Pizza", 2)])
+
+    assert resposta.status_code == 503
+    repositorios = get_repositorios()
+    assert [venda async for pagina in repositorios.venda.paginas(None, None, None, 100) for venda in pagina] == []
+    assert await repositorios.cobranca.listar(False) == []
+    assert (await repositorios.estoque.obter("Pizza"))["quantidade"] == 50